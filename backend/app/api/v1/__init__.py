@@ -4,7 +4,7 @@ API v1 router
 from fastapi import APIRouter
 
 # 导入所有路由模块
-from app.api.v1 import auth, users, papers, templates, check, results, previous_papers, parameters, statistics
+from app.api.v1 import auth, users, papers, templates, check, results, previous_papers, parameters, statistics, cohort, search
 
 # 创建v1路由器
 api_v1_router = APIRouter(prefix="/api/v1")
@@ -19,3 +19,5 @@ api_v1_router.include_router(results.router, prefix="/results", tags=["检查结
 api_v1_router.include_router(previous_papers.router, prefix="/previous-papers", tags=["往届论文"])
 api_v1_router.include_router(parameters.router, prefix="/parameters", tags=["参数设置"])
 api_v1_router.include_router(statistics.router, prefix="/statistics", tags=["统计分析"])
+api_v1_router.include_router(cohort.router, prefix="/cohort", tags=["同届比对"])
+api_v1_router.include_router(search.router, prefix="/search", tags=["全文搜索"])
@@ -0,0 +1,116 @@
+"""
+同届论文比对路由
+"""
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import User, UserRole
+from app.models.paper import GraduationPaper
+from app.models.cohort import CohortCheckJob, CohortSimilarPair
+from app.schemas.cohort import CohortCheckSubmit, CohortCheckJobResponse, CohortSimilarPairResponse
+from app.schemas.common import PaginatedResponse
+from app.core.exceptions import NotFoundException, ForbiddenException
+from app.core.permissions import has_minimum_role
+from app.services.cohort_service import cohort_service
+
+router = APIRouter()
+
+
+@router.post("/jobs", response_model=CohortCheckJobResponse, status_code=status.HTTP_201_CREATED)
+async def submit_cohort_check(
+    job_data: CohortCheckSubmit,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    提交同届论文比对任务（需要教师及以上权限）
+    
+    - **department**: 院系
+    - **year**: 届别（论文提交年份）
+    - **threshold**: 可疑论文对的相似度阈值（%）
+    """
+    if not has_minimum_role(current_user, UserRole.TEACHER):
+        raise ForbiddenException("需要教师及以上权限")
+    
+    job = await cohort_service.submit_job(
+        db,
+        job_data.department,
+        job_data.year,
+        current_user.id,
+        job_data.threshold
+    )
+    
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=CohortCheckJobResponse)
+async def get_cohort_job(
+    job_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取同届比对任务状态（需要教师及以上权限）"""
+    if not has_minimum_role(current_user, UserRole.TEACHER):
+        raise ForbiddenException("需要教师及以上权限")
+    
+    result = await db.execute(select(CohortCheckJob).where(CohortCheckJob.id == job_id))
+    job = result.scalar_one_or_none()
+    
+    if not job:
+        raise NotFoundException("比对任务不存在")
+    
+    return job
+
+
+@router.get("/jobs/{job_id}/pairs", response_model=PaginatedResponse[CohortSimilarPairResponse])
+async def get_cohort_pairs(
+    job_id: int,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取同届可疑论文对（按相似度降序，需要教师及以上权限）"""
+    if not has_minimum_role(current_user, UserRole.TEACHER):
+        raise ForbiddenException("需要教师及以上权限")
+    
+    job = await db.scalar(select(CohortCheckJob).where(CohortCheckJob.id == job_id))
+    if not job:
+        raise NotFoundException("比对任务不存在")
+    
+    # 查询总数
+    total = await db.scalar(
+        select(func.count()).select_from(CohortSimilarPair).where(CohortSimilarPair.job_id == job_id)
+    )
+    
+    # 分页查询（附带双方论文标题）
+    paper_a = aliased(GraduationPaper)
+    paper_b = aliased(GraduationPaper)
+    result = await db.execute(
+        select(CohortSimilarPair, paper_a.title, paper_b.title)
+        .join(paper_a, paper_a.id == CohortSimilarPair.paper_a_id)
+        .join(paper_b, paper_b.id == CohortSimilarPair.paper_b_id)
+        .where(CohortSimilarPair.job_id == job_id)
+        .order_by(CohortSimilarPair.similarity.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    
+    items = []
+    for pair, title_a, title_b in result.all():
+        item = CohortSimilarPairResponse.from_orm(pair)
+        item.paper_a_title = title_a
+        item.paper_b_title = title_b
+        items.append(item)
+    
+    return PaginatedResponse(
+        total=total,
+        page=page,
+        page_size=page_size,
+        total_pages=(total + page_size - 1) // page_size,
+        items=items
+    )
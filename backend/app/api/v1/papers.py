@@ -17,9 +17,13 @@ from app.schemas.paper import (
     PaperListResponse
 )
 from app.schemas.common import Message, PaginatedResponse
-from app.core.exceptions import NotFoundException, ForbiddenException
+from app.core.exceptions import NotFoundException, ForbiddenException, ConflictException
 from app.core.permissions import has_minimum_role, can_access_paper
 from app.utils.file_handler import save_upload_file, delete_file, get_file_extension
+from app.services.corpus_service import corpus_service, SOURCE_LABELS
+from app.services.archive_service import archive_service
+from app.services.index_sync_service import index_sync_service
+from app.models.index_queue import IndexAction
 from app.config import settings
 
 router = APIRouter()
@@ -44,6 +48,16 @@ async def upload_graduation_paper(
     - **department**: 院系
     - **major**: 专业
     """
+    # 标题与往届论文或他人论文完全相同（忽略格式差异）时直接拒绝，本人重复上传不受限制
+    duplicates = [
+        paper for paper in await archive_service.find_exact_titles(db, title)
+        if paper["author_id"] != current_user.id
+    ]
+    if duplicates:
+        raise ConflictException(
+            f"标题与{SOURCE_LABELS[duplicates[0]['paper_type']]}中的论文《{duplicates[0]['title']}》重复"
+        )
+    
     # 保存文件
     storage_dir = os.path.join(settings.STORAGE_PATH, "graduation")
     file_path, file_size = await save_upload_file(file, storage_dir)
@@ -62,8 +76,14 @@ async def upload_graduation_paper(
     )
     
     db.add(paper)
+    await db.flush()
+    index_sync_service.enqueue(db, "graduation", paper.id)
     await db.commit()
     await db.refresh(paper)
+    index_sync_service.notify()
+    
+    # 后台加入查重比对库
+    corpus_service.add_paper_in_background("graduation", paper.id, paper.title, file_path=paper.file_path)
     
     return paper
 
@@ -109,8 +129,14 @@ async def upload_course_paper(
     )
     
     db.add(paper)
+    await db.flush()
+    index_sync_service.enqueue(db, "course", paper.id)
     await db.commit()
     await db.refresh(paper)
+    index_sync_service.notify()
+    
+    # 后台加入查重比对库
+    corpus_service.add_paper_in_background("course", paper.id, paper.title, file_path=paper.file_path)
     
     return paper
 
@@ -248,6 +274,11 @@ async def delete_paper(
     
     # 删除记录
     await db.delete(paper)
+    index_sync_service.enqueue(db, paper_type, paper_id, IndexAction.DELETE)
     await db.commit()
+    index_sync_service.notify()
+    
+    # 从查重比对库移除
+    corpus_service.remove_paper(paper_type, paper_id)
     
     return Message(message="论文删除成功")
@@ -1,6 +1,7 @@
 """
 往届论文路由
 """
+from typing import List
 from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
@@ -9,10 +10,13 @@ from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User, UserRole
 from app.models.paper import PreviousPaper
-from app.schemas.paper import PreviousPaperCreate, PreviousPaperResponse
+from app.schemas.paper import PreviousPaperCreate, PreviousPaperResponse, SimilarPreviousPaperResponse
 from app.schemas.common import Message, PaginatedResponse
 from app.core.exceptions import NotFoundException, ForbiddenException
 from app.core.permissions import has_minimum_role
+from app.services.archive_service import archive_service
+from app.services.index_sync_service import index_sync_service
+from app.models.index_queue import IndexAction
 
 router = APIRouter()
 
@@ -30,8 +34,14 @@ async def create_previous_paper(
     paper = PreviousPaper(**paper_data.dict())
     
     db.add(paper)
+    await db.flush()
+    index_sync_service.enqueue(db, "previous", paper.id)
     await db.commit()
     await db.refresh(paper)
+    index_sync_service.notify()
+    
+    # 同步更新标题索引
+    await archive_service.on_paper_created(db, paper)
     
     return paper
 
@@ -72,6 +82,29 @@ async def get_previous_papers(
     )
 
 
+@router.get("/{paper_id}/similar", response_model=List[SimilarPreviousPaperResponse])
+async def get_similar_previous_papers(
+    paper_id: int,
+    limit: int = Query(10, ge=1, le=10),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取标题相似的往届论文（基于预先计算的k近邻图）"""
+    paper = await db.scalar(select(PreviousPaper.id).where(PreviousPaper.id == paper_id))
+    if not paper:
+        raise NotFoundException("往届论文不存在")
+    
+    neighbors = await archive_service.get_similar_papers(db, paper_id, limit)
+    
+    return [
+        SimilarPreviousPaperResponse(
+            **PreviousPaperResponse.from_orm(neighbor).dict(),
+            similarity=similarity
+        )
+        for neighbor, similarity in neighbors
+    ]
+
+
 @router.delete("/{paper_id}", response_model=Message)
 async def delete_previous_paper(
     paper_id: int,
@@ -89,6 +122,11 @@ async def delete_previous_paper(
         raise NotFoundException("往届论文不存在")
     
     await db.delete(paper)
+    index_sync_service.enqueue(db, "previous", paper_id, IndexAction.DELETE)
     await db.commit()
+    index_sync_service.notify()
+    
+    # 同步更新标题索引
+    await archive_service.on_paper_deleted(db, paper_id)
     
     return Message(message="往届论文删除成功")
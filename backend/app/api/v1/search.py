@@ -0,0 +1,76 @@
+"""
+全文搜索路由
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+
+from app.dependencies import get_current_user
+from app.models.user import User, UserRole
+from app.schemas.search import SearchHitResponse
+from app.schemas.common import PaginatedResponse
+from app.core.exceptions import BadRequestException, ForbiddenException
+from app.core.permissions import has_minimum_role
+from app.utils.search_engine import async_search_engine
+
+router = APIRouter()
+
+# 允许搜索的字段
+SEARCH_FIELDS = {"title", "content", "keywords"}
+
+
+@router.get("", response_model=PaginatedResponse[SearchHitResponse])
+async def search_papers(
+    q: str = Query(..., min_length=1, max_length=200),
+    fields: Optional[str] = Query(None, description="搜索字段，逗号分隔（title,content,keywords）"),
+    year_from: Optional[int] = Query(None, ge=1900, le=2100),
+    year_to: Optional[int] = Query(None, ge=1900, le=2100),
+    department: Optional[str] = Query(None, max_length=100),
+    paper_type: Optional[str] = Query(None, regex="^(previous|graduation|course)$"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    全文搜索论文
+    
+    - **q**: 查询字符串
+    - **fields**: 搜索字段（默认标题、正文、关键词）
+    - **year_from** / **year_to**: 届别范围
+    - **department**: 院系
+    - **paper_type**: 论文类型（学生只能搜索往届论文）
+    """
+    search_fields = None
+    if fields:
+        search_fields = [field.strip() for field in fields.split(",") if field.strip()]
+        if not search_fields or not set(search_fields) <= SEARCH_FIELDS:
+            raise BadRequestException("搜索字段只能是 title、content、keywords")
+    
+    if year_from and year_to and year_from > year_to:
+        raise BadRequestException("起始届别不能晚于结束届别")
+    
+    # 学生只能搜索往届论文，不能看到其他学生提交的论文
+    if not has_minimum_role(current_user, UserRole.TEACHER):
+        if paper_type and paper_type != "previous":
+            raise ForbiddenException("需要教师及以上权限")
+        paper_type = "previous"
+    
+    result = await async_search_engine.search_page(
+        q,
+        page=page,
+        page_size=page_size,
+        fields=search_fields,
+        filters={
+            "year_from": year_from,
+            "year_to": year_to,
+            "department": department,
+            "paper_type": paper_type
+        }
+    )
+    
+    return PaginatedResponse(
+        total=result["total"],
+        page=result["page"],
+        page_size=result["page_size"],
+        total_pages=result["total_pages"],
+        items=[SearchHitResponse(**hit) for hit in result["items"]]
+    )
@@ -4,7 +4,7 @@
 import os
 from pathlib import Path
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Literal
 
 
 class Settings(BaseSettings):
@@ -33,6 +33,42 @@ class Settings(BaseSettings):
     
     # Whoosh索引配置
     WHOOSH_INDEX_PATH: str = "./data/whoosh_index"
+    # 批量建索引的进程数与每个进程的缓冲区大小（MB）
+    WHOOSH_BULK_PROCS: int = 1
+    WHOOSH_BULK_LIMITMB: int = 256
+    # 全文索引后台同步间隔（秒）与每批处理的队列操作数
+    INDEX_SYNC_INTERVAL: float = 2.0
+    INDEX_SYNC_BATCH_SIZE: int = 500
+    # 全文搜索查询线程数
+    SEARCH_THREADS: int = 4
+    # 全文搜索结果缓存条目数（索引有新提交时自动失效，0表示不缓存）
+    SEARCH_CACHE_MAX_ENTRIES: int = 10000
+    
+    # 相似度索引存储目录（MinHash等）
+    INDEX_DATA_PATH: str = "./data/indexes"
+    
+    # 内容查重指纹参数（保证检出长度 >= 窗口 + k-gram - 1 的连续重复）
+    DUPLICATE_KGRAM_SIZE: int = 8
+    DUPLICATE_WINDOW_SIZE: int = 16
+    
+    # 标题语义检索阈值（LSA向量余弦相似度，离线索引由 build_semantic_index.py 生成）
+    SEMANTIC_TITLE_THRESHOLD: float = 0.8
+    
+    # 相似度向量化方式（tfidf: 比对库语料IDF；hashing: 2^20维有符号特征哈希，无需词表）
+    SIMILARITY_MODE: Literal["tfidf", "hashing"] = "tfidf"
+    
+    # 文本处理进程池大小（分词、指纹计算、同届比对共用，0表示使用CPU核数）
+    PROCESS_POOL_WORKERS: int = 0
+    
+    # 启动预热（后台加载jieba词典、打开全文索引、预导入较慢的模块）
+    STARTUP_WARMUP: bool = True
+    
+    # jieba词典缓存文件（为空时保存到 INDEX_DATA_PATH/jieba.cache）
+    JIEBA_CACHE_FILE: str = ""
+    
+    # 分词缓存配置
+    TOKEN_CACHE_MAX_ENTRIES: int = 50000
+    TOKEN_CACHE_MAX_MB: int = 64
     
     # 服务器配置
     HOST: str = "0.0.0.0"
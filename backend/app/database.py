@@ -1,9 +1,12 @@
 """
 数据库配置模块
 """
+from sqlalchemy import inspect, select, update, bindparam
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.schema import CreateIndex
 from app.config import settings
+from app.utils.title_hash import title_hash
 
 # 创建异步数据库引擎
 engine = create_async_engine(
@@ -39,7 +42,63 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+def _add_missing_columns(conn):
+    """
+    为已存在的表补充模型中新增的可空列及其索引（SQLite不支持自动迁移）
+
+    Args:
+        conn: 同步数据库连接
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+            for index in table.indexes:
+                if column in index.columns.values():
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _backfill_title_hashes(conn, batch_size: int = 1000):
+    """
+    为缺少标题哈希的论文补算规范化哈希
+
+    Args:
+        conn: 同步数据库连接
+        batch_size: 每批更新行数
+    """
+    for table in Base.metadata.sorted_tables:
+        if "title_hash" not in table.columns:
+            continue
+        
+        rows = conn.execute(
+            select(table.c.id, table.c.title).where(table.c.title_hash.is_(None))
+        ).all()
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(title_hash=bindparam("hash_value"))
+        )
+        for start in range(0, len(rows), batch_size):
+            params = [
+                {"row_id": row.id, "hash_value": title_hash(row.title)}
+                for row in rows[start:start + batch_size]
+                if row.title
+            ]
+            if params:
+                conn.execute(statement, params)
+
+
 async def init_db():
     """初始化数据库"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_backfill_title_hashes)
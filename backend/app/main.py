@@ -3,6 +3,8 @@ FastAPI应用主入口
 """
 import os
 import sys
+import time
+import asyncio
 from pathlib import Path
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
@@ -14,12 +16,22 @@ backend_dir = Path(__file__).parent.parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
+_import_started = time.perf_counter()
+
 from app.config import settings
 from app.database import init_db, AsyncSessionLocal
 from app.models.user import User, UserRole
 from app.core.security import get_password_hash
 from app.api.v1 import api_v1_router
 from app.utils.file_handler import ensure_directory_exists
+from app.utils.text_pool import shutdown_process_pool
+from app.services.archive_service import archive_service
+from app.services.corpus_service import corpus_service
+from app.services.index_sync_service import index_sync_service
+from app.utils.search_engine import search_engine, async_search_engine
+from app.utils.warmup import startup_timings, configure_jieba, warm_up
+
+startup_timings.record("导入模块", time.perf_counter() - _import_started)
 
 
 @asynccontextmanager
@@ -29,6 +41,8 @@ async def lifespan(app: FastAPI):
     - 启动时创建必要的目录结构
     - 初始化数据库
     - 创建默认管理员账户
+    - 加载往届论文索引和查重比对库
+    - 后台预热jieba词典、全文索引等（记录各阶段耗时）
     """
     print("🚀 应用启动中...")
     
@@ -39,7 +53,8 @@ async def lifespan(app: FastAPI):
         "./data/storage/course",
         "./data/storage/templates",
         "./data/storage/reports",
-        "./data/whoosh_index"
+        "./data/whoosh_index",
+        settings.INDEX_DATA_PATH
     ]
     
     for directory in data_dirs:
@@ -48,10 +63,16 @@ async def lifespan(app: FastAPI):
     
     # 2. 初始化数据库
     print("📦 正在初始化数据库...")
-    await init_db()
+    with startup_timings.phase("初始化数据库"):
+        await init_db()
     print("✅ 数据库初始化完成")
     
-    # 3. 创建默认管理员账户
+    # 3. 后台预热（jieba词典缓存文件需在首次分词前设置）
+    configure_jieba()
+    if settings.STARTUP_WARMUP:
+        asyncio.create_task(warm_up())
+    
+    # 4. 创建默认管理员账户
     async with AsyncSessionLocal() as db:
         try:
             # 检查管理员是否已存在
@@ -81,7 +102,22 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             print(f"❌ 创建管理员账户失败: {str(e)}")
     
-    print("✨ 应用启动完成！")
+    # 5. 加载往届论文相似度索引
+    async with AsyncSessionLocal() as db:
+        try:
+            with startup_timings.phase("加载往届论文索引"):
+                await archive_service.load_indexes(db)
+            print("✅ 往届论文索引已加载")
+        except Exception as e:
+            print(f"❌ 加载往届论文索引失败: {str(e)}")
+    
+    # 6. 后台加载并同步查重比对库（需要解析论文全文，不阻塞启动）
+    asyncio.create_task(corpus_service.load_and_sync())
+    
+    # 7. 启动全文索引后台同步（处理论文写入时登记的索引操作）
+    index_sync_service.start()
+    
+    print(f"✨ 应用启动完成！（{startup_timings.summary()}）")
     print(f"📖 API文档: http://localhost:8000/docs")
     print(f"📖 ReDoc: http://localhost:8000/redoc")
     
@@ -89,6 +125,11 @@ async def lifespan(app: FastAPI):
     
     # 应用关闭时的清理工作
     print("👋 应用正在关闭...")
+    await index_sync_service.stop()
+    async_search_engine.shutdown()
+    archive_service.save_indexes()
+    corpus_service.save()
+    shutdown_process_pool()
 
 
 # 创建FastAPI应用
@@ -129,7 +170,9 @@ async def health_check():
     """健康检查"""
     return {
         "status": "healthy",
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "startup_ms": startup_timings.as_dict(),
+        "search_cache": search_engine.cache.stats()
     }
 
 
@@ -6,6 +6,8 @@ from app.models.paper import GraduationPaper, CoursePaper, PreviousPaper
 from app.models.template import Template
 from app.models.check import CheckResult, CheckIssue
 from app.models.parameter import PaperParameter
+from app.models.cohort import CohortCheckJob, CohortSimilarPair
+from app.models.index_queue import IndexOperation
 
 __all__ = [
     "User",
@@ -15,5 +17,8 @@ __all__ = [
     "Template",
     "CheckResult",
     "CheckIssue",
-    "PaperParameter"
+    "PaperParameter",
+    "CohortCheckJob",
+    "CohortSimilarPair",
+    "IndexOperation"
 ]
@@ -0,0 +1,52 @@
+"""
+同届论文比对模型
+"""
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Float
+from sqlalchemy.sql import func
+from app.database import Base
+from app.models.check import CheckStatus
+
+
+class CohortCheckJob(Base):
+    """同届论文比对任务表"""
+    __tablename__ = "cohort_check_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    department = Column(String(100), nullable=False, index=True)
+    year = Column(Integer, nullable=False, index=True)
+    
+    status = Column(SQLEnum(CheckStatus), nullable=False, default=CheckStatus.PENDING)
+    progress = Column(Float, nullable=False, default=0.0)  # 0.0 - 100.0
+    threshold = Column(Float, nullable=False, default=30.0)  # 可疑论文对的相似度阈值（%）
+    
+    total_papers = Column(Integer, nullable=False, default=0)
+    candidate_pairs = Column(Integer, nullable=False, default=0)  # 分块后需要精确比对的论文对数
+    suspicious_pairs = Column(Integer, nullable=False, default=0)
+    
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<CohortCheckJob {self.id}: {self.department} {self.year}>"
+
+
+class CohortSimilarPair(Base):
+    """同届可疑论文对表"""
+    __tablename__ = "cohort_similar_pairs"
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    job_id = Column(Integer, ForeignKey("cohort_check_jobs.id"), nullable=False, index=True)
+    
+    paper_a_id = Column(Integer, ForeignKey("graduation_papers.id"), nullable=False, index=True)
+    paper_b_id = Column(Integer, ForeignKey("graduation_papers.id"), nullable=False, index=True)
+    
+    similarity = Column(Float, nullable=False, index=True)  # 双向覆盖率中的较大值（%）
+    similarity_a = Column(Float, nullable=False)  # 论文A被论文B覆盖的比例（%）
+    similarity_b = Column(Float, nullable=False)  # 论文B被论文A覆盖的比例（%）
+    shared_fingerprints = Column(Integer, nullable=False, default=0)
+    
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<CohortSimilarPair {self.paper_a_id}-{self.paper_b_id}: {self.similarity:.1f}%>"
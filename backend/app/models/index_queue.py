@@ -0,0 +1,30 @@
+"""
+全文索引同步队列模型
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Enum as SQLEnum
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class IndexAction(str, enum.Enum):
+    """索引操作类型"""
+    UPSERT = "upsert"
+    DELETE = "delete"
+
+
+class IndexOperation(Base):
+    """全文索引操作队列表（与论文写入同一事务提交，由后台任务批量写入索引）"""
+    __tablename__ = "index_operations"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    paper_type = Column(String(20), nullable=False)  # previous / graduation / course
+    paper_id = Column(Integer, nullable=False)
+    action = Column(SQLEnum(IndexAction), nullable=False)
+
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    processed_at = Column(DateTime, nullable=True, index=True)
+    generation = Column(Integer, nullable=True)  # 写入后的索引版本号
+
+    def __repr__(self):
+        return f"<IndexOperation {self.id}: {self.action.value} {self.paper_type}:{self.paper_id}>"
@@ -2,10 +2,12 @@
 论文模型
 """
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Text, JSON
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 from datetime import datetime
 import enum
 from app.database import Base
+from app.utils.title_hash import title_hash
 
 
 class PaperStatus(str, enum.Enum):
@@ -18,7 +20,18 @@ class PaperStatus(str, enum.Enum):
     REJECTED = "rejected"
 
 
-class GraduationPaper(Base):
+class TitleHashMixin:
+    """标题规范化哈希（标题赋值时自动计算，用于精确重复检测）"""
+    
+    title_hash = Column(String(40), nullable=True, index=True)
+    
+    @validates("title")
+    def _update_title_hash(self, key, title):
+        self.title_hash = title_hash(title)
+        return title
+
+
+class GraduationPaper(TitleHashMixin, Base):
     """毕业论文表"""
     __tablename__ = "graduation_papers"
     
@@ -43,7 +56,7 @@ class GraduationPaper(Base):
         return f"<GraduationPaper {self.id}: {self.title}>"
 
 
-class CoursePaper(Base):
+class CoursePaper(TitleHashMixin, Base):
     """课设论文表"""
     __tablename__ = "course_papers"
     
@@ -71,7 +84,7 @@ class CoursePaper(Base):
         return f"<CoursePaper {self.id}: {self.title}>"
 
 
-class PreviousPaper(Base):
+class PreviousPaper(TitleHashMixin, Base):
     """往届论文表"""
     __tablename__ = "previous_papers"
     
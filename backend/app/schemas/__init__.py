@@ -8,7 +8,7 @@ from app.schemas.user import (
 from app.schemas.paper import (
     GraduationPaperCreate, GraduationPaperResponse,
     CoursePaperCreate, CoursePaperResponse,
-    PreviousPaperCreate, PreviousPaperResponse,
+    PreviousPaperCreate, PreviousPaperResponse, SimilarPreviousPaperResponse,
     PaperListResponse
 )
 from app.schemas.template import (
@@ -21,6 +21,10 @@ from app.schemas.check import (
 from app.schemas.parameter import (
     ParameterCreate, ParameterUpdate, ParameterResponse
 )
+from app.schemas.cohort import (
+    CohortCheckSubmit, CohortCheckJobResponse, CohortSimilarPairResponse
+)
+from app.schemas.search import SearchHitResponse
 from app.schemas.common import (
     Message, PaginationParams, PaginatedResponse
 )
@@ -30,9 +34,11 @@ __all__ = [
     "PasswordUpdate", "ProfileUpdate",
     "GraduationPaperCreate", "GraduationPaperResponse",
     "CoursePaperCreate", "CoursePaperResponse",
-    "PreviousPaperCreate", "PreviousPaperResponse", "PaperListResponse",
+    "PreviousPaperCreate", "PreviousPaperResponse", "SimilarPreviousPaperResponse", "PaperListResponse",
     "TemplateCreate", "TemplateUpdate", "TemplateResponse",
     "CheckSubmit", "CheckResultResponse", "CheckIssueResponse", "CheckStatusResponse",
     "ParameterCreate", "ParameterUpdate", "ParameterResponse",
+    "CohortCheckSubmit", "CohortCheckJobResponse", "CohortSimilarPairResponse",
+    "SearchHitResponse",
     "Message", "PaginationParams", "PaginatedResponse"
 ]
@@ -0,0 +1,50 @@
+"""
+同届论文比对Schemas
+"""
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from app.models.check import CheckStatus
+
+
+class CohortCheckSubmit(BaseModel):
+    """提交同届比对任务"""
+    department: str = Field(..., max_length=100)
+    year: int = Field(..., ge=1900, le=2100)
+    threshold: float = Field(30.0, ge=0, le=100)
+
+
+class CohortCheckJobResponse(BaseModel):
+    """同届比对任务响应"""
+    id: int
+    department: str
+    year: int
+    status: CheckStatus
+    progress: float
+    threshold: float
+    total_papers: int
+    candidate_pairs: int
+    suspicious_pairs: int
+    created_by: int
+    created_at: datetime
+    finished_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
+class CohortSimilarPairResponse(BaseModel):
+    """同届可疑论文对响应"""
+    id: int
+    job_id: int
+    paper_a_id: int
+    paper_b_id: int
+    paper_a_title: Optional[str] = None
+    paper_b_title: Optional[str] = None
+    similarity: float
+    similarity_a: float
+    similarity_b: float
+    shared_fingerprints: int
+    
+    class Config:
+        from_attributes = True
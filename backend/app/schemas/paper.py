@@ -91,6 +91,11 @@ class PreviousPaperResponse(BaseModel):
         from_attributes = True
 
 
+class SimilarPreviousPaperResponse(PreviousPaperResponse):
+    """相似往届论文响应"""
+    similarity: float
+
+
 class PaperListResponse(BaseModel):
     """论文列表响应（简化版）"""
     id: int
@@ -0,0 +1,16 @@
+"""
+全文搜索Schemas
+"""
+from pydantic import BaseModel
+
+
+class SearchHitResponse(BaseModel):
+    """全文搜索结果"""
+    id: str  # 文档键，如 "previous:12"
+    title: str
+    content: str  # 内容前200字符
+    score: float
+    author: str
+    year: int
+    department: str
+    paper_type: str
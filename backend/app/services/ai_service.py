@@ -5,6 +5,9 @@ import aiohttp
 import json
 from typing import Dict, Any, Optional
 from app.config import settings
+from app.utils.similarity import calculate_duplicate_report
+from app.utils.text_pool import run_in_process
+from app.services.corpus_service import corpus_service
 
 
 class AlibabaAIService:
@@ -177,33 +180,44 @@ class AlibabaAIService:
     async def check_duplicate_content(
         self,
         content: str,
-        reference_contents: list = None
+        reference_contents: list = None,
+        exclude_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        检查内容重复率（使用AI辅助）
+        检查内容重复率（基于本地比对库的指纹索引）
         
         Args:
             content: 待检测内容
-            reference_contents: 参考内容列表
+            reference_contents: 参考内容列表（为空时与本地比对库比较）
+            exclude_key: 需要排除的比对库文档键（待检测论文自身）
             
         Returns:
-            重复率检测结果
+            重复率检测结果，包含各来源相似度和重复片段
         """
-        # 简化实现：返回模拟结果
-        # 实际应该调用专业的查重API
-        return {
-            "duplicate_rate": 8.5,
-            "sources": [
-                {
-                    "source": "互联网",
-                    "similarity": 5.2
-                },
-                {
-                    "source": "往届论文库",
-                    "similarity": 3.3
-                }
-            ]
-        }
+        if reference_contents:
+            report = await run_in_process(calculate_duplicate_report, content, reference_contents)
+            return {
+                "duplicate_rate": report["duplicate_rate"],
+                "sources": [
+                    {
+                        "source": f"参考内容{source['key'] + 1}",
+                        "similarity": source["similarity"],
+                        "matched_chars": source["matched_chars"]
+                    }
+                    for source in report["sources"]
+                ],
+                "segments": [
+                    {
+                        "start": span["start"],
+                        "end": span["end"],
+                        "text": span["text"],
+                        "sources": [f"参考内容{key + 1}" for key in span["sources"]]
+                    }
+                    for span in report["spans"]
+                ]
+            }
+        
+        return await corpus_service.report(content, exclude_key)
     
     async def analyze_image_text_consistency(
         self,
@@ -0,0 +1,513 @@
+"""
+往届论文索引服务 - 维护往届论文相关的内存索引
+"""
+import os
+import asyncio
+import numpy as np
+from typing import Tuple, List, Dict, Any, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from app.config import settings
+from app.models.paper import PreviousPaper, GraduationPaper, CoursePaper
+from app.utils.similarity import title_index, find_similar_titles
+from app.utils.minhash import title_lsh
+from app.utils.semantic import semantic_title_index
+from app.utils.knn_graph import title_knn_graph
+from app.utils.keywords import keyword_extractor
+from app.utils.file_handler import ensure_directory_exists
+from app.utils.title_hash import title_hash
+from app.services.corpus_service import corpus_service, corpus_key
+from app.services.index_sync_service import index_sync_service
+
+
+def _title_lsh_path() -> str:
+    """标题LSH索引文件路径"""
+    return os.path.join(settings.INDEX_DATA_PATH, "title_lsh.npz")
+
+
+def semantic_index_path() -> str:
+    """标题语义索引文件路径（由 build_semantic_index.py 离线生成）"""
+    return os.path.join(settings.INDEX_DATA_PATH, "title_semantic.npz")
+
+
+def _title_knn_path() -> str:
+    """标题k近邻图文件路径"""
+    return os.path.join(settings.INDEX_DATA_PATH, "title_knn.npz")
+
+
+class ArchiveService:
+    """往届论文索引服务"""
+
+    # 防止并发检查重复重建索引
+    _title_index_lock = asyncio.Lock()
+    _title_lsh_lock = asyncio.Lock()
+    _semantic_lock = asyncio.Lock()
+    _title_knn_lock = asyncio.Lock()
+    _semantic_mtime: float = 0.0
+
+    @staticmethod
+    async def get_signature(db: AsyncSession) -> Tuple[int, int]:
+        """
+        获取往届论文库的数据快照标识
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            (论文数量, 最大ID)
+        """
+        result = await db.execute(
+            select(func.count(PreviousPaper.id), func.max(PreviousPaper.id))
+        )
+        count, max_id = result.one()
+        return count, max_id or 0
+
+    @staticmethod
+    async def _load_titles(db: AsyncSession, paper_ids: Set[int]) -> List[Tuple[int, str]]:
+        """
+        读取指定往届论文的标题（少量时按ID查询，否则全表扫描后过滤）
+
+        Args:
+            db: 数据库会话
+            paper_ids: 论文ID集合
+
+        Returns:
+            [(论文ID, 标题)]
+        """
+        if not paper_ids:
+            return []
+
+        query = select(PreviousPaper.id, PreviousPaper.title)
+        if len(paper_ids) <= 500:
+            query = query.where(PreviousPaper.id.in_(paper_ids))
+        result = await db.execute(query)
+        return [(row.id, row.title) for row in result.all() if row.id in paper_ids]
+
+    @staticmethod
+    async def ensure_title_index(db: AsyncSession):
+        """
+        确保标题向量库与数据库一致，只对差异部分增删（为空时全量构建）
+
+        Args:
+            db: 数据库会话
+        """
+        async with ArchiveService._title_index_lock:
+            signature = await ArchiveService.get_signature(db)
+            if await asyncio.to_thread(lambda: title_index.signature) == signature:
+                return
+
+            result = await db.execute(select(PreviousPaper.id))
+            db_ids = set(result.scalars().all())
+            index_ids = set(await asyncio.to_thread(title_index.ids))
+
+            if not index_ids:
+                result = await db.execute(select(PreviousPaper.id, PreviousPaper.title))
+                items = [{"id": row.id, "title": row.title} for row in result.all()]
+                # 分词属于CPU密集操作，放到线程中避免阻塞事件循环
+                await asyncio.to_thread(title_index.build, items, signature)
+                return
+
+            items = [
+                {"id": paper_id, "title": title}
+                for paper_id, title in await ArchiveService._load_titles(db, db_ids - index_ids)
+            ]
+            await asyncio.to_thread(title_index.update, items, list(index_ids - db_ids), signature)
+
+    @staticmethod
+    async def ensure_title_lsh(db: AsyncSession):
+        """
+        确保标题LSH索引与数据库一致，只对差异部分增删
+
+        Args:
+            db: 数据库会话
+        """
+        async with ArchiveService._title_lsh_lock:
+            signature = await ArchiveService.get_signature(db)
+            if title_lsh.signature == signature:
+                return
+
+            result = await db.execute(select(PreviousPaper.id))
+            db_ids = set(result.scalars().all())
+            index_ids = set(title_lsh.ids())
+
+            for stale_id in index_ids - db_ids:
+                title_lsh.remove(stale_id)
+
+            items = await ArchiveService._load_titles(db, db_ids - index_ids)
+            if items:
+                await asyncio.to_thread(title_lsh.add_many, items)
+
+            title_lsh.signature = signature
+            if title_lsh.dirty:
+                await asyncio.to_thread(ArchiveService.save_indexes)
+
+    @staticmethod
+    async def ensure_semantic_index(db: AsyncSession):
+        """
+        离线索引文件更新后重新加载，并把构建之后的增删同步到待合并区
+
+        Args:
+            db: 数据库会话
+        """
+        async with ArchiveService._semantic_lock:
+            path = semantic_index_path()
+            mtime = os.path.getmtime(path) if os.path.exists(path) else 0.0
+            if mtime and mtime != ArchiveService._semantic_mtime:
+                if await asyncio.to_thread(semantic_title_index.load, path):
+                    ArchiveService._semantic_mtime = mtime
+
+            if not semantic_title_index.ready:
+                return
+
+            signature = await ArchiveService.get_signature(db)
+            if semantic_title_index.signature == signature:
+                return
+
+            result = await db.execute(select(PreviousPaper.id))
+            db_ids = set(result.scalars().all())
+            index_ids = set(semantic_title_index.ids())
+
+            for stale_id in index_ids - db_ids:
+                semantic_title_index.remove(stale_id)
+
+            items = await ArchiveService._load_titles(db, db_ids - index_ids)
+            if items:
+                paper_ids, titles = zip(*items)
+                await asyncio.to_thread(semantic_title_index.add_many, list(paper_ids), list(titles))
+
+            semantic_title_index.signature = signature
+
+    @staticmethod
+    async def ensure_title_knn(db: AsyncSession):
+        """
+        确保标题k近邻图与标题向量库一致
+
+        差异较少时逐篇增删，否则（或图为空时）分块全量重建。
+
+        Args:
+            db: 数据库会话
+        """
+        await ArchiveService.ensure_title_index(db)
+
+        async with ArchiveService._title_knn_lock:
+            signature = await asyncio.to_thread(lambda: title_index.signature)
+            if signature is not None and title_knn_graph.signature == signature:
+                return
+
+            ids, matrix = await asyncio.to_thread(title_index.vectors)
+            graph_ids = set(title_knn_graph.ids())
+            index_ids = set(ids.tolist())
+            stale_ids = graph_ids - index_ids
+            missing_ids = index_ids - graph_ids
+
+            if not graph_ids or len(stale_ids) + len(missing_ids) > max(100, len(ids) // 10):
+                await asyncio.to_thread(title_knn_graph.build, ids, matrix, signature)
+            else:
+                for stale_id in stale_ids:
+                    await asyncio.to_thread(title_knn_graph.remove, stale_id, ids, matrix)
+                positions = {doc_id: pos for pos, doc_id in enumerate(ids.tolist())}
+                for missing_id in missing_ids:
+                    vector = matrix[positions[missing_id]]
+                    await asyncio.to_thread(title_knn_graph.add, missing_id, vector, ids, matrix)
+                title_knn_graph.signature = signature
+
+            await asyncio.to_thread(ArchiveService.save_indexes)
+
+    @staticmethod
+    async def _update_title_knn(
+        signature: Optional[Tuple[int, int]],
+        added_id: Optional[int] = None,
+        removed_id: Optional[int] = None
+    ):
+        """
+        写操作后增量更新k近邻图（图在写操作前已与数据库一致时才更新，否则留给下次同步）
+
+        Args:
+            signature: 新的快照标识（None表示图已过期）
+            added_id: 新增的论文ID
+            removed_id: 删除的论文ID
+        """
+        if signature is None or not len(title_knn_graph):
+            return
+
+        async with ArchiveService._title_knn_lock:
+            ids, matrix = await asyncio.to_thread(title_index.vectors)
+            if removed_id is not None:
+                await asyncio.to_thread(title_knn_graph.remove, removed_id, ids, matrix)
+            if added_id is not None:
+                positions = np.flatnonzero(ids == added_id)
+                if len(positions):
+                    vector = matrix[int(positions[0])]
+                    await asyncio.to_thread(title_knn_graph.add, added_id, vector, ids, matrix)
+            title_knn_graph.signature = signature
+
+    @staticmethod
+    async def load_indexes(db: AsyncSession):
+        """
+        启动时加载磁盘上的索引，并与数据库同步
+
+        Args:
+            db: 数据库会话
+        """
+        ensure_directory_exists(settings.INDEX_DATA_PATH)
+        await asyncio.to_thread(title_lsh.load, _title_lsh_path())
+        await asyncio.to_thread(title_knn_graph.load, _title_knn_path())
+        await ArchiveService.ensure_title_lsh(db)
+        await ArchiveService.ensure_semantic_index(db)
+
+    @staticmethod
+    def save_indexes():
+        """将有变更的索引写回磁盘"""
+        if title_lsh.dirty:
+            ensure_directory_exists(settings.INDEX_DATA_PATH)
+            title_lsh.save(_title_lsh_path())
+        if title_knn_graph.dirty:
+            ensure_directory_exists(settings.INDEX_DATA_PATH)
+            title_knn_graph.save(_title_knn_path())
+
+    @staticmethod
+    async def _advance_signature(db: AsyncSession, count_delta: int) -> Tuple[int, int]:
+        """
+        写操作后推进索引的快照标识
+
+        只有索引在写操作前已与数据库一致时才推进，否则留给下次同步处理
+        """
+        signature = await ArchiveService.get_signature(db)
+        if ArchiveService._next_signature(title_lsh.signature, signature, count_delta):
+            title_lsh.signature = signature
+        if ArchiveService._next_signature(semantic_title_index.signature, signature, count_delta):
+            semantic_title_index.signature = signature
+        return signature
+
+    @staticmethod
+    def _next_signature(
+        previous: Optional[Tuple[int, int]],
+        signature: Tuple[int, int],
+        count_delta: int
+    ) -> Optional[Tuple[int, int]]:
+        """索引写入前已与数据库一致时返回新的快照标识，否则返回None（保持过期，留给下次同步）"""
+        if previous is not None and previous[0] + count_delta == signature[0]:
+            return signature
+        return None
+
+    @staticmethod
+    async def on_paper_created(db: AsyncSession, paper: PreviousPaper):
+        """
+        往届论文新增后更新索引
+
+        Args:
+            db: 数据库会话
+            paper: 新增的往届论文
+        """
+        await asyncio.to_thread(title_lsh.add, paper.id, paper.title)
+        await asyncio.to_thread(semantic_title_index.add, paper.id, paper.title)
+        previous = await asyncio.to_thread(lambda: title_index.signature)
+        signature = await ArchiveService._advance_signature(db, 1)
+        await asyncio.to_thread(
+            title_index.update,
+            [{"id": paper.id, "title": paper.title}],
+            [],
+            ArchiveService._next_signature(previous, signature, 1)
+        )
+        await ArchiveService._update_title_knn(
+            ArchiveService._next_signature(title_knn_graph.signature, signature, 1),
+            added_id=paper.id
+        )
+        
+        # 往届论文没有全文文件时以摘要加入查重比对库
+        term_counts = await corpus_service.add_paper(
+            "previous",
+            paper.id,
+            paper.title,
+            file_path=paper.file_path,
+            text=None if paper.file_path else (paper.summary or "")
+        )
+        
+        # 未填写关键词时根据全文（或摘要）词频和语料IDF自动提取
+        if term_counts and not paper.keywords:
+            paper.keywords = keyword_extractor.from_counts(term_counts)
+            index_sync_service.enqueue(db, "previous", paper.id)
+            await db.commit()
+            await db.refresh(paper)
+            index_sync_service.notify()
+
+    @staticmethod
+    async def on_paper_deleted(db: AsyncSession, paper_id: int):
+        """
+        往届论文删除后更新索引
+
+        Args:
+            db: 数据库会话
+            paper_id: 被删除的论文ID
+        """
+        await asyncio.to_thread(title_lsh.remove, paper_id)
+        semantic_title_index.remove(paper_id)
+        previous = await asyncio.to_thread(lambda: title_index.signature)
+        signature = await ArchiveService._advance_signature(db, -1)
+        await asyncio.to_thread(
+            title_index.update,
+            [],
+            [paper_id],
+            ArchiveService._next_signature(previous, signature, -1)
+        )
+        await ArchiveService._update_title_knn(
+            ArchiveService._next_signature(title_knn_graph.signature, signature, -1),
+            removed_id=paper_id
+        )
+        corpus_service.remove_paper("previous", paper_id)
+
+    @staticmethod
+    async def find_exact_titles(
+        db: AsyncSession,
+        title: str,
+        exclude_key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        按规范化标题哈希查找完全重复的标题（往届、毕业、课设论文各一次索引查询）
+
+        Args:
+            db: 数据库会话
+            title: 查询标题
+            exclude_key: 需要排除的论文键（如 "graduation:12"，检查论文自身）
+
+        Returns:
+            [{"paper_type", "id", "title", "author_id"}] 列表（往届论文的author_id为None）
+        """
+        hash_value = title_hash(title)
+        if not hash_value:
+            return []
+
+        matches = []
+        for paper_type, model in (
+            ("previous", PreviousPaper),
+            ("graduation", GraduationPaper),
+            ("course", CoursePaper)
+        ):
+            author_column = getattr(model, "author_id", None)
+            columns = [model.id, model.title]
+            if author_column is not None:
+                columns.append(author_column)
+            result = await db.execute(select(*columns).where(model.title_hash == hash_value))
+            for row in result.all():
+                if corpus_key(paper_type, row.id) == exclude_key:
+                    continue
+                matches.append({
+                    "paper_type": paper_type,
+                    "id": row.id,
+                    "title": row.title,
+                    "author_id": row.author_id if author_column is not None else None
+                })
+        return matches
+
+    @staticmethod
+    async def find_similar_titles(
+        db: AsyncSession,
+        title: str,
+        threshold: float = 0.7,
+        limit: int = 5,
+        candidate_limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        在全部往届论文中查找相似标题
+
+        先由LSH和TF-IDF标题向量库召回少量候选，再用余弦+Jaccard综合相似度精排。
+
+        Args:
+            db: 数据库会话
+            title: 查询标题
+            threshold: 综合相似度阈值
+            limit: 返回数量
+            candidate_limit: 每种索引召回的候选数量
+
+        Returns:
+            相似标题列表，按相似度降序
+        """
+        await ArchiveService.ensure_title_index(db)
+        await ArchiveService.ensure_title_lsh(db)
+
+        candidate_ids = {doc_id for doc_id, _ in title_lsh.query(title, limit=candidate_limit)}
+        candidate_ids.update(
+            doc_id for doc_id, _ in await asyncio.to_thread(
+                title_index.search, title, candidate_limit, threshold
+            )
+        )
+        if not candidate_ids:
+            return []
+
+        result = await db.execute(
+            select(PreviousPaper.id, PreviousPaper.title).where(PreviousPaper.id.in_(candidate_ids))
+        )
+        candidates = [{"id": row.id, "title": row.title} for row in result.all()]
+
+        return find_similar_titles(
+            title, candidates, threshold=threshold, top_k=limit, vectorizer=title_index.transform
+        )
+
+    @staticmethod
+    async def find_semantic_titles(
+        db: AsyncSession,
+        title: str,
+        threshold: float = 0.8,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        在往届论文中查找语义相近的标题（LSA + IVF近似最近邻，未构建离线索引时返回空）
+
+        Args:
+            db: 数据库会话
+            title: 查询标题
+            threshold: 语义相似度阈值
+            limit: 返回数量
+
+        Returns:
+            [{"id", "title", "similarity"}] 列表，按相似度降序
+        """
+        await ArchiveService.ensure_semantic_index(db)
+        matches = await asyncio.to_thread(semantic_title_index.search, title, limit, threshold)
+        if not matches:
+            return []
+
+        result = await db.execute(
+            select(PreviousPaper.id, PreviousPaper.title).where(PreviousPaper.id.in_([doc_id for doc_id, _ in matches]))
+        )
+        titles = {row.id: row.title for row in result.all()}
+
+        return [
+            {"id": doc_id, "title": titles[doc_id], "similarity": score}
+            for doc_id, score in matches
+            if doc_id in titles
+        ]
+
+    @staticmethod
+    async def get_similar_papers(
+        db: AsyncSession,
+        paper_id: int,
+        limit: int = 10
+    ) -> List[Tuple[PreviousPaper, float]]:
+        """
+        查询与某篇往届论文标题相似的往届论文（直接读取预先计算的k近邻图）
+
+        Args:
+            db: 数据库会话
+            paper_id: 往届论文ID
+            limit: 返回数量
+
+        Returns:
+            [(往届论文, 相似度)] 列表，按相似度降序
+        """
+        await ArchiveService.ensure_title_knn(db)
+        neighbors = title_knn_graph.neighbors(paper_id, limit)
+        if not neighbors:
+            return []
+
+        result = await db.execute(
+            select(PreviousPaper).where(PreviousPaper.id.in_([doc_id for doc_id, _ in neighbors]))
+        )
+        papers = {paper.id: paper for paper in result.scalars().all()}
+
+        return [(papers[doc_id], score) for doc_id, score in neighbors if doc_id in papers]
+
+
+# 全局往届论文索引服务实例
+archive_service = ArchiveService()
@@ -2,25 +2,38 @@
 检查服务 - 论文检查核心逻辑
 """
 import asyncio
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterable, Callable, Awaitable
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
 
+from app.config import settings
 from app.models.paper import GraduationPaper, CoursePaper, PreviousPaper
 from app.models.check import CheckResult, CheckIssue, CheckType, CheckStatus, IssueType, IssueLevel
 from app.models.template import Template
 from app.utils.docx_parser import DocxParser
 from app.utils.similarity import (
-    find_similar_titles,
     calculate_duplicate_rate,
     extract_keywords
 )
 from app.utils.search_engine import search_engine
 from app.services.ai_service import ai_service
+from app.services.archive_service import archive_service
+from app.services.corpus_service import corpus_key, corpus_service, SOURCE_LABELS
 from app.core.exceptions import NotFoundException, BadRequestException
 
 
+def _head_text(paragraphs: Iterable[str], limit: int) -> str:
+    """读取段落流开头不超过 limit 个字符的文本"""
+    parts, size = [], 0
+    for text in paragraphs:
+        parts.append(text)
+        size += len(text) + 1
+        if size >= limit:
+            break
+    return "\n".join(parts)[:limit]
+
+
 class CheckService:
     """检查服务"""
     
@@ -77,6 +90,7 @@ class CheckService:
             CheckService._perform_check(
                 check_result.id,
                 paper.file_path,
+                corpus_key(paper_type, paper_id),
                 check_type,
                 template_id
             )
@@ -88,6 +102,7 @@ class CheckService:
     async def _perform_check(
         result_id: int,
         file_path: str,
+        paper_key: str,
         check_type: CheckType,
         template_id: Optional[int] = None
     ):
@@ -97,6 +112,7 @@ class CheckService:
         Args:
             result_id: 检查结果ID
             file_path: 文件路径
+            paper_key: 论文在查重比对库中的键（论文上传后即加入比对库，查重时必须排除自身）
             check_type: 检查类型
             template_id: 模板ID
         """
@@ -118,7 +134,7 @@ class CheckService:
                 
                 # 根据检查类型执行不同检查
                 if check_type in [CheckType.TITLE, CheckType.FULL]:
-                    title_issues = await CheckService._check_title(parser, db)
+                    title_issues = await CheckService._check_title(parser, db, paper_key)
                     issues.extend(title_issues)
                     check_result.progress = 40.0
                     await db.commit()
@@ -130,7 +146,13 @@ class CheckService:
                     await db.commit()
                 
                 if check_type in [CheckType.CONTENT, CheckType.FULL]:
-                    content_issues = await CheckService._check_content(parser, db)
+                    start_progress = check_result.progress
+                    
+                    async def report_progress(fraction: float):
+                        check_result.progress = start_progress + (90.0 - start_progress) * fraction
+                        await db.commit()
+                    
+                    content_issues = await CheckService._check_content(parser, db, paper_key, report_progress)
                     issues.extend(content_issues)
                     check_result.progress = 90.0
                     await db.commit()
@@ -165,8 +187,19 @@ class CheckService:
                 print(f"Check failed: {str(e)}")
     
     @staticmethod
-    async def _check_title(parser: DocxParser, db: AsyncSession) -> List[Dict[str, Any]]:
-        """检查标题"""
+    async def _check_title(
+        parser: DocxParser,
+        db: AsyncSession,
+        paper_key: str
+    ) -> List[Dict[str, Any]]:
+        """
+        检查标题
+        
+        Args:
+            parser: 文档解析器
+            db: 数据库会话
+            paper_key: 论文自身的键，如 "course:3"（论文记录已存在，精确重复检测时必须排除自身）
+        """
         issues = []
         title = parser.get_title()
         
@@ -198,29 +231,56 @@ class CheckService:
                 "suggestion": "标题应简洁明了，建议不超过50个字符"
             })
         
-        # 检查标题重复（与往届论文比较）
-        result = await db.execute(select(PreviousPaper).limit(100))
-        previous_papers = result.scalars().all()
+        # 精确重复（规范化标题哈希，一次索引查询），命中时不再进行相似度计算
+        exact_titles = await archive_service.find_exact_titles(db, title, exclude_key=paper_key)
+        for exact in exact_titles[:3]:
+            issues.append({
+                "issue_type": IssueType.TITLE_DUPLICATE,
+                "issue_level": IssueLevel.CRITICAL,
+                "location": "标题",
+                "description": f"标题与{SOURCE_LABELS[exact['paper_type']]}中的论文完全相同（忽略全半角、空格和标点差异）",
+                "suggestion": f"重复论文：{exact['title']}，请更换标题",
+                "confidence": 1.0
+            })
+        if exact_titles:
+            return issues
+        
+        # 检查标题重复（LSH + TF-IDF索引召回候选，再综合相似度精排）
+        similar_titles = await archive_service.find_similar_titles(db, title, threshold=0.7, limit=5)
         
-        if previous_papers:
-            existing_titles = [{"id": p.id, "title": p.title} for p in previous_papers]
-            similar_titles = find_similar_titles(title, existing_titles, threshold=0.7)
-            
-            for similar in similar_titles[:3]:  # 只报告前3个最相似的
+        for similar in similar_titles[:3]:  # 只报告前3个最相似的
+            issues.append({
+                "issue_type": IssueType.TITLE_DUPLICATE,
+                "issue_level": IssueLevel.ERROR if similar["similarity"] > 0.9 else IssueLevel.WARNING,
+                "location": "标题",
+                "description": f"标题与往届论文重复度较高（相似度：{similar['similarity']:.1%}）",
+                "suggestion": f"相似论文：{similar['title']}，建议调整标题以增加原创性",
+                "confidence": similar["similarity"]
+            })
+        
+        # 语义相近标题（LSA + 近似最近邻，补充字面相似度检测不到的改写标题）
+        try:
+            reported_ids = {similar["id"] for similar in similar_titles[:3]}
+            semantic_titles = await archive_service.find_semantic_titles(
+                db, title, threshold=settings.SEMANTIC_TITLE_THRESHOLD, limit=5
+            )
+            for similar in [t for t in semantic_titles if t["id"] not in reported_ids][:3]:
                 issues.append({
                     "issue_type": IssueType.TITLE_DUPLICATE,
-                    "issue_level": IssueLevel.ERROR if similar["similarity"] > 0.9 else IssueLevel.WARNING,
+                    "issue_level": IssueLevel.WARNING,
                     "location": "标题",
-                    "description": f"标题与往届论文重复度较高（相似度：{similar['similarity']:.1%}）",
-                    "suggestion": f"相似论文：{similar['title']}，建议调整标题以增加原创性",
+                    "description": f"标题与往届论文语义相近（语义相似度：{similar['similarity']:.1%}）",
+                    "suggestion": f"相似论文：{similar['title']}，建议调整研究角度或标题表述",
                     "confidence": similar["similarity"]
                 })
+        except:
+            pass
         
         # AI逻辑分析
         try:
             ai_result = await ai_service.analyze_title_logic(
                 title,
-                [t["title"] for t in similar_titles[:5]] if previous_papers else None
+                [t["title"] for t in similar_titles[:5]] if similar_titles else None
             )
             
             for ai_issue in ai_result.get("issues", []):
@@ -282,25 +342,30 @@ class CheckService:
         return issues
     
     @staticmethod
-    async def _check_content(parser: DocxParser, db: AsyncSession) -> List[Dict[str, Any]]:
-        """检查内容"""
+    async def _check_content(
+        parser: DocxParser,
+        db: AsyncSession,
+        paper_key: str,
+        progress: Optional[Callable[[float], Awaitable[None]]] = None
+    ) -> List[Dict[str, Any]]:
+        """检查内容（重复率按段落流式计算，不拼接全文）"""
         issues = []
         
-        # 获取全文
-        content = parser.get_all_text()
+        # 全文长度（段落之间按换行计）
+        content_length = max(0, sum(len(text) + 1 for text in parser.iter_paragraphs()) - 1)
         
-        if len(content) < 1000:
+        if content_length < 1000:
             issues.append({
                 "issue_type": IssueType.CONTENT_LOGIC,
                 "issue_level": IssueLevel.ERROR,
                 "location": "全文",
-                "description": f"论文内容过短（{len(content)}字符）",
+                "description": f"论文内容过短（{content_length}字符）",
                 "suggestion": "论文内容应充实完整"
             })
         
-        # AI内容逻辑检查
+        # AI内容逻辑检查（只需要开头部分）
         try:
-            ai_result = await ai_service.check_content_logic(content)
+            ai_result = await ai_service.check_content_logic(_head_text(parser.iter_paragraphs(), 2000))
             for ai_issue in ai_result.get("issues", []):
                 issues.append({
                     "issue_type": IssueType.CONTENT_LOGIC,
@@ -312,10 +377,25 @@ class CheckService:
         except:
             pass
         
-        # 重复率检测
+        # 重复率检测（与本地比对库比较，逐块处理并汇报进度）
+        async def report_stream_progress(processed_chars: int):
+            if progress and content_length:
+                await progress(min(processed_chars / content_length, 1.0))
+        
         try:
-            duplicate_result = await ai_service.check_duplicate_content(content)
+            duplicate_result = await corpus_service.report_stream(
+                parser.iter_paragraphs(),
+                exclude_key=paper_key,
+                progress=report_stream_progress
+            )
             duplicate_rate = duplicate_result.get("duplicate_rate", 0)
+            extra_data = {
+                "sources": duplicate_result.get("sources", [])[:5],
+                "segments": [
+                    {**segment, "text": segment["text"][:200]}
+                    for segment in duplicate_result.get("segments", [])[:20]
+                ]
+            }
             
             if duplicate_rate > 15:
                 issues.append({
@@ -324,7 +404,8 @@ class CheckService:
                     "location": "全文",
                     "description": f"重复率过高：{duplicate_rate:.1f}%",
                     "suggestion": "请修改重复内容，确保论文原创性",
-                    "confidence": duplicate_rate / 100
+                    "confidence": duplicate_rate / 100,
+                    "extra_data": extra_data
                 })
             elif duplicate_rate > 10:
                 issues.append({
@@ -333,7 +414,33 @@ class CheckService:
                     "location": "全文",
                     "description": f"重复率较高：{duplicate_rate:.1f}%",
                     "suggestion": "建议适当修改重复部分",
-                    "confidence": duplicate_rate / 100
+                    "confidence": duplicate_rate / 100,
+                    "extra_data": extra_data
+                })
+        except:
+            pass
+        
+        # 段落级近似重复检测（SimHash）
+        try:
+            paragraphs = [para["text"] for para in parser.get_paragraphs()]
+            recycled = await corpus_service.find_recycled_paragraphs(paragraphs, paper_key)
+            
+            for item in recycled[:20]:  # 最多报告20个段落
+                best = item["matches"][0]
+                issues.append({
+                    "issue_type": IssueType.CONTENT_DUPLICATE,
+                    "issue_level": IssueLevel.WARNING,
+                    "location": f"第{item['paragraph_index'] + 1}段",
+                    "description": (
+                        f"段落与{best['source']}《{best['title']}》"
+                        f"第{best['paragraph_index'] + 1}段高度相似"
+                    ),
+                    "suggestion": "请改写该段落，引用他人内容需注明出处",
+                    "confidence": 1 - best["distance"] / 64,
+                    "extra_data": {
+                        "text": item["text"][:200],
+                        "matches": item["matches"][:5]
+                    }
                 })
         except:
             pass
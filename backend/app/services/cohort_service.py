@@ -0,0 +1,265 @@
+"""
+同届论文比对服务 - 同院系同年份毕业论文之间的相似度连接
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, extract
+
+from app.config import settings
+from app.models.paper import GraduationPaper
+from app.models.check import CheckStatus
+from app.models.cohort import CohortCheckJob, CohortSimilarPair
+from app.services.corpus_service import load_paper_text
+from app.utils.winnowing import fingerprint_text, match_coverage
+from app.utils.text_pool import get_process_pool
+
+
+# 分块参数：指纹被超过该数量的论文共享时视为模板/常用语，不参与分块
+MAX_FINGERPRINT_DF = 20
+# 共享稀有指纹数达到该值的论文对才进入精确比对
+MIN_SHARED_FINGERPRINTS = 3
+# 每个进程任务精确比对的论文对数量
+PAIR_BATCH_SIZE = 200
+
+Fingerprints = Tuple[np.ndarray, np.ndarray, int]
+
+
+def _fingerprint_paper(file_path: str, kgram_size: int, window_size: int) -> Fingerprints:
+    """读取论文并计算指纹（在子进程中执行）"""
+    text = load_paper_text(file_path)
+    hashes, positions, offsets = fingerprint_text(text, kgram_size, window_size)
+    return hashes, positions, len(offsets)
+
+
+def _score_pairs(
+    pairs: List[Tuple[int, int]],
+    fingerprints: Dict[int, Fingerprints],
+    kgram_size: int,
+    window_size: int
+) -> List[Tuple[int, int, float, float]]:
+    """精确计算一批论文对的双向覆盖率（在子进程中执行）"""
+    scores = []
+    for a, b in pairs:
+        hashes_a, positions_a, length_a = fingerprints[a]
+        hashes_b, positions_b, length_b = fingerprints[b]
+        covered_a = match_coverage(hashes_a, positions_a, length_a, hashes_b, positions_b, kgram_size, window_size)
+        covered_b = match_coverage(hashes_b, positions_b, length_b, hashes_a, positions_a, kgram_size, window_size)
+        scores.append((
+            a,
+            b,
+            covered_a / length_a * 100 if length_a else 0.0,
+            covered_b / length_b * 100 if length_b else 0.0
+        ))
+    return scores
+
+
+def find_candidate_pairs(
+    fingerprints: List[np.ndarray],
+    max_df: int = MAX_FINGERPRINT_DF,
+    min_shared: int = MIN_SHARED_FINGERPRINTS
+) -> List[Tuple[int, int, int]]:
+    """
+    基于共享稀有指纹分块，找出需要精确比对的论文对
+
+    构造 论文×稀有指纹 的稀疏0/1矩阵 P，P·Pᵀ 即各论文对共享的稀有指纹数，
+    计算量只与稀有指纹的共享情况相关，避免 N² 全量比对。
+
+    Args:
+        fingerprints: 每篇论文的指纹哈希数组
+        max_df: 稀有指纹允许的最大文档频率
+        min_shared: 候选论文对最少共享的稀有指纹数
+
+    Returns:
+        [(论文下标a, 论文下标b, 共享指纹数)]，a < b
+    """
+    doc_hashes = [np.unique(h) for h in fingerprints]
+    if not any(len(h) for h in doc_hashes):
+        return []
+
+    all_hashes = np.concatenate(doc_hashes)
+    all_docs = np.repeat(np.arange(len(doc_hashes)), [len(h) for h in doc_hashes])
+
+    unique_hashes, inverse, counts = np.unique(all_hashes, return_inverse=True, return_counts=True)
+    rare = (counts[inverse] >= 2) & (counts[inverse] <= max_df)
+    if not rare.any():
+        return []
+
+    matrix = csr_matrix(
+        (np.ones(int(rare.sum()), dtype=np.int32), (all_docs[rare], inverse[rare])),
+        shape=(len(doc_hashes), len(unique_hashes))
+    )
+    shared = (matrix @ matrix.T).tocoo()
+
+    keep = (shared.row < shared.col) & (shared.data >= min_shared)
+    return list(zip(shared.row[keep].tolist(), shared.col[keep].tolist(), shared.data[keep].tolist()))
+
+
+class CohortService:
+    """同届论文比对服务"""
+
+    @staticmethod
+    async def submit_job(
+        db: AsyncSession,
+        department: str,
+        year: int,
+        user_id: int,
+        threshold: float = 30.0
+    ) -> CohortCheckJob:
+        """
+        提交同届比对任务
+
+        Args:
+            db: 数据库会话
+            department: 院系
+            year: 届别（论文提交年份）
+            user_id: 用户ID
+            threshold: 可疑论文对的相似度阈值（%）
+
+        Returns:
+            比对任务对象
+        """
+        job = CohortCheckJob(
+            department=department,
+            year=year,
+            threshold=threshold,
+            status=CheckStatus.PENDING,
+            progress=0.0,
+            created_by=user_id
+        )
+
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+
+        # 异步执行比对任务
+        asyncio.create_task(CohortService._run_job(job.id))
+
+        return job
+
+    @staticmethod
+    async def _run_job(job_id: int):
+        """
+        执行同届比对（异步后台任务）
+
+        Args:
+            job_id: 比对任务ID
+        """
+        from app.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(CohortCheckJob).where(CohortCheckJob.id == job_id))
+            job = result.scalar_one()
+
+            try:
+                job.status = CheckStatus.PROCESSING
+                await db.commit()
+
+                result = await db.execute(
+                    select(GraduationPaper.id, GraduationPaper.file_path)
+                    .where(GraduationPaper.department == job.department)
+                    .where(extract("year", GraduationPaper.created_at) == job.year)
+                    .order_by(GraduationPaper.id)
+                )
+                papers = result.all()
+                job.total_papers = len(papers)
+                await db.commit()
+
+                pairs = await CohortService._compute_pairs(db, job, papers)
+
+                for paper_a_id, paper_b_id, similarity_a, similarity_b, shared in pairs:
+                    db.add(CohortSimilarPair(
+                        job_id=job.id,
+                        paper_a_id=paper_a_id,
+                        paper_b_id=paper_b_id,
+                        similarity=max(similarity_a, similarity_b),
+                        similarity_a=similarity_a,
+                        similarity_b=similarity_b,
+                        shared_fingerprints=shared
+                    ))
+
+                job.suspicious_pairs = len(pairs)
+                job.status = CheckStatus.COMPLETED
+                job.progress = 100.0
+                job.finished_at = datetime.now()
+                await db.commit()
+
+            except Exception as e:
+                await db.rollback()
+                job.status = CheckStatus.FAILED
+                job.finished_at = datetime.now()
+                await db.commit()
+                print(f"Cohort check failed: {str(e)}")
+
+    @staticmethod
+    async def _compute_pairs(
+        db: AsyncSession,
+        job: CohortCheckJob,
+        papers: List
+    ) -> List[Tuple[int, int, float, float, int]]:
+        """指纹计算、分块和精确比对，返回超过阈值的论文对"""
+        if len(papers) < 2:
+            return []
+
+        kgram_size = settings.DUPLICATE_KGRAM_SIZE
+        window_size = settings.DUPLICATE_WINDOW_SIZE
+        loop = asyncio.get_running_loop()
+        pool = get_process_pool()
+
+        # 1. 并行计算指纹（0% - 60%）
+        futures = [
+            loop.run_in_executor(pool, _fingerprint_paper, paper.file_path, kgram_size, window_size)
+            for paper in papers
+        ]
+        fingerprints: List[Fingerprints] = []
+        step = max(1, len(futures) // 20)
+        for i, future in enumerate(futures):
+            fingerprints.append(await future)
+            if (i + 1) % step == 0:
+                job.progress = (i + 1) / len(futures) * 60
+                await db.commit()
+
+        # 2. 稀有指纹分块（60% - 70%）
+        candidates = await asyncio.to_thread(find_candidate_pairs, [fp[0] for fp in fingerprints])
+        job.candidate_pairs = len(candidates)
+        job.progress = 70.0
+        await db.commit()
+
+        # 3. 并行精确比对候选论文对（70% - 95%）
+        shared_counts = {(a, b): shared for a, b, shared in candidates}
+        batches = []
+        for start in range(0, len(candidates), PAIR_BATCH_SIZE):
+            batch = [(a, b) for a, b, _ in candidates[start:start + PAIR_BATCH_SIZE]]
+            needed = {idx for pair in batch for idx in pair}
+            batches.append(loop.run_in_executor(
+                pool,
+                _score_pairs,
+                batch,
+                {idx: fingerprints[idx] for idx in needed},
+                kgram_size,
+                window_size
+            ))
+
+        pairs = []
+        for i, batch in enumerate(batches):
+            for a, b, similarity_a, similarity_b in await batch:
+                if max(similarity_a, similarity_b) >= job.threshold:
+                    pairs.append((
+                        papers[a].id,
+                        papers[b].id,
+                        similarity_a,
+                        similarity_b,
+                        shared_counts[(a, b)]
+                    ))
+            job.progress = 70 + (i + 1) / len(batches) * 25
+            await db.commit()
+
+        pairs.sort(key=lambda x: max(x[2], x[3]), reverse=True)
+        return pairs
+
+
+# 全局同届比对服务实例
+cohort_service = CohortService()
@@ -0,0 +1,462 @@
+"""
+查重比对库服务 - 维护往届论文和已提交论文全文的指纹索引
+"""
+import os
+import json
+import asyncio
+import threading
+from typing import Dict, Any, Optional, List, Set, Iterable, Callable, Awaitable
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.paper import GraduationPaper, CoursePaper, PreviousPaper
+from app.utils.docx_parser import DocxParser
+from app.utils.winnowing import (
+    FingerprintIndex,
+    DuplicateStream,
+    iter_paragraph_chunks,
+    DEFAULT_STREAM_CHUNK_CHARS
+)
+from app.utils.simhash import SimHashIndex
+from app.utils.idf import idf_table
+from app.utils.text_pool import compute_fingerprints, compute_paragraph_features, get_pool_size
+from app.utils.file_handler import ensure_directory_exists, get_file_extension
+
+
+# 比对库来源名称
+SOURCE_LABELS = {
+    "previous": "往届论文库",
+    "graduation": "毕业论文库",
+    "course": "课设论文库"
+}
+
+
+def corpus_key(paper_type: str, paper_id: int) -> str:
+    """
+    生成比对库文档键
+
+    Args:
+        paper_type: 论文类型（previous/graduation/course）
+        paper_id: 论文ID
+
+    Returns:
+        文档键，如 "graduation:12"
+    """
+    return f"{paper_type}:{paper_id}"
+
+
+def load_paper_paragraphs(file_path: Optional[str]) -> List[str]:
+    """
+    读取论文段落（目前仅支持.docx）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        段落文本列表（含空段落，保持原段落序号），无法读取时返回空列表
+    """
+    if not file_path or get_file_extension(file_path) != ".docx" or not os.path.exists(file_path):
+        return []
+
+    try:
+        return [para["text"] for para in DocxParser(file_path).get_paragraphs()]
+    except Exception as e:
+        print(f"Read paper failed: {file_path} - {str(e)}")
+        return []
+
+
+def load_paper_text(file_path: Optional[str]) -> str:
+    """
+    读取论文全文（目前仅支持.docx）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        全文文本，无法读取时返回空字符串
+    """
+    return "\n".join(load_paper_paragraphs(file_path))
+
+
+class CorpusService:
+    """查重比对库服务"""
+
+    def __init__(self):
+        self.index = FingerprintIndex(
+            kgram_size=settings.DUPLICATE_KGRAM_SIZE,
+            window_size=settings.DUPLICATE_WINDOW_SIZE
+        )
+        self.paragraphs = SimHashIndex()
+        self.idf = idf_table
+        self.titles: Dict[str, str] = {}
+        self.dirty = False
+        self._sync_lock = asyncio.Lock()
+        # 写入索引与删除互斥；每篇论文的删除次数，加入过程中论文被删除时放弃写入
+        self._write_lock = threading.Lock()
+        self._removals: Dict[str, int] = {}
+        # 后台加入任务（保留引用，避免任务被回收）
+        self._background_tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def _index_path() -> str:
+        return os.path.join(settings.INDEX_DATA_PATH, "content_corpus.npz")
+
+    @staticmethod
+    def _paragraph_path() -> str:
+        return os.path.join(settings.INDEX_DATA_PATH, "content_paragraphs.npz")
+
+    @staticmethod
+    def _idf_path() -> str:
+        return os.path.join(settings.INDEX_DATA_PATH, "content_idf.npz")
+
+    @staticmethod
+    def _meta_path() -> str:
+        return os.path.join(settings.INDEX_DATA_PATH, "content_corpus.json")
+
+    def load(self) -> bool:
+        """
+        从磁盘加载比对库索引
+
+        Returns:
+            是否加载成功
+        """
+        if not self.index.load(self._index_path()):
+            return False
+        # 段落索引、IDF统计缺失时由同步补齐
+        self.paragraphs.load(self._paragraph_path())
+        self.idf.load(self._idf_path())
+
+        try:
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                self.titles = json.load(f)
+        except (OSError, ValueError):
+            self.titles = {}
+
+        return True
+
+    def save(self):
+        """将比对库索引写回磁盘"""
+        if not self.dirty:
+            return
+
+        ensure_directory_exists(settings.INDEX_DATA_PATH)
+        self.dirty = False
+        self.index.save(self._index_path())
+        self.paragraphs.save(self._paragraph_path())
+        self.idf.save(self._idf_path())
+
+        keys = set(self.index.keys())
+        titles = {key: title for key, title in self.titles.items() if key in keys}
+        tmp_path = f"{self._meta_path()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(titles, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path())
+
+    def add_paper(
+        self,
+        paper_type: str,
+        paper_id: int,
+        title: str,
+        file_path: Optional[str] = None,
+        text: Optional[str] = None
+    ) -> Awaitable[Optional[Dict[str, int]]]:
+        """
+        将论文全文和段落指纹加入比对库
+
+        调用时（而不是协程开始执行时）记录论文的删除次数，之后的删除都会使这次加入放弃写入。
+
+        Args:
+            paper_type: 论文类型（previous/graduation/course）
+            paper_id: 论文ID
+            title: 论文标题
+            file_path: 论文文件路径（text为空时读取）
+            text: 论文全文
+
+        Returns:
+            论文全文词频（可用于提取关键词），无法读取内容或加入过程中论文已被删除时返回None
+        """
+        key = corpus_key(paper_type, paper_id)
+        return self._add_paper(key, self._removals.get(key, 0), title, file_path, text)
+
+    async def _add_paper(
+        self,
+        key: str,
+        removals: int,
+        title: str,
+        file_path: Optional[str],
+        text: Optional[str]
+    ) -> Optional[Dict[str, int]]:
+        """读取论文、计算指纹并写入索引"""
+        if text is None:
+            paragraphs = await asyncio.to_thread(load_paper_paragraphs, file_path)
+        else:
+            paragraphs = text.split("\n")
+        if not any(paragraphs):
+            return None
+
+        # 分词、指纹计算在进程池中完成，长文档按段落分块并行
+        (hashes, positions, offsets), (fingerprints, indexes, terms) = await asyncio.gather(
+            compute_fingerprints("\n".join(paragraphs), self.index.kgram_size, self.index.window_size),
+            compute_paragraph_features(paragraphs)
+        )
+        stored = await asyncio.to_thread(
+            self._store_features,
+            key, removals, title,
+            hashes, positions, len(offsets),
+            fingerprints, indexes, terms
+        )
+        return terms if stored else None
+
+    def add_paper_in_background(
+        self,
+        paper_type: str,
+        paper_id: int,
+        title: str,
+        file_path: Optional[str] = None
+    ) -> asyncio.Task:
+        """
+        在后台将论文加入比对库（上传接口不等待指纹计算完成）
+
+        Args:
+            paper_type: 论文类型
+            paper_id: 论文ID
+            title: 论文标题
+            file_path: 论文文件路径
+
+        Returns:
+            后台任务
+        """
+        task = asyncio.create_task(self.add_paper(paper_type, paper_id, title, file_path=file_path))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_done)
+        return task
+
+    def _on_background_done(self, task: asyncio.Task):
+        """后台加入任务结束：释放引用并记录异常"""
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ 论文加入查重比对库失败: {str(task.exception())}")
+
+    def _store_features(
+        self,
+        key: str,
+        removals: int,
+        title: str,
+        hashes: np.ndarray,
+        positions: np.ndarray,
+        length: int,
+        fingerprints: np.ndarray,
+        indexes: np.ndarray,
+        terms: Dict[str, int]
+    ):
+        """将全文指纹、段落SimHash和词项DF写入索引；开始加入后论文已被删除时不写入"""
+        with self._write_lock:
+            if self._removals.get(key, 0) != removals:
+                return False
+            self.index.add_fingerprints(key, hashes, positions, length)
+            self.paragraphs.add_document(key, fingerprints, indexes)
+            self.idf.add_document(key, terms)
+            self.titles[key] = title
+            self.dirty = True
+            return True
+
+    def remove_paper(self, paper_type: str, paper_id: int) -> bool:
+        """
+        从比对库删除论文
+
+        Args:
+            paper_type: 论文类型
+            paper_id: 论文ID
+
+        Returns:
+            是否存在并删除
+        """
+        key = corpus_key(paper_type, paper_id)
+        with self._write_lock:
+            # 尚未完成的加入任务据此放弃写入，删除后不会留下残留条目
+            self._removals[key] = self._removals.get(key, 0) + 1
+            self.titles.pop(key, None)
+            removed = self.index.remove_document(key)
+            removed = self.paragraphs.remove_document(key) or removed
+            removed = self.idf.remove_document(key) or removed
+            if removed:
+                self.dirty = True
+        return removed
+
+    async def sync(self, db: AsyncSession):
+        """
+        与数据库同步：补充缺失的论文，删除已不存在的论文
+
+        Args:
+            db: 数据库会话
+        """
+        async with self._sync_lock:
+            papers = {}
+
+            result = await db.execute(select(GraduationPaper.id, GraduationPaper.title, GraduationPaper.file_path))
+            for row in result.all():
+                papers[corpus_key("graduation", row.id)] = ("graduation", row.id, row.title, row.file_path, None)
+
+            result = await db.execute(select(CoursePaper.id, CoursePaper.title, CoursePaper.file_path))
+            for row in result.all():
+                papers[corpus_key("course", row.id)] = ("course", row.id, row.title, row.file_path, None)
+
+            result = await db.execute(
+                select(PreviousPaper.id, PreviousPaper.title, PreviousPaper.file_path, PreviousPaper.summary)
+            )
+            for row in result.all():
+                # 往届论文没有全文文件时使用摘要
+                text = None if row.file_path else (row.summary or "")
+                papers[corpus_key("previous", row.id)] = ("previous", row.id, row.title, row.file_path, text)
+
+            index_keys = [set(self.index.keys()), set(self.paragraphs.keys()), set(self.idf.keys())]
+            indexed = set.intersection(*index_keys)
+            for key in set.union(*index_keys) - set(papers):
+                paper_type, paper_id = key.split(":", 1)
+                self.remove_paper(paper_type, int(paper_id))
+
+            # 分批并发加入，使进程池中的各进程同时工作
+            missing = sorted(set(papers) - indexed)
+            batch_size = get_pool_size() * 2
+            for start in range(0, len(missing), batch_size):
+                await asyncio.gather(*[
+                    self.add_paper(*papers[key]) for key in missing[start:start + batch_size]
+                ])
+
+            await asyncio.to_thread(self.save)
+
+    async def load_and_sync(self):
+        """启动时加载比对库并在后台与数据库同步"""
+        from app.database import AsyncSessionLocal
+
+        try:
+            await asyncio.to_thread(self.load)
+            async with AsyncSessionLocal() as db:
+                await self.sync(db)
+            print(f"✅ 查重比对库已同步（{len(self.index)}篇）")
+        except Exception as e:
+            print(f"❌ 查重比对库同步失败: {str(e)}")
+
+    async def report(self, content: str, exclude_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        检测内容与比对库的重复情况
+
+        Args:
+            content: 待检测内容
+            exclude_key: 需要排除的文档键（待检测论文自身）
+
+        Returns:
+            {"duplicate_rate", "sources", "segments"}
+        """
+        hashes, positions, offsets = await compute_fingerprints(
+            content, self.index.kgram_size, self.index.window_size
+        )
+        report = await asyncio.to_thread(
+            self.index.report_fingerprints,
+            content,
+            hashes,
+            positions,
+            offsets,
+            exclude=[exclude_key] if exclude_key else None
+        )
+        return self._format_report(report)
+
+    async def report_stream(
+        self,
+        paragraphs: Iterable[str],
+        exclude_key: Optional[str] = None,
+        progress: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        流式检测段落序列与比对库的重复情况，逐块处理，内存占用与论文长度无关
+
+        Args:
+            paragraphs: 段落迭代器（可为生成器）
+            exclude_key: 需要排除的文档键（待检测论文自身）
+            progress: 异步进度回调，参数为已处理的原文字符数
+
+        Returns:
+            {"duplicate_rate", "sources", "segments"}，位置对应以换行连接的全文
+        """
+        stream = DuplicateStream(self.index, exclude=[exclude_key] if exclude_key else None)
+        for chunk in iter_paragraph_chunks(paragraphs, DEFAULT_STREAM_CHUNK_CHARS):
+            await asyncio.to_thread(stream.feed, chunk)
+            if progress:
+                await progress(stream.processed_chars)
+
+        report = await asyncio.to_thread(stream.finish)
+        return self._format_report(report)
+
+    def _format_report(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        """将指纹索引的报告转换为带来源名称和标题的查重结果"""
+        sources = []
+        for source in report["sources"]:
+            paper_type = source["key"].split(":", 1)[0]
+            sources.append({
+                "source": SOURCE_LABELS.get(paper_type, paper_type),
+                "key": source["key"],
+                "title": self.titles.get(source["key"], ""),
+                "similarity": source["similarity"],
+                "matched_chars": source["matched_chars"]
+            })
+
+        segments = []
+        for span in report["spans"]:
+            segments.append({
+                "start": span["start"],
+                "end": span["end"],
+                "text": span["text"],
+                "sources": [self.titles.get(key, key) for key in span["sources"]]
+            })
+
+        return {
+            "duplicate_rate": report["duplicate_rate"],
+            "sources": sources,
+            "segments": segments
+        }
+
+    async def find_recycled_paragraphs(
+        self,
+        paragraphs: List[str],
+        exclude_key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        查找与比对库中段落近似重复（SimHash汉明距离不超过3）的段落
+
+        Args:
+            paragraphs: 待检测论文的段落文本（序号与DocxParser.get_paragraphs一致）
+            exclude_key: 需要排除的文档键（待检测论文自身）
+
+        Returns:
+            [{"paragraph_index", "text", "matches": [{"source", "key", "title", "paragraph_index", "distance"}]}]，
+            按段落序号排序
+        """
+        fingerprints, indexes, _ = await compute_paragraph_features(paragraphs)
+        hits = await asyncio.to_thread(
+            self.paragraphs.query, fingerprints, [exclude_key] if exclude_key else None
+        )
+
+        recycled: Dict[int, Dict[str, Any]] = {}
+        for query_idx, key, paragraph_index, distance in hits:
+            paragraph = int(indexes[query_idx])
+            item = recycled.setdefault(paragraph, {
+                "paragraph_index": paragraph,
+                "text": paragraphs[paragraph],
+                "matches": []
+            })
+            paper_type = key.split(":", 1)[0]
+            item["matches"].append({
+                "source": SOURCE_LABELS.get(paper_type, paper_type),
+                "key": key,
+                "title": self.titles.get(key, ""),
+                "paragraph_index": paragraph_index,
+                "distance": distance
+            })
+
+        return [recycled[paragraph] for paragraph in sorted(recycled)]
+
+
+# 全局查重比对库服务实例
+corpus_service = CorpusService()
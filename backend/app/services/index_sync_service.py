@@ -0,0 +1,300 @@
+"""
+全文索引同步服务 - 论文写入时登记索引操作，后台任务批量写入Whoosh索引
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple, Any, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.paper import GraduationPaper, CoursePaper, PreviousPaper
+from app.models.user import User
+from app.models.index_queue import IndexOperation, IndexAction
+from app.utils.search_engine import search_engine, async_search_engine
+from app.services.corpus_service import corpus_key, load_paper_text
+
+
+# 已处理的队列记录保留时长
+PROCESSED_RETENTION = timedelta(days=1)
+
+
+def _write_document(bulk, document: Dict[str, Any], replace: bool = True):
+    """
+    读取全文并写入一篇文档（没有全文文件时使用备用内容）
+
+    Args:
+        bulk: 批量写入器
+        document: _load_documents / load_all_documents 返回的文档字段（会被修改）
+        replace: 是否替换同ID的已有文档（全量重建时不需要）
+    """
+    file_path = document.pop("file_path", None)
+    fallback = document.pop("fallback_content", "")
+    write = bulk.update_document if replace else bulk.add_document
+    write(content=load_paper_text(file_path) or fallback, **document)
+
+
+def _write_batch(documents: List[Dict[str, Any]], removed_keys: List[str]) -> int:
+    """
+    用一个写入器写入一批索引操作并提交（在搜索引擎的写线程中执行）
+
+    Args:
+        documents: 需要新增或更新的文档
+        removed_keys: 需要删除的文档键
+
+    Returns:
+        提交后的索引版本号
+    """
+    with search_engine.bulk_writer(procs=1) as bulk:
+        for key in removed_keys:
+            bulk.delete_document(key)
+        for document in documents:
+            _write_document(bulk, document)
+    return search_engine.ix.latest_generation()
+
+
+def rebuild_index(
+    documents: List[Dict[str, Any]],
+    procs: Optional[int] = None,
+    limitmb: Optional[int] = None,
+    progress_every: int = 0
+) -> int:
+    """
+    用全部论文重建全文索引（提交时丢弃索引中已有的文档，合并为单个段）
+
+    Args:
+        documents: load_all_documents 返回的文档字段
+        procs: 分词索引进程数（默认取 settings.WHOOSH_BULK_PROCS）
+        limitmb: 每个进程的索引缓冲区大小（MB，默认取 settings.WHOOSH_BULK_LIMITMB）
+        progress_every: 每写入多少篇打印一次进度（0表示不打印）
+
+    Returns:
+        写入的文档数量
+    """
+    with search_engine.bulk_writer(procs=procs, limitmb=limitmb, clear=True) as bulk:
+        for i, document in enumerate(documents, 1):
+            _write_document(bulk, document, replace=False)
+            if progress_every and i % progress_every == 0:
+                print(f"   已处理 {i}/{len(documents)} 篇")
+    return bulk.count
+
+
+class IndexSyncService:
+    """全文索引同步服务"""
+
+    def __init__(self):
+        self.generation: Optional[int] = None
+        self.last_synced_at: Optional[datetime] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def enqueue(
+        db: AsyncSession,
+        paper_type: str,
+        paper_id: int,
+        action: IndexAction = IndexAction.UPSERT
+    ):
+        """
+        登记索引操作（随调用方的事务一起提交，提交后可调用 notify() 尽快同步）
+
+        Args:
+            db: 数据库会话
+            paper_type: 论文类型（previous / graduation / course）
+            paper_id: 论文ID
+            action: 操作类型
+        """
+        db.add(IndexOperation(paper_type=paper_type, paper_id=paper_id, action=action))
+
+    def notify(self):
+        """唤醒后台同步任务"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        """启动后台同步任务"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台同步任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        """后台同步循环：被唤醒或到达同步间隔时处理队列"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.INDEX_SYNC_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                while await self.drain() >= settings.INDEX_SYNC_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                print(f"❌ 全文索引同步失败: {str(e)}")
+
+    async def drain(self) -> int:
+        """
+        处理一批待同步的索引操作（同一篇论文只保留最后一次操作）
+
+        Returns:
+            本批处理的操作数量
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(IndexOperation)
+                .where(IndexOperation.processed_at.is_(None))
+                .order_by(IndexOperation.id)
+                .limit(settings.INDEX_SYNC_BATCH_SIZE)
+            )
+            operations = result.scalars().all()
+            if not operations:
+                return 0
+
+            latest: Dict[Tuple[str, int], IndexAction] = {}
+            for operation in operations:
+                latest[(operation.paper_type, operation.paper_id)] = operation.action
+
+            upserts = [key for key, action in latest.items() if action == IndexAction.UPSERT]
+            documents = await self._load_documents(db, upserts)
+            # 论文已被删除的更新操作按删除处理
+            removed_keys = [corpus_key(*key) for key in latest if key not in documents]
+
+            generation = await async_search_engine.write(_write_batch, list(documents.values()), removed_keys)
+
+            now = datetime.now()
+            for operation in operations:
+                operation.processed_at = now
+                operation.generation = generation
+            await db.execute(
+                delete(IndexOperation).where(IndexOperation.processed_at < now - PROCESSED_RETENTION)
+            )
+            await db.commit()
+
+            self.generation = generation
+            self.last_synced_at = now
+            return len(operations)
+
+    @staticmethod
+    async def _load_documents(
+        db: AsyncSession,
+        keys: List[Tuple[str, int]]
+    ) -> Dict[Tuple[str, int], Dict[str, Any]]:
+        """
+        读取需要写入索引的论文字段
+
+        Args:
+            db: 数据库会话
+            keys: [(论文类型, 论文ID)]
+
+        Returns:
+            (论文类型, 论文ID) -> 文档字段（全文在写入线程中读取）
+        """
+        ids_by_type: Dict[str, List[int]] = {}
+        for paper_type, paper_id in keys:
+            ids_by_type.setdefault(paper_type, []).append(paper_id)
+
+        documents = {}
+        for paper_type, ids in ids_by_type.items():
+            for document in await IndexSyncService._query_documents(db, paper_type, ids):
+                documents[(paper_type, document["paper_id"])] = document
+                del document["paper_id"]
+
+        return documents
+
+    @staticmethod
+    async def load_all_documents(db: AsyncSession) -> List[Dict[str, Any]]:
+        """
+        读取全部论文（往届、毕业、课程）的索引字段，用于全量重建
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            文档字段列表（全文在写入时读取）
+        """
+        documents = []
+        for paper_type in ("previous", "graduation", "course"):
+            for document in await IndexSyncService._query_documents(db, paper_type):
+                del document["paper_id"]
+                documents.append(document)
+        return documents
+
+    @staticmethod
+    async def _query_documents(
+        db: AsyncSession,
+        paper_type: str,
+        paper_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        查询一种论文的索引字段
+
+        Args:
+            db: 数据库会话
+            paper_type: 论文类型（previous / graduation / course）
+            paper_ids: 论文ID列表（None表示全部）
+
+        Returns:
+            文档字段列表（含 paper_id）
+        """
+        if paper_type == "previous":
+            query = select(PreviousPaper).order_by(PreviousPaper.id)
+            if paper_ids is not None:
+                query = query.where(PreviousPaper.id.in_(paper_ids))
+            result = await db.execute(query)
+            return [
+                {
+                    "paper_id": paper.id,
+                    "doc_id": corpus_key("previous", paper.id),
+                    "title": paper.title,
+                    "file_path": paper.file_path,
+                    "fallback_content": paper.summary or "",
+                    "keywords": " ".join(paper.keywords or []),
+                    "author": paper.author,
+                    "year": paper.year,
+                    "department": paper.department,
+                    "paper_type": "previous",
+                    "created_at": paper.created_at
+                }
+                for paper in result.scalars().all()
+            ]
+
+        model = {"graduation": GraduationPaper, "course": CoursePaper}.get(paper_type)
+        if model is None:
+            return []
+        query = (
+            select(model, User.nickname, User.username)
+            .join(User, User.id == model.author_id)
+            .order_by(model.id)
+        )
+        if paper_ids is not None:
+            query = query.where(model.id.in_(paper_ids))
+        result = await db.execute(query)
+        return [
+            {
+                "paper_id": paper.id,
+                "doc_id": corpus_key(paper_type, paper.id),
+                "title": paper.title,
+                "file_path": paper.file_path,
+                "author": nickname or username,
+                "year": paper.created_at.year,
+                "department": paper.department or "",
+                "paper_type": paper_type,
+                "created_at": paper.created_at
+            }
+            for paper, nickname, username in result.all()
+        ]
+
+
+# 全局全文索引同步服务实例
+index_sync_service = IndexSyncService()
@@ -1,13 +1,15 @@
 """
 Word文档解析模块
 """
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Iterator
 from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
 import os
 
+from app.utils.keywords import keyword_extractor
+
 
 class DocxParser:
     """Word文档解析器"""
@@ -46,6 +48,16 @@ class DocxParser:
         """
         return "\n".join([para.text for para in self.document.paragraphs])
     
+    def iter_paragraphs(self) -> Iterator[str]:
+        """
+        逐段读取文本（不拼接全文）
+        
+        Yields:
+            段落文本
+        """
+        for para in self.document.paragraphs:
+            yield para.text
+    
     def get_paragraphs(self) -> List[Dict[str, Any]]:
         """
         获取所有段落及其属性
@@ -193,25 +205,17 @@ class DocxParser:
         
         return fonts
     
-    def extract_keywords(self) -> List[str]:
+    def extract_keywords(self, top_n: int = 10) -> List[str]:
         """
-        提取关键词（简单实现：提取前几段的重要词汇）
+        提取关键词（分词后按词频 × 语料IDF打分）
         
+        Args:
+            top_n: 返回前N个关键词
+            
         Returns:
             关键词列表
         """
-        # 简单实现：提取前3段的非空词汇
-        keywords = []
-        count = 0
-        
-        for para in self.document.paragraphs:
-            if para.text.strip() and count < 3:
-                words = para.text.split()
-                keywords.extend([w for w in words if len(w) > 2])
-                count += 1
-        
-        # 去重并返回前10个
-        return list(set(keywords))[:10]
+        return keyword_extractor.extract(self.get_all_text(), top_n=top_n)
     
     def get_summary(self) -> Dict[str, Any]:
         """
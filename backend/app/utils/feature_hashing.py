@@ -0,0 +1,144 @@
+"""
+特征哈希向量模块
+
+不维护词表：jieba分词结果和字符二元组经CRC32哈希映射到固定的 2^20 维空间，
+哈希值的最高位决定符号（抵消碰撞带来的偏差），词频取亚线性 1 + ln(tf)，最后做L2归一化。
+每篇文档的向量可独立计算（可在进程池中并行），不需要共享的拟合步骤。
+"""
+import re
+import zlib
+from typing import List, Tuple, Iterable
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from app.utils.idf import analyze
+
+
+DEFAULT_N_FEATURES = 1 << 20
+
+# 去除空白和标点后再生成字符二元组
+_NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+
+_SIGN_BIT = np.uint32(1 << 31)
+
+
+def feature_hashes(features: Iterable[str]) -> np.ndarray:
+    """
+    特征 -> CRC32哈希值（与进程无关，不受 PYTHONHASHSEED 影响）
+
+    Args:
+        features: 特征字符串
+
+    Returns:
+        uint32 哈希数组
+    """
+    return np.fromiter((zlib.crc32(feature.encode("utf-8")) for feature in features), dtype=np.uint32)
+
+
+def hash_columns(features: Iterable[str], n_features: int = DEFAULT_N_FEATURES) -> np.ndarray:
+    """
+    特征 -> 列号（哈希值对特征维数取模）
+
+    Args:
+        features: 特征字符串
+        n_features: 特征维数（2的幂）
+
+    Returns:
+        列号数组
+    """
+    return (feature_hashes(features) & np.uint32(n_features - 1)).astype(np.int32)
+
+
+def hashed_features(text: str) -> List[str]:
+    """
+    提取哈希特征：词项 + 字符二元组（加前缀区分，避免同形冲突）
+
+    Args:
+        text: 文本
+
+    Returns:
+        特征列表（保留重复）
+    """
+    if not text:
+        return []
+
+    features = [f"w:{term}" for term in analyze(text)]
+    compact = _NON_WORD_PATTERN.sub("", text.lower())
+    features.extend(f"c:{compact[i:i + 2]}" for i in range(len(compact) - 1))
+    return features
+
+
+class HashingVectorizer:
+    """有符号特征哈希向量化器（亚线性词频，L2归一化）"""
+
+    def __init__(self, n_features: int = DEFAULT_N_FEATURES):
+        """
+        Args:
+            n_features: 特征维数（2的幂，不超过 2^31）
+        """
+        self.n_features = n_features
+
+    def transform_one(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算单篇文档的向量
+
+        Args:
+            text: 文本
+
+        Returns:
+            (列号数组（升序）, 权重数组)
+        """
+        features = hashed_features(text)
+        if not features:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64)
+
+        unique_hashes, tf = np.unique(feature_hashes(features), return_counts=True)
+
+        values = 1 + np.log(tf)
+        values[(unique_hashes & _SIGN_BIT) != 0] *= -1
+        columns = (unique_hashes & np.uint32(self.n_features - 1)).astype(np.int32)
+
+        # 不同特征落到同一列时权重相加
+        cols, inverse = np.unique(columns, return_inverse=True)
+        weights = np.bincount(inverse, weights=values)
+
+        norm = np.linalg.norm(weights)
+        if norm > 0:
+            weights /= norm
+        return cols, weights
+
+    def transform(self, texts: List[str]) -> csr_matrix:
+        """
+        将一组文本转换为L2归一化的哈希向量
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            稀疏矩阵（len(texts) × n_features）
+        """
+        return self.stack([self.transform_one(text) for text in texts])
+
+    def stack(self, rows: List[Tuple[np.ndarray, np.ndarray]]) -> csr_matrix:
+        """
+        将逐篇计算的向量拼接为稀疏矩阵
+
+        Args:
+            rows: [(列号数组, 权重数组)]
+
+        Returns:
+            稀疏矩阵
+        """
+        lengths = [len(cols) for cols, _ in rows]
+        indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        if rows and indptr[-1]:
+            indices = np.concatenate([cols for cols, _ in rows])
+            data = np.concatenate([weights for _, weights in rows])
+        else:
+            indices = np.zeros(0, dtype=np.int32)
+            data = np.zeros(0, dtype=np.float64)
+        return csr_matrix((data, indices, indptr), shape=(len(rows), self.n_features))
+
+
+# 全局哈希向量化器
+hashing_vectorizer = HashingVectorizer()
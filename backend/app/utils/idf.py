@@ -0,0 +1,278 @@
+"""
+语料IDF统计模块
+
+维护比对库全部文档的文档频率（DF）表，随论文增删增量更新并持久化，
+相似度计算直接查表得到IDF，不必在每次调用时重新拟合。
+"""
+import os
+import re
+import threading
+from typing import List, Dict, Hashable, Iterable, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from app.utils.tokenizer import tokenize
+
+
+# 与 sklearn TfidfVectorizer 默认 token_pattern 一致：至少两个字符的词
+_TERM_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+# 词表中DF降为0的词项超过该数量且占词表四分之一以上时压缩词表
+PRUNE_MIN_DEAD_TERMS = 50000
+
+
+def analyze(text: str) -> List[str]:
+    """
+    将文本切分为IDF统计使用的词项
+
+    Args:
+        text: 文本
+
+    Returns:
+        词项列表（保留重复）
+    """
+    if not text:
+        return []
+    return _TERM_PATTERN.findall(" ".join(tokenize(text)).lower())
+
+
+class IdfTable:
+    """
+    增量文档频率表
+
+    记录每篇文档的去重词项ID，删除文档时据此回退DF；
+    IDF采用与 TfidfVectorizer(smooth_idf=True) 相同的公式 ln((1+N)/(1+df)) + 1。
+    DF降为0的词项在累积到一定数量时从词表中剔除，保存时也会剔除，词表规模只与现存文档相关。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vocabulary: Dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int64)
+        self._doc_terms: Dict[Hashable, np.ndarray] = {}
+        self._dead_terms = 0
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._doc_terms
+
+    def keys(self) -> List[Hashable]:
+        """已统计的全部文档键"""
+        with self._lock:
+            return list(self._doc_terms.keys())
+
+    @property
+    def num_docs(self) -> int:
+        """文档数量"""
+        return len(self._doc_terms)
+
+    def add_document(self, key: Hashable, terms: Iterable[str]):
+        """
+        添加文档（已存在则替换）
+
+        Args:
+            key: 文档键
+            terms: 文档词项（可重复，内部去重）
+        """
+        unique_terms = set(terms)
+
+        with self._lock:
+            self._remove_locked(key)
+
+            known = len(self._vocabulary)
+            ids = []
+            for term in unique_terms:
+                term_id = self._vocabulary.get(term)
+                if term_id is None:
+                    term_id = len(self._vocabulary)
+                    self._vocabulary[term] = term_id
+                ids.append(term_id)
+
+            if len(self._vocabulary) > len(self._df):
+                grown = np.zeros(max(len(self._vocabulary), len(self._df) * 2), dtype=np.int64)
+                grown[:len(self._df)] = self._df
+                self._df = grown
+
+            ids = np.asarray(ids, dtype=np.int32)
+            # DF为0的已有词项重新出现，不再计为待剔除
+            self._dead_terms -= int(np.count_nonzero(self._df[ids[ids < known]] == 0))
+            self._df[ids] += 1
+            self._doc_terms[key] = ids
+            self.dirty = True
+
+    def remove_document(self, key: Hashable) -> bool:
+        """
+        删除文档
+
+        Args:
+            key: 文档键
+
+        Returns:
+            是否存在并删除
+        """
+        with self._lock:
+            return self._remove_locked(key)
+
+    def _remove_locked(self, key: Hashable) -> bool:
+        ids = self._doc_terms.pop(key, None)
+        if ids is None:
+            return False
+        self._df[ids] -= 1
+        self._dead_terms += int(np.count_nonzero(self._df[ids] == 0))
+        self.dirty = True
+
+        if self._dead_terms >= max(PRUNE_MIN_DEAD_TERMS, len(self._vocabulary) // 4):
+            self._prune_locked()
+        return True
+
+    def _prune_locked(self):
+        """剔除DF为0的词项并重新编号"""
+        if self._dead_terms == 0:
+            return
+
+        df = self._df[:len(self._vocabulary)]
+        alive = df > 0
+        new_ids = np.cumsum(alive) - 1
+
+        self._vocabulary = {
+            term: int(new_ids[term_id])
+            for term, term_id in self._vocabulary.items()
+            if alive[term_id]
+        }
+        self._df = df[alive].copy()
+        self._doc_terms = {
+            key: new_ids[ids].astype(np.int32) for key, ids in self._doc_terms.items()
+        }
+        self._dead_terms = 0
+
+    def idf(self, terms: List[str]) -> np.ndarray:
+        """
+        查询词项的IDF（未收录的词项按 df=0 计算）
+
+        Args:
+            terms: 词项列表
+
+        Returns:
+            IDF数组
+        """
+        with self._lock:
+            num_docs = len(self._doc_terms)
+            df = np.fromiter(
+                (
+                    self._df[term_id] if (term_id := self._vocabulary.get(term)) is not None else 0
+                    for term in terms
+                ),
+                dtype=np.float64,
+                count=len(terms)
+            )
+
+        return np.log((1 + num_docs) / (1 + df)) + 1
+
+    def transform(self, texts: List[str]) -> Tuple[csr_matrix, List[str]]:
+        """
+        将一组文本转换为L2归一化的TF-IDF向量（IDF取自语料统计，无需拟合）
+
+        同一次调用返回的向量共享特征空间，可直接做点积得到余弦相似度。
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            (TF-IDF稀疏矩阵, 特征词项列表)
+        """
+        features: Dict[str, int] = {}
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            for term in analyze(text):
+                rows.append(row)
+                cols.append(features.setdefault(term, len(features)))
+
+        shape = (len(texts), len(features))
+        if not features:
+            return csr_matrix(shape, dtype=np.float64), []
+
+        # 重复的 (行, 列) 在转换为CSR时累加即为词频
+        matrix = csr_matrix(
+            (np.ones(len(rows), dtype=np.float64), (np.asarray(rows), np.asarray(cols))),
+            shape=shape
+        )
+        matrix.sum_duplicates()
+
+        terms = list(features)
+        matrix.data *= self.idf(terms)[matrix.indices]
+
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        matrix.data /= np.repeat(norms, np.diff(matrix.indptr))
+
+        return matrix, terms
+
+    def save(self, path: str):
+        """
+        持久化到磁盘（原子替换），文档键需为字符串
+
+        Args:
+            path: 文件路径（.npz）
+        """
+        with self._lock:
+            self._prune_locked()
+            keys = list(self._doc_terms.keys())
+            doc_terms = [self._doc_terms[key] for key in keys]
+            vocabulary = np.asarray(list(self._vocabulary), dtype=str)
+            self.dirty = False
+
+        lengths = np.asarray([len(ids) for ids in doc_terms], dtype=np.int64)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                vocabulary=vocabulary,
+                keys=np.asarray([str(key) for key in keys], dtype=str),
+                offsets=np.concatenate([[0], np.cumsum(lengths)]),
+                terms=np.concatenate(doc_terms) if doc_terms else np.empty(0, dtype=np.int32)
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """
+        从磁盘加载（DF由各文档词项重新累计）
+
+        Args:
+            path: 文件路径（.npz）
+
+        Returns:
+            是否加载成功
+        """
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with np.load(path) as data:
+                vocabulary = data["vocabulary"].tolist()
+                keys = data["keys"].tolist()
+                offsets = data["offsets"]
+                terms = data["terms"].astype(np.int32)
+        except (OSError, KeyError, ValueError):
+            return False
+
+        df = np.bincount(terms, minlength=len(vocabulary)).astype(np.int64)
+
+        with self._lock:
+            self._vocabulary = {term: i for i, term in enumerate(vocabulary)}
+            self._df = df
+            self._doc_terms = {
+                key: terms[offsets[i]:offsets[i + 1]] for i, key in enumerate(keys)
+            }
+            # 旧版本保存的文件可能含有DF为0的词项
+            self._dead_terms = int(np.count_nonzero(df == 0))
+            self._prune_locked()
+            self.dirty = False
+
+        return True
+
+
+# 全局语料IDF统计表
+idf_table = IdfTable()
@@ -0,0 +1,209 @@
+"""
+关键词提取模块
+
+基于比对库语料IDF的TF-IDF关键词提取，以及基于词共现窗口的TextRank关键词提取。
+IDF表常驻内存、停用词表只加载一次，词频统计和打分均使用NumPy向量化计算。
+"""
+import os
+import re
+from functools import lru_cache
+from typing import List, Dict
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from app.utils.idf import IdfTable, idf_table, analyze
+
+
+STOPWORDS_PATH = os.path.join(os.path.dirname(__file__), "stopwords.txt")
+
+# 纯数字（含小数、百分比）不作为关键词
+_NUMBER_PATTERN = re.compile(r"^[\d.%]+$")
+
+
+@lru_cache(maxsize=None)
+def load_stopwords(path: str = STOPWORDS_PATH) -> np.ndarray:
+    """
+    加载停用词表（每个路径只读取一次）
+
+    Args:
+        path: 停用词文件路径
+
+    Returns:
+        停用词数组
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            words = {
+                line.strip().lower() for line in f
+                if line.strip() and not line.startswith("#")
+            }
+    except OSError:
+        words = set()
+
+    return np.asarray(sorted(words), dtype=str)
+
+
+class KeywordExtractor:
+    """关键词提取器"""
+
+    def __init__(
+        self,
+        idf: IdfTable,
+        window_size: int = 5,
+        damping: float = 0.85,
+        max_iterations: int = 50,
+        tolerance: float = 1e-6
+    ):
+        """
+        Args:
+            idf: 语料IDF统计表
+            window_size: TextRank共现窗口大小
+            damping: TextRank阻尼系数
+            max_iterations: TextRank最大迭代次数
+            tolerance: TextRank收敛阈值
+        """
+        self.idf = idf
+        self.window_size = window_size
+        self.damping = damping
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+
+    @staticmethod
+    def _candidate_mask(terms: np.ndarray) -> np.ndarray:
+        """过滤停用词和纯数字后的候选词掩码"""
+        if len(terms) == 0:
+            return np.zeros(0, dtype=bool)
+        mask = ~np.isin(terms, load_stopwords())
+        mask &= np.fromiter((not _NUMBER_PATTERN.match(term) for term in terms), dtype=bool, count=len(terms))
+        return mask
+
+    @staticmethod
+    def _top_terms(terms: np.ndarray, scores: np.ndarray, top_n: int) -> List[str]:
+        """按得分取前N个词，得分相同时按词排序保证结果稳定"""
+        if len(terms) > top_n * 4:
+            part = np.argpartition(-scores, top_n * 4 - 1)[:top_n * 4]
+            terms, scores = terms[part], scores[part]
+        order = np.lexsort((terms, -scores))[:top_n]
+        return terms[order].tolist()
+
+    def from_counts(self, counts: Dict[str, int], top_n: int = 10) -> List[str]:
+        """
+        根据已统计的词频提取关键词（TF × 语料IDF）
+
+        Args:
+            counts: 词项 -> 词频
+            top_n: 返回数量
+
+        Returns:
+            关键词列表
+        """
+        if not counts:
+            return []
+
+        terms = np.asarray(list(counts), dtype=str)
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+
+        mask = self._candidate_mask(terms)
+        terms, tf = terms[mask], tf[mask]
+        if len(terms) == 0:
+            return []
+
+        scores = tf * self.idf.idf(terms.tolist())
+        return self._top_terms(terms, scores, top_n)
+
+    def tfidf(self, text: str, top_n: int = 10) -> List[str]:
+        """
+        TF-IDF关键词提取
+
+        Args:
+            text: 文本
+            top_n: 返回数量
+
+        Returns:
+            关键词列表
+        """
+        terms = np.asarray(analyze(text), dtype=str)
+        if len(terms) == 0:
+            return []
+
+        unique_terms, tf = np.unique(terms, return_counts=True)
+        mask = self._candidate_mask(unique_terms)
+        unique_terms, tf = unique_terms[mask], tf[mask]
+        if len(unique_terms) == 0:
+            return []
+
+        scores = tf * self.idf.idf(unique_terms.tolist())
+        return self._top_terms(unique_terms, scores, top_n)
+
+    def textrank(self, text: str, top_n: int = 10) -> List[str]:
+        """
+        TextRank关键词提取：候选词在窗口内共现即连边，在共现图上迭代PageRank
+
+        Args:
+            text: 文本
+            top_n: 返回数量
+
+        Returns:
+            关键词列表
+        """
+        terms = np.asarray(analyze(text), dtype=str)
+        if len(terms) == 0:
+            return []
+
+        terms = terms[self._candidate_mask(terms)]
+        unique_terms, sequence = np.unique(terms, return_inverse=True)
+        size = len(unique_terms)
+        if size == 0:
+            return []
+        if size == 1:
+            return unique_terms.tolist()
+
+        # 窗口内的所有词对（i, i+offset）构成共现边，重复共现累加为边权
+        rows, cols = [], []
+        for offset in range(1, self.window_size):
+            a, b = sequence[:-offset], sequence[offset:]
+            distinct = a != b
+            rows.append(a[distinct])
+            cols.append(b[distinct])
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+
+        weights = csr_matrix(
+            (np.ones(len(rows) * 2), (np.concatenate([rows, cols]), np.concatenate([cols, rows]))),
+            shape=(size, size)
+        )
+        weights.sum_duplicates()
+
+        out_weight = np.asarray(weights.sum(axis=1)).ravel()
+        out_weight[out_weight == 0] = 1.0
+
+        scores = np.ones(size)
+        for _ in range(self.max_iterations):
+            updated = (1 - self.damping) + self.damping * (weights @ (scores / out_weight))
+            converged = np.abs(updated - scores).max() < self.tolerance
+            scores = updated
+            if converged:
+                break
+
+        return self._top_terms(unique_terms, scores, top_n)
+
+    def extract(self, text: str, top_n: int = 10, method: str = "tfidf") -> List[str]:
+        """
+        提取关键词
+
+        Args:
+            text: 文本
+            top_n: 返回数量
+            method: 提取方法（tfidf/textrank）
+
+        Returns:
+            关键词列表
+        """
+        if not text:
+            return []
+        if method == "textrank":
+            return self.textrank(text, top_n)
+        return self.tfidf(text, top_n)
+
+
+# 全局关键词提取器（使用比对库语料IDF）
+keyword_extractor = KeywordExtractor(idf_table)
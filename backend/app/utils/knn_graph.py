@@ -0,0 +1,341 @@
+"""
+标题k近邻图模块
+
+预先计算每篇往届论文标题的k个最相似标题（余弦相似度），查询某篇论文的相似论文时直接查表。
+全量构建按行分块做稀疏矩阵乘法并逐块选出Top-K，内存占用与分块大小成正比；
+新增论文时只需一次矩阵-向量乘法，并把它插入得分更低的已有邻接表；
+删除论文时只重算以它为邻居的少数行。
+"""
+import os
+import threading
+from typing import List, Tuple, Dict, Optional
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+# 每个分块的得分矩阵元素数上限（float32，约64MB）
+BLOCK_ELEMENTS = 1 << 24
+
+
+def _sparse_block_top_k(scores: csr_matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """稀疏得分块逐行取Top-K（返回列号和得分，不足K个以-1/0补齐）"""
+    rows = np.repeat(np.arange(scores.shape[0]), np.diff(scores.indptr))
+    order = np.lexsort((-scores.data, rows))
+    rank = np.arange(len(order)) - scores.indptr[rows[order]]
+    keep = order[rank < k]
+
+    columns = np.full((scores.shape[0], k), -1, dtype=np.int64)
+    values = np.zeros((scores.shape[0], k), dtype=np.float32)
+    columns[rows[keep], rank[rank < k]] = scores.indices[keep]
+    values[rows[keep], rank[rank < k]] = scores.data[keep]
+    return columns, values
+
+
+def _dense_block_top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """稠密得分块逐行取Top-K（按得分降序）"""
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+def block_top_k(
+    query: csr_matrix,
+    matrix_t: csr_matrix,
+    k: int,
+    exclude: Optional[np.ndarray] = None,
+    min_score: float = 0.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算一块查询行与全部文档的相似度并逐行取Top-K
+
+    Args:
+        query: 查询行（B × 特征数，L2归一化）
+        matrix_t: 全部文档矩阵的转置（特征数 × N，CSR）
+        k: 每行保留数量
+        exclude: 每行需要排除的列号（如自身），-1表示不排除
+        min_score: 最低得分
+
+    Returns:
+        (列号矩阵 B × k（不足以-1补齐）, 得分矩阵 B × k)
+    """
+    scores = (query @ matrix_t).tocsr()
+    scores.data = scores.data.astype(np.float32)
+    rows = np.repeat(np.arange(scores.shape[0]), np.diff(scores.indptr))
+
+    drop = scores.data < max(min_score, 1e-9)
+    if exclude is not None:
+        drop |= scores.indices == exclude[rows]
+    if drop.any():
+        scores.data[drop] = 0
+        scores.eliminate_zeros()
+
+    # 得分较稀疏时直接在非零元素上排序，否则转为稠密矩阵用 argpartition
+    if scores.nnz < 0.2 * scores.shape[0] * scores.shape[1]:
+        return _sparse_block_top_k(scores, k)
+
+    dense = scores.toarray()
+    columns, values = _dense_block_top_k(dense, k)
+    columns[values <= 0] = -1
+    values[values <= 0] = 0
+    if columns.shape[1] < k:
+        pad = k - columns.shape[1]
+        columns = np.pad(columns, ((0, 0), (0, pad)), constant_values=-1)
+        values = np.pad(values, ((0, 0), (0, pad)))
+    return columns, values
+
+
+class KnnGraph:
+    """
+    k近邻图
+
+    邻接表按文档存放在定长数组中（邻居ID和得分，按得分降序，空位为-1），
+    通过 文档ID -> 行号 的字典实现O(1)查询。
+    """
+
+    def __init__(self, k: int = 10, min_score: float = 0.05):
+        """
+        Args:
+            k: 每篇文档保留的邻居数量
+            min_score: 最低相似度，低于该值的不作为邻居
+        """
+        self.k = k
+        self.min_score = min_score
+        self._lock = threading.RLock()
+        self._rows: Dict[int, int] = {}
+        self._neighbors = np.full((0, k), -1, dtype=np.int64)
+        self._scores = np.zeros((0, k), dtype=np.float32)
+        self._size = 0
+        self.signature: Optional[Tuple] = None
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._rows
+
+    def ids(self) -> List[int]:
+        """图中的全部文档ID"""
+        with self._lock:
+            return list(self._rows)
+
+    def neighbors(self, doc_id: int, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        查询文档的相似文档
+
+        Args:
+            doc_id: 文档ID
+            limit: 最多返回数量
+
+        Returns:
+            [(文档ID, 相似度)] 列表，按相似度降序
+        """
+        with self._lock:
+            row = self._rows.get(doc_id)
+            if row is None:
+                return []
+            neighbors, scores = self._neighbors[row], self._scores[row]
+
+        valid = neighbors >= 0
+        result = list(zip(neighbors[valid].tolist(), scores[valid].tolist()))
+        return result[:limit] if limit else result
+
+    # ---------- 构建 ----------
+
+    def build(self, ids: np.ndarray, matrix: csr_matrix, signature: Optional[Tuple] = None):
+        """
+        全量构建（分块矩阵乘法）
+
+        Args:
+            ids: 文档ID数组
+            matrix: L2归一化的文档向量（N × 特征数）
+            signature: 数据快照标识
+        """
+        count = len(ids)
+        neighbors = np.full((count, self.k), -1, dtype=np.int64)
+        scores = np.zeros((count, self.k), dtype=np.float32)
+
+        if count > 1:
+            matrix = matrix.tocsr()
+            matrix_t = matrix.T.tocsr()
+            block = max(1, BLOCK_ELEMENTS // count)
+            for start in range(0, count, block):
+                end = min(start + block, count)
+                columns, values = block_top_k(
+                    matrix[start:end], matrix_t, self.k,
+                    exclude=np.arange(start, end),
+                    min_score=self.min_score
+                )
+                neighbors[start:end] = np.where(columns >= 0, ids[np.maximum(columns, 0)], -1)
+                scores[start:end] = values
+
+        with self._lock:
+            self._rows = {int(doc_id): i for i, doc_id in enumerate(ids)}
+            self._neighbors = neighbors
+            self._scores = scores
+            self._size = count
+            self.signature = signature
+            self.dirty = True
+
+    # ---------- 增量更新 ----------
+
+    def add(self, doc_id: int, vector: csr_matrix, ids: np.ndarray, matrix: csr_matrix):
+        """
+        新增文档：计算它的邻居，并插入到得分更低的已有邻接表中
+
+        Args:
+            doc_id: 文档ID
+            vector: 新文档的L2归一化向量（1 × 特征数）
+            ids: 当前全部文档ID（可包含新文档自身）
+            matrix: 对应的文档向量矩阵
+        """
+        scores = np.asarray((matrix @ vector.T).todense(), dtype=np.float32).ravel()
+        scores[ids == doc_id] = 0
+
+        with self._lock:
+            self._remove_locked(doc_id)
+            row = self._append_row_locked(doc_id)
+            self._neighbors[row], self._scores[row] = self._select(ids, scores)
+
+            # 新文档比已有邻接表中最低得分更高时插入
+            rows = np.fromiter((self._rows.get(int(i), -1) for i in ids), dtype=np.int64, count=len(ids))
+            valid = (rows >= 0) & (rows != row) & (scores >= self.min_score)
+            lowest = np.where(valid, self._scores[np.maximum(rows, 0), -1], np.inf)
+            empty = np.where(valid, self._neighbors[np.maximum(rows, 0), -1] < 0, False)
+            for position in np.flatnonzero(valid & ((scores > lowest) | empty)):
+                self._insert_locked(rows[position], doc_id, scores[position])
+
+            self.dirty = True
+
+    def remove(self, doc_id: int, ids: np.ndarray, matrix: csr_matrix):
+        """
+        删除文档：以它为邻居的行用剩余文档重新计算
+
+        Args:
+            doc_id: 文档ID
+            ids: 删除后的全部文档ID
+            matrix: 对应的文档向量矩阵
+        """
+        with self._lock:
+            self._remove_locked(doc_id)
+            affected = np.flatnonzero((self._neighbors[:self._size] == doc_id).any(axis=1))
+            live_rows = {row: doc for doc, row in self._rows.items()}
+            affected = [row for row in affected.tolist() if row in live_rows]
+
+        positions = {int(i): p for p, i in enumerate(ids)}
+        for row in affected:
+            position = positions.get(live_rows[row])
+            if position is None:
+                continue
+            scores = np.asarray((matrix @ matrix[position].T).todense(), dtype=np.float32).ravel()
+            scores[position] = 0
+            with self._lock:
+                self._neighbors[row], self._scores[row] = self._select(ids, scores)
+
+        with self._lock:
+            self.dirty = True
+
+    def _select(self, ids: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """从得分向量中选出Top-K邻居"""
+        neighbors = np.full(self.k, -1, dtype=np.int64)
+        values = np.zeros(self.k, dtype=np.float32)
+        candidates = np.flatnonzero(scores >= max(self.min_score, 1e-9))
+        if len(candidates) > self.k:
+            candidates = candidates[np.argpartition(-scores[candidates], self.k - 1)[:self.k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        neighbors[:len(candidates)] = ids[candidates]
+        values[:len(candidates)] = scores[candidates]
+        return neighbors, values
+
+    def _insert_locked(self, row: int, doc_id: int, score: float):
+        """把邻居插入到行的邻接表（保持降序，挤掉最低的一个）"""
+        neighbors, scores = self._neighbors[row], self._scores[row]
+        filled = neighbors >= 0
+        position = int(np.count_nonzero(filled & (scores >= score)))
+        neighbors[position + 1:] = neighbors[position:-1].copy()
+        scores[position + 1:] = scores[position:-1].copy()
+        neighbors[position], scores[position] = doc_id, score
+
+    def _append_row_locked(self, doc_id: int) -> int:
+        """追加一行（容量不足时翻倍）"""
+        if self._size == len(self._neighbors):
+            capacity = max(16, len(self._neighbors) * 2)
+            neighbors = np.full((capacity, self.k), -1, dtype=np.int64)
+            scores = np.zeros((capacity, self.k), dtype=np.float32)
+            neighbors[:self._size] = self._neighbors[:self._size]
+            scores[:self._size] = self._scores[:self._size]
+            self._neighbors, self._scores = neighbors, scores
+
+        row = self._size
+        self._size += 1
+        self._rows[doc_id] = row
+        return row
+
+    def _remove_locked(self, doc_id: int):
+        """删除文档的邻接表（行留空，保存时压缩）"""
+        row = self._rows.pop(doc_id, None)
+        if row is not None:
+            self._neighbors[row] = -1
+            self._scores[row] = 0
+
+    # ---------- 持久化 ----------
+
+    def save(self, path: str):
+        """
+        持久化到磁盘（原子替换，只保存有效行）
+
+        Args:
+            path: 文件路径（.npz）
+        """
+        with self._lock:
+            ids = np.fromiter(self._rows.keys(), dtype=np.int64, count=len(self._rows))
+            rows = np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+            neighbors = self._neighbors[rows]
+            scores = self._scores[rows]
+            signature = np.asarray(self.signature if self.signature is not None else [], dtype=np.int64)
+            self.dirty = False
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, ids=ids, neighbors=neighbors, scores=scores, signature=signature, k=self.k)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """
+        从磁盘加载
+
+        Args:
+            path: 文件路径（.npz）
+
+        Returns:
+            是否加载成功（k值不一致时视为失败，需要重建）
+        """
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with np.load(path) as data:
+                if int(data["k"]) != self.k:
+                    return False
+                ids = data["ids"]
+                neighbors = data["neighbors"]
+                scores = data["scores"]
+                signature = data["signature"].tolist()
+        except (OSError, KeyError, ValueError):
+            return False
+
+        with self._lock:
+            self._rows = {int(doc_id): i for i, doc_id in enumerate(ids)}
+            self._neighbors = neighbors
+            self._scores = scores
+            self._size = len(ids)
+            self.signature = tuple(signature) if signature else None
+            self.dirty = False
+
+        return True
+
+
+# 全局往届论文标题k近邻图
+title_knn_graph = KnnGraph()
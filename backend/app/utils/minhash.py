@@ -0,0 +1,390 @@
+"""
+MinHash / LSH 近似重复检索模块
+"""
+import os
+import re
+import zlib
+import threading
+from typing import List, Tuple, Dict, Optional, Iterable
+import numpy as np
+
+from app.utils.tokenizer import tokenize
+
+
+# 梅森素数 2^61-1，用于构造哈希置换族
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# 去除空白和标点后再生成字符片段
+_NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def title_features(title: str, shingle_size: int = 2) -> List[str]:
+    """
+    提取标题特征：jieba分词结果 + 字符shingle
+
+    Args:
+        title: 标题
+        shingle_size: 字符shingle长度
+
+    Returns:
+        特征列表（已去重）
+    """
+    if not title:
+        return []
+
+    features = {f"w:{token}" for token in tokenize(title) if token.strip()}
+
+    compact = _NON_WORD_PATTERN.sub("", title.lower())
+    if len(compact) <= shingle_size:
+        if compact:
+            features.add(f"c:{compact}")
+    else:
+        for i in range(len(compact) - shingle_size + 1):
+            features.add(f"c:{compact[i:i + shingle_size]}")
+
+    return list(features)
+
+
+class MinHasher:
+    """MinHash签名生成器"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        """
+        Args:
+            num_perm: 置换（哈希函数）数量
+            seed: 随机种子，持久化的签名必须使用相同种子
+        """
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+        self._b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) % _MERSENNE_PRIME
+
+    def signature(self, features: Iterable[str]) -> np.ndarray:
+        """
+        计算MinHash签名
+
+        Args:
+            features: 特征集合
+
+        Returns:
+            签名数组 (num_perm,) uint32
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(f.encode("utf-8")) for f in features),
+            dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+
+        # 一次性计算所有特征在所有置换下的哈希值，取每列最小值
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+
+class MinHashLSH:
+    """
+    分段（banding）LSH索引
+
+    每个band的键保存在排序数组中，用二分查找定位桶，内存占用为
+    O(文档数 × band数)，可支撑数十万标题；新增文档先追加到增量区列表（不复制已排序部分），
+    超过阈值后一次合并，删除使用墓碑标记并在合并时清理。
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        """
+        Args:
+            num_perm: 签名长度
+            bands: band数量（num_perm必须能被整除）
+            seed: 随机种子
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm必须能被bands整除")
+
+        self.hasher = MinHasher(num_perm, seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.signature: Optional[Tuple] = None
+
+        # band键由该band内的签名值线性组合得到
+        rng = np.random.RandomState(seed + 1)
+        self._band_mix = (rng.randint(1, np.iinfo(np.int64).max, size=self.rows, dtype=np.int64) | 1).astype(np.uint64)
+
+        self._lock = threading.RLock()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._band_keys = np.empty((0, bands), dtype=np.uint64)
+        self._alive = np.empty(0, dtype=bool)
+        # 行号小于已排序行数时指向已排序部分，否则指向增量区
+        self._id_to_row: Dict[int, int] = {}
+
+        # 已排序部分：每个band一行
+        self._sorted_keys = np.empty((bands, 0), dtype=np.uint64)
+        self._sorted_rows = np.empty((bands, 0), dtype=np.int64)
+
+        # 增量区：按批追加 (文档ID, 签名, band键)，查询时才拼接
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_alive: List[bool] = []
+        self._pending_stacked: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._id_to_row)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._id_to_row
+
+    def ids(self) -> List[int]:
+        """索引中全部文档ID"""
+        with self._lock:
+            return list(self._id_to_row.keys())
+
+    def _compute_band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """计算签名矩阵的band键 (n, bands)"""
+        grouped = signatures.astype(np.uint64).reshape(-1, self.bands, self.rows)
+        with np.errstate(over="ignore"):
+            return (grouped * self._band_mix).sum(axis=2, dtype=np.uint64)
+
+    def add_many(self, items: Iterable[Tuple[int, str]]):
+        """
+        批量添加标题
+
+        Args:
+            items: [(文档ID, 标题), ...]
+        """
+        ids, signatures = [], []
+        for doc_id, title in items:
+            ids.append(doc_id)
+            signatures.append(self.hasher.signature(title_features(title)))
+
+        if ids:
+            self.add_signatures(np.asarray(ids, dtype=np.int64), np.vstack(signatures))
+
+    def add(self, doc_id: int, title: str):
+        """
+        添加单个标题（已存在则覆盖）
+
+        Args:
+            doc_id: 文档ID
+            title: 标题
+        """
+        self.add_many([(doc_id, title)])
+
+    def add_signatures(self, ids: np.ndarray, signatures: np.ndarray):
+        """
+        直接添加已计算好的签名
+
+        Args:
+            ids: 文档ID数组
+            signatures: 签名矩阵 (n, num_perm)
+        """
+        band_keys = self._compute_band_keys(signatures)
+
+        with self._lock:
+            for doc_id in ids.tolist():
+                self._remove_locked(doc_id)
+
+            start = len(self._ids) + len(self._pending_alive)
+            self._pending.append((ids.astype(np.int64), signatures.astype(np.uint32), band_keys))
+            self._pending_alive.extend([True] * len(ids))
+            self._pending_stacked = None
+            for offset, doc_id in enumerate(ids.tolist()):
+                self._id_to_row[doc_id] = start + offset
+
+            # 增量区过大时合并，保证查询时线性扫描的部分足够小
+            if len(self._pending_alive) > max(1024, len(self._ids) // 10):
+                self._rebuild_locked()
+
+            self.dirty = True
+
+    def remove(self, doc_id: int) -> bool:
+        """
+        删除标题
+
+        Args:
+            doc_id: 文档ID
+
+        Returns:
+            是否存在并删除
+        """
+        with self._lock:
+            removed = self._remove_locked(doc_id)
+            if removed:
+                self.dirty = True
+                # 墓碑过多时压缩
+                total = len(self._ids) + len(self._pending_alive)
+                if total - len(self._id_to_row) > max(1024, total // 5):
+                    self._rebuild_locked()
+            return removed
+
+    def _remove_locked(self, doc_id: int) -> bool:
+        row = self._id_to_row.pop(doc_id, None)
+        if row is None:
+            return False
+        if row < len(self._ids):
+            self._alive[row] = False
+        else:
+            self._pending_alive[row - len(self._ids)] = False
+        return True
+
+    def _stacked_pending_locked(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """拼接增量区 (文档ID, 签名, band键)，结果缓存到下次添加"""
+        if self._pending_stacked is None:
+            if self._pending:
+                self._pending_stacked = (
+                    np.concatenate([p[0] for p in self._pending]),
+                    np.vstack([p[1] for p in self._pending]),
+                    np.vstack([p[2] for p in self._pending])
+                )
+            else:
+                self._pending_stacked = (
+                    np.empty(0, dtype=np.int64),
+                    np.empty((0, self.num_perm), dtype=np.uint32),
+                    np.empty((0, self.bands), dtype=np.uint64)
+                )
+        return self._pending_stacked
+
+    def _rebuild_locked(self):
+        """合并增量区、清理墓碑并重新排序所有band"""
+        pending_ids, pending_signatures, pending_keys = self._stacked_pending_locked()
+        keep = np.concatenate([self._alive, np.asarray(self._pending_alive, dtype=bool)])
+        self._ids = np.concatenate([self._ids, pending_ids])[keep]
+        self._signatures = np.vstack([self._signatures, pending_signatures])[keep]
+        self._band_keys = np.vstack([self._band_keys, pending_keys])[keep]
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._id_to_row = {doc_id: row for row, doc_id in enumerate(self._ids.tolist())}
+        self._pending = []
+        self._pending_alive = []
+        self._pending_stacked = None
+
+        order = np.argsort(self._band_keys, axis=0, kind="stable").T
+        self._sorted_rows = order
+        self._sorted_keys = np.take_along_axis(self._band_keys.T, order, axis=1)
+
+    def query(self, title: str, limit: int = 50) -> List[Tuple[int, float]]:
+        """
+        查询候选近似重复标题
+
+        Args:
+            title: 查询标题
+            limit: 最多返回候选数量
+
+        Returns:
+            [(文档ID, 估计Jaccard相似度)]，按相似度降序
+        """
+        features = title_features(title)
+        if not features:
+            return []
+
+        query_sig = self.hasher.signature(features)
+        query_keys = self._compute_band_keys(query_sig[np.newaxis, :])[0]
+
+        with self._lock:
+            matched = []
+            for band in range(self.bands):
+                keys = self._sorted_keys[band]
+                lo = np.searchsorted(keys, query_keys[band], side="left")
+                hi = np.searchsorted(keys, query_keys[band], side="right")
+                if hi > lo:
+                    matched.append(self._sorted_rows[band, lo:hi])
+
+            if matched:
+                rows = np.unique(np.concatenate(matched))
+                rows = rows[self._alive[rows]]
+            else:
+                rows = np.empty(0, dtype=np.int64)
+            ids = [self._ids[rows]]
+            scores = [(self._signatures[rows] == query_sig).mean(axis=1)]
+
+            # 增量区线性匹配
+            if self._pending_alive:
+                delta_ids, delta_signatures, delta_keys = self._stacked_pending_locked()
+                delta_rows = np.flatnonzero(
+                    (delta_keys == query_keys).any(axis=1)
+                    & np.asarray(self._pending_alive, dtype=bool)
+                )
+                ids.append(delta_ids[delta_rows])
+                scores.append((delta_signatures[delta_rows] == query_sig).mean(axis=1))
+
+            ids = np.concatenate(ids)
+            scores = np.concatenate(scores)
+            if len(ids) == 0:
+                return []
+
+        if len(ids) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def save(self, path: str):
+        """
+        持久化到磁盘（原子替换）
+
+        Args:
+            path: 文件路径（.npz）
+        """
+        with self._lock:
+            self._rebuild_locked()
+            ids = self._ids.copy()
+            signatures = self._signatures.copy()
+            signature = np.asarray(self.signature if self.signature else (-1, -1), dtype=np.int64)
+            self.dirty = False
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=ids,
+                signatures=signatures,
+                signature=signature,
+                params=np.asarray([self.num_perm, self.bands, self.hasher.seed], dtype=np.int64)
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """
+        从磁盘加载
+
+        Args:
+            path: 文件路径（.npz）
+
+        Returns:
+            是否加载成功（参数不一致时视为失败）
+        """
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with np.load(path) as data:
+                params = data["params"].tolist()
+                if params != [self.num_perm, self.bands, self.hasher.seed]:
+                    return False
+                ids = data["ids"]
+                signatures = data["signatures"]
+                signature = tuple(data["signature"].tolist())
+        except (OSError, KeyError, ValueError):
+            return False
+
+        with self._lock:
+            self._ids = ids.astype(np.int64)
+            self._signatures = signatures.astype(np.uint32)
+            self._band_keys = self._compute_band_keys(self._signatures)
+            self._alive = np.ones(len(self._ids), dtype=bool)
+            self._pending = []
+            self._pending_alive = []
+            self._pending_stacked = None
+            self._rebuild_locked()
+            self.signature = None if signature == (-1, -1) else signature
+            self.dirty = False
+
+        return True
+
+
+# 全局往届论文标题LSH索引
+title_lsh = MinHashLSH()
@@ -0,0 +1,230 @@
+"""
+全文搜索结果缓存模块
+"""
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Hashable
+
+# 查询串中的连续空白视为一个空格
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_query(query_string: str) -> str:
+    """
+    规范化查询串（NFKC全角转半角、小写、合并空白），格式不同的相同查询共用缓存
+
+    Args:
+        query_string: 查询字符串
+
+    Returns:
+        规范化后的查询串
+    """
+    text = unicodedata.normalize("NFKC", query_string or "").lower()
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def _freeze(value: Any) -> Hashable:
+    """把过滤条件中的列表/字典转换为可哈希的元组"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items() if item is not None))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class SearchCache:
+    """
+    搜索结果缓存
+
+    以 规范化查询串 + 字段 + 过滤条件 + 分页参数 为键，LRU淘汰，线程安全。
+    缓存绑定索引版本号，发现索引有新的提交时整体失效；仍持有旧版本搜索器的线程
+    不会使缓存失效，其计算结果也不写入缓存。
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大缓存条目数（0表示不缓存）
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(
+        query_string: str,
+        fields: List[str],
+        limit: int,
+        filters: Optional[Dict[str, Any]] = None,
+        **options: Any
+    ) -> Tuple:
+        """
+        计算缓存键
+
+        Args:
+            query_string: 查询字符串
+            fields: 搜索字段
+            limit: 返回数量（或每页数量）
+            filters: 过滤条件
+            **options: 其他影响结果的参数（如页码）
+
+        Returns:
+            缓存键
+        """
+        return (
+            normalize_query(query_string),
+            tuple(sorted(fields)),
+            limit,
+            _freeze(filters or {}),
+            _freeze(options)
+        )
+
+    def _check_generation(self, generation: int):
+        """索引版本前进时清空缓存（调用方需持有锁），较旧的版本号不影响缓存"""
+        if self._generation is None or generation > self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._generation = generation
+
+    def get(self, key: Tuple, generation: int) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+            generation: 调用方搜索器的索引版本号（旧于缓存版本时可直接使用较新的缓存结果）
+
+        Returns:
+            缓存的结果，未命中时返回None
+        """
+        if self.max_entries <= 0:
+            return None
+
+        with self._lock:
+            self._check_generation(generation)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, generation: int, value: Any):
+        """
+        写入缓存（结果基于旧版本索引计算时忽略）
+
+        Args:
+            key: 缓存键
+            generation: 计算结果时的索引版本号
+            value: 结果
+        """
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._check_generation(generation)
+            if generation != self._generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            命中/未命中次数、失效次数、条目数、当前索引版本和命中率
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "generation": self._generation,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+
+class FilterCache:
+    """
+    过滤条件文档集合缓存
+
+    段写入后不再变化（只会增加删除标记），按 (段ID, 段内删除数, 过滤条件) 缓存段内满足条件的文档号，
+    新提交只需计算新增或合并出的段；拼接后的全局文档集合按 (索引版本, 过滤条件) 缓存。LRU淘汰，线程安全。
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大缓存条目数
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(filters: Dict[str, Any]) -> Hashable:
+        """计算过滤条件的缓存键"""
+        return _freeze(filters)
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        """读取缓存，未命中时返回None"""
+        with self._lock:
+            docs = self._entries.get(key)
+            if docs is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return docs
+
+    def put(self, key: Tuple, docs: Any):
+        """写入缓存"""
+        with self._lock:
+            self._entries[key] = docs
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            命中/未命中次数、条目数和命中率
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0
+            }
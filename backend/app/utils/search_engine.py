@@ -2,21 +2,72 @@
 Whoosh全文搜索引擎模块
 """
 import os
-from typing import List, Dict, Optional
-from whoosh import index
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import List, Dict, Optional, Any, Iterator, Callable
+from whoosh import index, writing, query
 from whoosh.fields import Schema, TEXT, ID, NUMERIC, DATETIME
 from whoosh.qparser import QueryParser, MultifieldParser
 from whoosh.analysis import StemmingAnalyzer
-import jieba
-from jieba.analyse import ChineseAnalyzer
+from whoosh.idsets import BitSet
 from datetime import datetime
 
 from app.config import settings
 from app.utils.file_handler import ensure_directory_exists
+from app.utils.search_cache import SearchCache, FilterCache
+
+
+def _document_fields(doc_id: str, title: str, content: str, **kwargs) -> Dict[str, Any]:
+    """组装索引文档字段（未提供的字段取默认值）"""
+    return dict(
+        id=doc_id,
+        title=title,
+        content=content,
+        keywords=kwargs.get('keywords', ''),
+        author=kwargs.get('author', ''),
+        year=kwargs.get('year', 2024),
+        department=kwargs.get('department', ''),
+        paper_type=kwargs.get('paper_type', 'graduation'),
+        created_at=kwargs.get('created_at', datetime.now())
+    )
+
+
+class BulkIndexer:
+    """
+    批量写入器
+    
+    由 SearchEngine.bulk_writer() 创建，所有操作共用一个写入器，退出上下文时一次提交。
+    """
+    
+    def __init__(self, writer):
+        self._writer = writer
+        self.count = 0
+    
+    def add_document(self, doc_id: str, title: str, content: str, **kwargs):
+        """添加文档（参数同 SearchEngine.add_document）"""
+        self._writer.add_document(**_document_fields(doc_id, title, content, **kwargs))
+        self.count += 1
+    
+    def update_document(self, doc_id: str, title: str, content: str, **kwargs):
+        """更新文档（参数同 SearchEngine.update_document）"""
+        self._writer.update_document(**_document_fields(doc_id, title, content, **kwargs))
+        self.count += 1
+    
+    def delete_document(self, doc_id: str):
+        """删除文档"""
+        self._writer.delete_by_term('id', doc_id)
 
 
 class SearchEngine:
-    """Whoosh搜索引擎封装"""
+    """
+    Whoosh搜索引擎封装
+
+    索引在首次使用时才打开（jieba.analyse 导入时会加载IDF词典，较慢），
+    也可在启动预热阶段调用 open() 提前打开。
+    """
     
     def __init__(self, index_dir: str = None):
         """
@@ -26,26 +77,64 @@ class SearchEngine:
             index_dir: 索引目录路径
         """
         self.index_dir = index_dir or settings.WHOOSH_INDEX_PATH
-        ensure_directory_exists(self.index_dir)
-        
-        # 定义索引Schema
-        self.schema = Schema(
-            id=ID(stored=True, unique=True),
-            title=TEXT(stored=True, analyzer=ChineseAnalyzer()),
-            content=TEXT(stored=True, analyzer=ChineseAnalyzer()),
-            keywords=TEXT(stored=True, analyzer=ChineseAnalyzer()),
-            author=TEXT(stored=True),
-            year=NUMERIC(stored=True),
-            department=TEXT(stored=True),
-            paper_type=ID(stored=True),
-            created_at=DATETIME(stored=True)
-        )
+        self._schema: Optional[Schema] = None
+        self._ix = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.cache = SearchCache(settings.SEARCH_CACHE_MAX_ENTRIES)
+        self.filter_cache = FilterCache()
+    
+    @property
+    def schema(self) -> Schema:
+        """索引Schema"""
+        if self._schema is None:
+            from jieba.analyse import ChineseAnalyzer
+            
+            self._schema = Schema(
+                id=ID(stored=True, unique=True),
+                title=TEXT(stored=True, analyzer=ChineseAnalyzer()),
+                content=TEXT(stored=True, analyzer=ChineseAnalyzer()),
+                keywords=TEXT(stored=True, analyzer=ChineseAnalyzer()),
+                author=TEXT(stored=True),
+                year=NUMERIC(stored=True),
+                department=TEXT(stored=True),
+                paper_type=ID(stored=True),
+                created_at=DATETIME(stored=True)
+            )
+        return self._schema
+    
+    @property
+    def ix(self):
+        """Whoosh索引（首次访问时打开或创建）"""
+        if self._ix is None:
+            self.open()
+        return self._ix
+    
+    def open(self):
+        """打开索引，不存在时创建"""
+        with self._lock:
+            if self._ix is not None:
+                return
+            ensure_directory_exists(self.index_dir)
+            if index.exists_in(self.index_dir):
+                self._ix = index.open_dir(self.index_dir)
+            else:
+                self._ix = index.create_in(self.index_dir, self.schema)
+    
+    def searcher(self):
+        """
+        当前线程的长期搜索器
         
-        # 初始化或打开索引
-        if index.exists_in(self.index_dir):
-            self.ix = index.open_dir(self.index_dir)
-        else:
-            self.ix = index.create_in(self.index_dir, self.schema)
+        每个线程保留一个搜索器，索引版本变化时 refresh() 只重新打开有变化的段，
+        版本未变时直接复用，避免每次查询都打开段文件。
+        
+        Returns:
+            Whoosh搜索器（不要关闭，也不要跨线程使用）
+        """
+        searcher = getattr(self._local, "searcher", None)
+        searcher = self.ix.searcher() if searcher is None else searcher.refresh()
+        self._local.searcher = searcher
+        return searcher
     
     def add_document(self, doc_id: str, title: str, content: str, **kwargs):
         """
@@ -59,17 +148,7 @@ class SearchEngine:
         """
         writer = self.ix.writer()
         try:
-            writer.add_document(
-                id=doc_id,
-                title=title,
-                content=content,
-                keywords=kwargs.get('keywords', ''),
-                author=kwargs.get('author', ''),
-                year=kwargs.get('year', 2024),
-                department=kwargs.get('department', ''),
-                paper_type=kwargs.get('paper_type', 'graduation'),
-                created_at=kwargs.get('created_at', datetime.now())
-            )
+            writer.add_document(**_document_fields(doc_id, title, content, **kwargs))
             writer.commit()
         except Exception as e:
             writer.cancel()
@@ -87,22 +166,46 @@ class SearchEngine:
         """
         writer = self.ix.writer()
         try:
-            writer.update_document(
-                id=doc_id,
-                title=title,
-                content=content,
-                keywords=kwargs.get('keywords', ''),
-                author=kwargs.get('author', ''),
-                year=kwargs.get('year', 2024),
-                department=kwargs.get('department', ''),
-                paper_type=kwargs.get('paper_type', 'graduation'),
-                created_at=kwargs.get('created_at', datetime.now())
-            )
+            writer.update_document(**_document_fields(doc_id, title, content, **kwargs))
             writer.commit()
         except Exception as e:
             writer.cancel()
             raise e
     
+    @contextmanager
+    def bulk_writer(
+        self,
+        procs: Optional[int] = None,
+        limitmb: Optional[int] = None,
+        clear: bool = False
+    ) -> Iterator[BulkIndexer]:
+        """
+        批量写入（逐篇调用 add_document 每次都会提交一个新段，大量导入时应使用本方法）
+        
+        用法::
+        
+            with search_engine.bulk_writer() as bulk:
+                for paper in papers:
+                    bulk.add_document(...)
+        
+        Args:
+            procs: 分词索引的进程数（默认取 settings.WHOOSH_BULK_PROCS）
+            limitmb: 每个进程的索引缓冲区大小（MB，默认取 settings.WHOOSH_BULK_LIMITMB）
+            clear: 是否在提交时丢弃索引中已有的全部文档（全量重建）
+            
+        Yields:
+            批量写入器，正常退出时一次提交并合并段，出现异常时放弃全部写入
+        """
+        procs = procs or settings.WHOOSH_BULK_PROCS
+        limitmb = limitmb or settings.WHOOSH_BULK_LIMITMB
+        writer = self.ix.writer(procs=procs, limitmb=limitmb)
+        try:
+            yield BulkIndexer(writer)
+        except BaseException:
+            writer.cancel()
+            raise
+        writer.commit(mergetype=writing.CLEAR if clear else None, merge=True)
+    
     def delete_document(self, doc_id: str):
         """
         删除文档
@@ -118,11 +221,92 @@ class SearchEngine:
             writer.cancel()
             raise e
     
+    def _filter_query(self, filters: Dict[str, Any]) -> Optional[query.Query]:
+        """
+        把结构化过滤条件转换为Whoosh查询
+        
+        Args:
+            filters: year_from / year_to（届别范围，含端点）、department（院系）、paper_type（论文类型）
+            
+        Returns:
+            过滤查询，没有有效条件时返回None
+        """
+        clauses = []
+        if filters.get('year_from') is not None or filters.get('year_to') is not None:
+            clauses.append(query.NumericRange('year', filters.get('year_from'), filters.get('year_to')))
+        if filters.get('department'):
+            # 院系是分词字段，按索引时的分析器切分后做短语匹配
+            terms = [token.text for token in self.ix.schema['department'].analyzer(filters['department'])]
+            if terms:
+                clauses.append(query.Term('department', terms[0]) if len(terms) == 1 else query.Phrase('department', terms))
+        if filters.get('paper_type'):
+            clauses.append(query.Term('paper_type', filters['paper_type']))
+        
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else query.And(clauses)
+    
+    def _filter_docs(self, searcher, filters: Optional[Dict[str, Any]]) -> Optional[BitSet]:
+        """
+        计算满足过滤条件的文档号集合
+        
+        每个段内的匹配结果单独缓存，索引有新提交时只需计算新增或合并出的段。
+        
+        Args:
+            searcher: 搜索器
+            filters: 过滤条件
+            
+        Returns:
+            全局文档号集合（不要修改），没有过滤条件时返回None
+        """
+        filter_query = self._filter_query(filters or {})
+        if filter_query is None:
+            return None
+        
+        filter_key = self.filter_cache.make_key(filters)
+        combined_key = ('combined', searcher.ixreader.generation(), filter_key)
+        docs = self.filter_cache.get(combined_key)
+        if docs is not None:
+            return docs
+        
+        combined = set()
+        for subsearcher, offset in searcher.leaf_searchers():
+            segment = subsearcher.reader().segment()
+            if segment is None:
+                combined.update(offset + docnum for docnum in filter_query.docs(subsearcher))
+                continue
+            
+            segment_key = ('segment', segment.segment_id(), segment.deleted_count(), filter_key)
+            local = self.filter_cache.get(segment_key)
+            if local is None:
+                local = frozenset(filter_query.docs(subsearcher))
+                self.filter_cache.put(segment_key, local)
+            combined.update(offset + docnum for docnum in local)
+        
+        docs = BitSet(combined, size=searcher.doc_count_all())
+        self.filter_cache.put(combined_key, docs)
+        return docs
+    
+    @staticmethod
+    def _hit_to_dict(hit) -> Dict:
+        """转换搜索结果"""
+        return {
+            'id': hit['id'],
+            'title': hit['title'],
+            'content': hit.get('content', '')[:200],  # 只返回前200字符
+            'score': hit.score,
+            'author': hit.get('author', ''),
+            'year': hit.get('year', 0),
+            'department': hit.get('department', ''),
+            'paper_type': hit.get('paper_type', '')
+        }
+    
     def search(
         self,
         query_string: str,
         fields: List[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
     ) -> List[Dict]:
         """
         搜索文档
@@ -131,6 +315,7 @@ class SearchEngine:
             query_string: 查询字符串
             fields: 搜索字段列表
             limit: 返回结果数量限制
+            filters: 过滤条件（year_from / year_to / department / paper_type）
             
         Returns:
             搜索结果列表
@@ -138,28 +323,84 @@ class SearchEngine:
         if fields is None:
             fields = ['title', 'content', 'keywords']
         
-        with self.ix.searcher() as searcher:
-            # 创建多字段查询解析器
-            parser = MultifieldParser(fields, schema=self.ix.schema)
-            query = parser.parse(query_string)
-            
-            # 执行搜索
-            results = searcher.search(query, limit=limit)
-            
-            # 转换结果为字典列表
+        searcher = self.searcher()
+        
+        # 相同查询在索引版本不变时直接返回缓存结果
+        generation = searcher.ixreader.generation()
+        cache_key = self.cache.make_key(query_string, fields, limit, filters)
+        cached = self.cache.get(cache_key, generation)
+        if cached is not None:
+            return [dict(hit) for hit in cached]
+        
+        # 创建多字段查询解析器
+        parser = MultifieldParser(fields, schema=self.ix.schema)
+        parsed = parser.parse(query_string)
+        
+        # 执行搜索（没有文档满足过滤条件时直接返回空结果，Whoosh会把空集合当作不过滤）
+        allowed = self._filter_docs(searcher, filters)
+        if allowed is not None and not allowed:
             search_results = []
-            for hit in results:
-                search_results.append({
-                    'id': hit['id'],
-                    'title': hit['title'],
-                    'content': hit.get('content', '')[:200],  # 只返回前200字符
-                    'score': hit.score,
-                    'author': hit.get('author', ''),
-                    'year': hit.get('year', 0),
-                    'department': hit.get('department', '')
-                })
+        else:
+            results = searcher.search(parsed, limit=limit, filter=allowed)
+            search_results = [self._hit_to_dict(hit) for hit in results]
+        
+        self.cache.put(cache_key, generation, tuple(dict(hit) for hit in search_results))
+        return search_results
+    
+    def search_page(
+        self,
+        query_string: str,
+        page: int = 1,
+        page_size: int = 10,
+        fields: List[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        分页搜索文档
+        
+        Args:
+            query_string: 查询字符串
+            page: 页码（从1开始）
+            page_size: 每页数量
+            fields: 搜索字段列表
+            filters: 过滤条件（year_from / year_to / department / paper_type）
             
-            return search_results
+        Returns:
+            {"total", "page", "page_size", "total_pages", "items"}，页码超出范围时 items 为空
+        """
+        if fields is None:
+            fields = ['title', 'content', 'keywords']
+        
+        searcher = self.searcher()
+        
+        generation = searcher.ixreader.generation()
+        cache_key = self.cache.make_key(query_string, fields, page_size, filters, page=page)
+        cached = self.cache.get(cache_key, generation)
+        if cached is not None:
+            return {**cached, 'items': [dict(hit) for hit in cached['items']]}
+        
+        parser = MultifieldParser(fields, schema=self.ix.schema)
+        parsed = parser.parse(query_string)
+        
+        allowed = self._filter_docs(searcher, filters)
+        if allowed is not None and not allowed:
+            total, total_pages, items = 0, 0, []
+        else:
+            results_page = searcher.search_page(parsed, page, pagelen=page_size, filter=allowed)
+            total, total_pages = results_page.total, results_page.pagecount
+            # search_page 会把超出范围的页码截到最后一页，这里按空页处理
+            items = [self._hit_to_dict(hit) for hit in results_page] if results_page.pagenum == page else []
+        
+        response = {
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'total_pages': total_pages,
+            'items': items
+        }
+        
+        self.cache.put(cache_key, generation, {**response, 'items': tuple(dict(hit) for hit in items)})
+        return response
     
     def search_similar_titles(self, title: str, limit: int = 10) -> List[Dict]:
         """
@@ -194,20 +435,131 @@ class SearchEngine:
         Returns:
             文档数量
         """
-        with self.ix.searcher() as searcher:
-            return searcher.doc_count_all()
+        return self.searcher().doc_count_all()
     
     def clear_index(self):
         """清空索引"""
         writer = self.ix.writer()
         try:
             # 删除所有文档
-            writer.mergetype = index.CLEAR
-            writer.commit()
+            writer.commit(mergetype=writing.CLEAR)
         except Exception as e:
             writer.cancel()
             raise e
 
 
-# 全局搜索引擎实例
+class AsyncSearchEngine:
+    """
+    SearchEngine 的异步封装
+    
+    查询在有界线程池中执行（每个线程复用自己的长期搜索器），
+    写入全部交给单独的写线程串行执行，查询、写锁等待和段合并都不会阻塞事件循环。
+    """
+    
+    def __init__(self, engine: SearchEngine, max_workers: Optional[int] = None):
+        """
+        Args:
+            engine: 同步搜索引擎
+            max_workers: 查询线程数（默认取 settings.SEARCH_THREADS）
+        """
+        self.engine = engine
+        self._max_workers = max_workers
+        self._search_pool: Optional[ThreadPoolExecutor] = None
+        self._write_pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _pools(self):
+        """首次使用时创建线程池"""
+        with self._lock:
+            if self._search_pool is None:
+                self._search_pool = ThreadPoolExecutor(
+                    max_workers=self._max_workers or settings.SEARCH_THREADS,
+                    thread_name_prefix="search"
+                )
+                self._write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-writer")
+            return self._search_pool, self._write_pool
+    
+    async def _read(self, func: Callable, *args, **kwargs):
+        """在查询线程池中执行"""
+        search_pool, _ = self._pools()
+        return await asyncio.get_running_loop().run_in_executor(search_pool, partial(func, *args, **kwargs))
+    
+    async def write(self, func: Callable, *args, **kwargs):
+        """
+        在写线程中执行写操作（同一时刻只有一个写操作，可传入使用 bulk_writer 的批量写入函数）
+        
+        Args:
+            func: 写操作函数
+            *args, **kwargs: 函数参数
+            
+        Returns:
+            函数返回值
+        """
+        _, write_pool = self._pools()
+        return await asyncio.get_running_loop().run_in_executor(write_pool, partial(func, *args, **kwargs))
+    
+    async def search(
+        self,
+        query_string: str,
+        fields: List[str] = None,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict]:
+        """搜索文档（参数同 SearchEngine.search）"""
+        return await self._read(self.engine.search, query_string, fields=fields, limit=limit, filters=filters)
+    
+    async def search_page(
+        self,
+        query_string: str,
+        page: int = 1,
+        page_size: int = 10,
+        fields: List[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """分页搜索文档（参数同 SearchEngine.search_page）"""
+        return await self._read(
+            self.engine.search_page, query_string, page=page, page_size=page_size, fields=fields, filters=filters
+        )
+    
+    async def search_similar_titles(self, title: str, limit: int = 10) -> List[Dict]:
+        """搜索相似标题"""
+        return await self._read(self.engine.search_similar_titles, title, limit=limit)
+    
+    async def search_by_content(self, content: str, limit: int = 10) -> List[Dict]:
+        """按内容搜索"""
+        return await self._read(self.engine.search_by_content, content, limit=limit)
+    
+    async def get_document_count(self) -> int:
+        """获取索引中的文档数量"""
+        return await self._read(self.engine.get_document_count)
+    
+    async def add_document(self, doc_id: str, title: str, content: str, **kwargs):
+        """添加文档（参数同 SearchEngine.add_document）"""
+        await self.write(self.engine.add_document, doc_id, title, content, **kwargs)
+    
+    async def update_document(self, doc_id: str, title: str, content: str, **kwargs):
+        """更新文档（参数同 SearchEngine.update_document）"""
+        await self.write(self.engine.update_document, doc_id, title, content, **kwargs)
+    
+    async def delete_document(self, doc_id: str):
+        """删除文档"""
+        await self.write(self.engine.delete_document, doc_id)
+    
+    async def clear_index(self):
+        """清空索引"""
+        await self.write(self.engine.clear_index)
+    
+    def shutdown(self):
+        """关闭线程池（等待进行中的写入完成）"""
+        with self._lock:
+            if self._search_pool is not None:
+                self._search_pool.shutdown(wait=False, cancel_futures=True)
+                self._write_pool.shutdown(wait=True)
+                self._search_pool = self._write_pool = None
+
+
+# 全局搜索引擎实例（索引延迟打开）
 search_engine = SearchEngine()
+
+# 全局异步搜索引擎（查询线程池 + 单写线程）
+async_search_engine = AsyncSearchEngine(search_engine)
@@ -0,0 +1,408 @@
+"""
+标题语义检索模块（LSA + IVF近似最近邻）
+
+离线对全部往届论文标题的TF-IDF矩阵做截断SVD（潜在语义分析），得到128~256维稠密向量，
+再用球面k-means把向量划分到若干倒排列表（IVF）。查询时只扫描与查询向量最接近的
+nprobe 个列表，20万标题规模下单次查询在毫秒级，不依赖外部模型服务。
+
+离线构建后新增的论文进入待合并区（暴力比较），删除的论文记入墓碑集合，
+下次离线构建时统一合并。
+"""
+import os
+import threading
+from typing import List, Tuple, Dict, Optional, Iterable, Set
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from app.utils.feature_hashing import hashed_features
+
+
+DEFAULT_COMPONENTS = 192
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """行L2归一化（零向量保持为零）"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """得分最高的 k 个位置（降序）"""
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    iterations: int = 10,
+    seed: int = 0,
+    batch_size: int = 20000
+) -> np.ndarray:
+    """
+    球面k-means（向量已归一化，按点积分配）
+
+    Args:
+        vectors: 训练向量（已L2归一化）
+        n_clusters: 聚类数
+        iterations: 迭代次数
+        seed: 随机种子
+        batch_size: 分配阶段的分批大小
+
+    Returns:
+        归一化的聚类中心（n_clusters × d）
+    """
+    rng = np.random.RandomState(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = assign_clusters(vectors, centroids, batch_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+
+        # 空簇用随机样本重新初始化
+        empty = np.flatnonzero(np.bincount(labels, minlength=n_clusters) == 0)
+        if len(empty):
+            sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = _normalize_rows(sums)
+
+    return centroids
+
+
+def assign_clusters(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 20000) -> np.ndarray:
+    """
+    将向量分配到点积最大的聚类中心
+
+    Args:
+        vectors: 向量
+        centroids: 聚类中心
+        batch_size: 分批大小（限制中间矩阵的内存）
+
+    Returns:
+        聚类编号数组
+    """
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), batch_size):
+        labels[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+    return labels
+
+
+class SemanticTitleIndex:
+    """往届论文标题语义索引（LSA投影 + IVF倒排列表）"""
+
+    def __init__(self, nprobe: int = 16):
+        """
+        Args:
+            nprobe: 查询时扫描的倒排列表数量
+        """
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+
+        # LSA模型
+        self._vocabulary: Dict[str, int] = {}
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._components = np.zeros((0, 0), dtype=np.float32)  # 词表大小 × 维数
+
+        # IVF索引（向量按倒排列表连续存放）
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+
+        # 离线构建后的增量变更
+        self._pending_ids: List[int] = []
+        self._pending_vectors: List[np.ndarray] = []
+        self._deleted: Set[int] = set()
+
+        self.signature: Optional[Tuple] = None
+
+    @property
+    def ready(self) -> bool:
+        """是否已有可用的LSA模型"""
+        return len(self._vocabulary) > 0
+
+    @property
+    def dimensions(self) -> int:
+        """向量维数"""
+        return self._components.shape[1] if self._components.ndim == 2 else 0
+
+    def ids(self) -> List[int]:
+        """索引中的全部有效论文ID"""
+        with self._lock:
+            ids = [doc_id for doc_id in self._ids.tolist() if doc_id not in self._deleted]
+            return ids + list(self._pending_ids)
+
+    # ---------- 构建 ----------
+
+    @classmethod
+    def build(
+        cls,
+        items: Iterable[Tuple[int, str]],
+        n_components: int = DEFAULT_COMPONENTS,
+        n_lists: Optional[int] = None,
+        min_df: int = 1,
+        seed: int = 0
+    ) -> "SemanticTitleIndex":
+        """
+        离线构建：TF-IDF -> 截断SVD -> 球面k-means倒排列表
+
+        Args:
+            items: [(论文ID, 标题)]
+            n_components: LSA维数（128~256）
+            n_lists: 倒排列表数量（默认 4·√N）
+            min_df: 词项最少出现的标题数
+            seed: 随机种子
+
+        Returns:
+            构建好的索引
+        """
+        # scikit-learn 只在离线构建时需要
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import TruncatedSVD
+
+        items = [(doc_id, title) for doc_id, title in items if title]
+        index = cls()
+        if len(items) < 3:
+            return index
+
+        vectorizer = TfidfVectorizer(analyzer=hashed_features, min_df=min_df, dtype=np.float32)
+        try:
+            matrix = vectorizer.fit_transform([title for _, title in items])
+        except ValueError:
+            return index
+
+        n_components = max(1, min(n_components, matrix.shape[0] - 1, matrix.shape[1] - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        vectors = _normalize_rows(svd.fit_transform(matrix))
+
+        n_lists = n_lists or max(1, int(4 * np.sqrt(len(items))))
+        n_lists = min(n_lists, len(items))
+        sample_size = min(len(items), n_lists * 64)
+        sample = vectors[np.random.RandomState(seed).choice(len(items), sample_size, replace=False)]
+        centroids = spherical_kmeans(sample, n_lists, seed=seed)
+        labels = assign_clusters(vectors, centroids)
+
+        order = np.argsort(labels, kind="stable")
+        index._vocabulary = dict(vectorizer.vocabulary_)
+        index._idf = vectorizer.idf_.astype(np.float32)
+        index._components = svd.components_.T.astype(np.float32)
+        index._centroids = centroids
+        index._offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=n_lists))]).astype(np.int64)
+        index._ids = np.asarray([doc_id for doc_id, _ in items], dtype=np.int64)[order]
+        index._vectors = vectors[order]
+        return index
+
+    def embed(self, titles: List[str]) -> np.ndarray:
+        """
+        将标题投影到LSA空间（与离线构建的TF-IDF权重一致）
+
+        Args:
+            titles: 标题列表
+
+        Returns:
+            L2归一化的稠密向量（len(titles) × 维数）
+        """
+        with self._lock:
+            vocabulary, idf, components = self._vocabulary, self._idf, self._components
+
+        rows, cols = [], []
+        for row, title in enumerate(titles):
+            for feature in hashed_features(title):
+                column = vocabulary.get(feature)
+                if column is not None:
+                    rows.append(row)
+                    cols.append(column)
+
+        # 重复的 (行, 列) 在转换为CSR时累加即为词频；行向量最终归一化，TF-IDF行范数无需单独处理
+        matrix = csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(titles), components.shape[0])
+        )
+        matrix.sum_duplicates()
+        matrix.data *= idf[matrix.indices]
+        return _normalize_rows(np.asarray(matrix @ components))
+
+    # ---------- 增量变更 ----------
+
+    def add(self, doc_id: int, title: str):
+        """
+        新增论文（进入待合并区，下次离线构建时并入倒排列表）
+
+        Args:
+            doc_id: 论文ID
+            title: 标题
+        """
+        self.add_many([doc_id], [title])
+
+    def add_many(self, doc_ids: List[int], titles: List[str]):
+        """
+        批量新增论文（一次矩阵乘法完成投影）
+
+        Args:
+            doc_ids: 论文ID列表
+            titles: 对应的标题列表
+        """
+        if not self.ready:
+            return
+        items = [(doc_id, title) for doc_id, title in zip(doc_ids, titles) if title]
+        if not items:
+            return
+
+        ids = np.fromiter((doc_id for doc_id, _ in items), dtype=np.int64, count=len(items))
+        vectors = self.embed([title for _, title in items])
+        with self._lock:
+            # 已在倒排列表中的论文（如标题修改）以待合并区中的新向量为准
+            new_ids = set(ids.tolist())
+            if any(doc_id in new_ids for doc_id in self._pending_ids):
+                kept = [i for i, doc_id in enumerate(self._pending_ids) if doc_id not in new_ids]
+                self._pending_ids = [self._pending_ids[i] for i in kept]
+                self._pending_vectors = [self._pending_vectors[i] for i in kept]
+            self._deleted.update(ids[np.isin(ids, self._ids)].tolist())
+            self._pending_ids.extend(ids.tolist())
+            self._pending_vectors.extend(vectors)
+
+    def remove(self, doc_id: int):
+        """
+        删除论文
+
+        Args:
+            doc_id: 论文ID
+        """
+        with self._lock:
+            self._remove_pending_locked(doc_id)
+            if (self._ids == doc_id).any():
+                self._deleted.add(doc_id)
+
+    def _remove_pending_locked(self, doc_id: int):
+        if doc_id in self._pending_ids:
+            position = self._pending_ids.index(doc_id)
+            del self._pending_ids[position]
+            del self._pending_vectors[position]
+
+    # ---------- 查询 ----------
+
+    def search(self, title: str, top_k: int = 10, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        查询语义相近的标题
+
+        Args:
+            title: 查询标题
+            top_k: 最多返回数量
+            min_score: 最低余弦相似度
+
+        Returns:
+            [(论文ID, 余弦相似度)] 列表，按相似度降序
+        """
+        if not self.ready or not title:
+            return []
+
+        query = self.embed([title])[0]
+        if not query.any():
+            return []
+
+        with self._lock:
+            centroids, offsets, ids, vectors = self._centroids, self._offsets, self._ids, self._vectors
+            pending_ids = np.asarray(self._pending_ids, dtype=np.int64)
+            pending_vectors = np.asarray(self._pending_vectors, dtype=np.float32).reshape(-1, self.dimensions)
+            deleted = np.fromiter(self._deleted, dtype=np.int64, count=len(self._deleted))
+
+        # 只扫描与查询向量最接近的 nprobe 个倒排列表
+        candidate_ids, candidate_scores = [], []
+        for cluster in _top_k(centroids @ query, self.nprobe):
+            start, end = offsets[cluster], offsets[cluster + 1]
+            if start < end:
+                candidate_ids.append(ids[start:end])
+                candidate_scores.append(vectors[start:end] @ query)
+
+        # 墓碑只作用于倒排列表，待合并区中的向量总是有效
+        if candidate_ids and len(deleted):
+            base_ids = np.concatenate(candidate_ids)
+            alive = ~np.isin(base_ids, deleted)
+            candidate_ids = [base_ids[alive]]
+            candidate_scores = [np.concatenate(candidate_scores)[alive]]
+
+        candidate_ids = np.concatenate(candidate_ids + [pending_ids])
+        scores = np.concatenate(candidate_scores + [pending_vectors @ query])
+
+        keep = scores >= min_score
+        candidate_ids, scores = candidate_ids[keep], scores[keep]
+
+        return [(int(candidate_ids[i]), float(scores[i])) for i in _top_k(scores, top_k)]
+
+    # ---------- 持久化 ----------
+
+    def save(self, path: str):
+        """
+        保存离线构建结果（原子替换）；向量矩阵单独保存为 .npy 以便内存映射加载
+
+        Args:
+            path: 文件路径（.npz）
+        """
+        with self._lock:
+            terms = np.asarray(sorted(self._vocabulary, key=self._vocabulary.get), dtype=str)
+            vectors_path = f"{path}.vectors.npy"
+            with open(f"{vectors_path}.tmp", "wb") as f:
+                np.save(f, self._vectors)
+            with open(f"{path}.tmp", "wb") as f:
+                np.savez(
+                    f,
+                    terms=terms,
+                    idf=self._idf,
+                    components=self._components,
+                    centroids=self._centroids,
+                    offsets=self._offsets,
+                    ids=self._ids
+                )
+        os.replace(f"{vectors_path}.tmp", vectors_path)
+        os.replace(f"{path}.tmp", path)
+
+    def load(self, path: str) -> bool:
+        """
+        加载离线构建结果（清空增量变更）
+
+        Args:
+            path: 文件路径（.npz）
+
+        Returns:
+            是否加载成功
+        """
+        vectors_path = f"{path}.vectors.npy"
+        if not os.path.exists(path) or not os.path.exists(vectors_path):
+            return False
+
+        try:
+            with np.load(path) as data:
+                terms = data["terms"].tolist()
+                idf = data["idf"]
+                components = data["components"]
+                centroids = data["centroids"]
+                offsets = data["offsets"]
+                ids = data["ids"]
+            vectors = np.load(vectors_path, mmap_mode="r")
+        except (OSError, KeyError, ValueError):
+            return False
+
+        if len(vectors) != len(ids):
+            return False
+
+        with self._lock:
+            self._vocabulary = {term: i for i, term in enumerate(terms)}
+            self._idf = idf
+            self._components = components
+            self._centroids = centroids
+            self._offsets = offsets
+            self._ids = ids
+            self._vectors = vectors
+            self._pending_ids, self._pending_vectors = [], []
+            self._deleted = set()
+            self.signature = None
+
+        return True
+
+
+# 全局标题语义索引
+semantic_title_index = SemanticTitleIndex()
@@ -0,0 +1,396 @@
+"""
+SimHash段落指纹模块
+
+为段落计算64位SimHash，并用分块多表索引查找汉明距离不超过k的指纹：
+将64位切成k+1块，距离不超过k的两个指纹至少有一块完全相同（抽屉原理），
+因此每个段落只需查k+1张表，再对少量候选精确计算汉明距离。
+"""
+import os
+import re
+import hashlib
+import threading
+from collections import Counter
+from typing import List, Tuple, Dict, Hashable, Optional, Iterable
+import numpy as np
+
+from app.utils.tokenizer import tokenize
+
+
+# 默认最大汉明距离
+DEFAULT_MAX_DISTANCE = 3
+# 参与段落查重的最短段落长度（过短的段落如标题、图注容易误判）
+MIN_PARAGRAPH_LENGTH = 30
+
+_WORD_PATTERN = re.compile(r"\w", re.UNICODE)
+
+# 字节popcount查找表
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _token_hash64(token: str) -> int:
+    """词语的64位哈希"""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(text: str) -> int:
+    """
+    计算文本的64位SimHash（特征为jieba分词结果，权重为词频）
+
+    Args:
+        text: 文本
+
+    Returns:
+        64位指纹（无有效词语时为0）
+    """
+    counts = Counter(token for token in tokenize(text) if _WORD_PATTERN.search(token))
+    if not counts:
+        return 0
+
+    hashes = np.fromiter((_token_hash64(token) for token in counts), dtype=np.uint64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+
+    # 每个词的64位展开为±1，按词频加权求和后取符号
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = ((bits.astype(np.float64) * 2 - 1) * weights[:, np.newaxis]).sum(axis=0)
+
+    return int(np.packbits(votes > 0, bitorder="little").view(np.uint64)[0])
+
+
+def simhash_paragraphs(
+    paragraphs: Iterable[str],
+    min_length: int = MIN_PARAGRAPH_LENGTH
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算段落SimHash，跳过过短的段落
+
+    Args:
+        paragraphs: 段落文本序列
+        min_length: 最短段落长度
+
+    Returns:
+        (指纹数组, 对应的段落序号数组)
+    """
+    fingerprints, indexes = [], []
+    for idx, text in enumerate(paragraphs):
+        text = (text or "").strip()
+        if len(text) >= min_length:
+            fingerprints.append(simhash(text))
+            indexes.append(idx)
+
+    return np.asarray(fingerprints, dtype=np.uint64), np.asarray(indexes, dtype=np.int32)
+
+
+def hamming_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    逐元素计算两组64位指纹的汉明距离
+
+    Args:
+        a: 指纹数组
+        b: 指纹数组（与a等长或可广播）
+
+    Returns:
+        汉明距离数组
+    """
+    xor = np.bitwise_xor(np.asarray(a, dtype=np.uint64), np.asarray(b, dtype=np.uint64))
+    xor = np.ascontiguousarray(xor).reshape(-1)
+    return _POPCOUNT_TABLE[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.int32)
+
+
+class SimHashIndex:
+    """
+    SimHash多表索引
+
+    每张表以一个比特块为键，按键排序保存条目下标，查询用二分查找；
+    新增条目先追加到增量区列表（不复制已排序部分），超过阈值后一次合并；删除使用墓碑标记。
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        """
+        Args:
+            max_distance: 最大汉明距离（表数量为 max_distance + 1）
+        """
+        self.max_distance = max_distance
+        tables = max_distance + 1
+        bounds = np.linspace(0, 64, tables + 1).astype(int)
+        self._blocks = [
+            (np.uint64(lo), np.uint64((1 << (hi - lo)) - 1))
+            for lo, hi in zip(bounds[:-1], bounds[1:])
+        ]
+
+        self._lock = threading.RLock()
+        self._doc_keys: List[Hashable] = []
+        self._key_to_doc: Dict[Hashable, int] = {}
+        self._doc_alive: List[bool] = []
+
+        self._fingerprints = np.empty(0, dtype=np.uint64)
+        self._docs = np.empty(0, dtype=np.int32)
+        self._paragraphs = np.empty(0, dtype=np.int32)
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_size = 0
+        self._pending_stacked: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+        self._sorted_keys: List[np.ndarray] = [np.empty(0, dtype=np.uint64) for _ in self._blocks]
+        self._sorted_entries: List[np.ndarray] = [np.empty(0, dtype=np.int64) for _ in self._blocks]
+
+    def __len__(self) -> int:
+        return len(self._key_to_doc)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._key_to_doc
+
+    def keys(self) -> List[Hashable]:
+        """索引中全部文档键"""
+        with self._lock:
+            return list(self._key_to_doc.keys())
+
+    def _block_keys(self, fingerprints: np.ndarray, table: int) -> np.ndarray:
+        shift, mask = self._blocks[table]
+        return (fingerprints >> shift) & mask
+
+    def add_document(self, key: Hashable, fingerprints: np.ndarray, paragraph_indexes: np.ndarray):
+        """
+        添加文档的段落指纹（已存在则替换）
+
+        Args:
+            key: 文档键
+            fingerprints: 段落指纹数组
+            paragraph_indexes: 段落序号数组
+        """
+        with self._lock:
+            self._remove_locked(key)
+
+            doc = len(self._doc_keys)
+            self._doc_keys.append(key)
+            self._key_to_doc[key] = doc
+            self._doc_alive.append(True)
+
+            if len(fingerprints):
+                self._pending.append((
+                    fingerprints.astype(np.uint64),
+                    np.full(len(fingerprints), doc, dtype=np.int32),
+                    paragraph_indexes.astype(np.int32)
+                ))
+                self._pending_size += len(fingerprints)
+                self._pending_stacked = None
+
+            if self._pending_size > max(4096, len(self._fingerprints) // 10):
+                self._rebuild_locked()
+
+    def remove_document(self, key: Hashable) -> bool:
+        """
+        删除文档
+
+        Args:
+            key: 文档键
+
+        Returns:
+            是否存在并删除
+        """
+        with self._lock:
+            return self._remove_locked(key)
+
+    def _remove_locked(self, key: Hashable) -> bool:
+        doc = self._key_to_doc.pop(key, None)
+        if doc is None:
+            return False
+        self._doc_alive[doc] = False
+        return True
+
+    def _stacked_pending_locked(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """拼接增量区 (指纹, 文档, 段落序号)，结果缓存到下次添加"""
+        if self._pending_stacked is None:
+            self._pending_stacked = (
+                np.concatenate([np.empty(0, dtype=np.uint64)] + [p[0] for p in self._pending]),
+                np.concatenate([np.empty(0, dtype=np.int32)] + [p[1] for p in self._pending]),
+                np.concatenate([np.empty(0, dtype=np.int32)] + [p[2] for p in self._pending])
+            )
+        return self._pending_stacked
+
+    def _rebuild_locked(self, compact: bool = False):
+        """合并增量区；compact为True时同时清理已删除文档的条目并重新排序所有表"""
+        merged = len(self._fingerprints)
+        fingerprints = np.empty(0, dtype=np.uint64)
+        if self._pending:
+            fingerprints, docs, paragraphs = self._stacked_pending_locked()
+            self._fingerprints = np.concatenate([self._fingerprints, fingerprints])
+            self._docs = np.concatenate([self._docs, docs])
+            self._paragraphs = np.concatenate([self._paragraphs, paragraphs])
+            self._pending = []
+            self._pending_size = 0
+            self._pending_stacked = None
+
+        if compact and len(self._docs):
+            alive = np.asarray(self._doc_alive, dtype=bool)[self._docs]
+            self._fingerprints = self._fingerprints[alive]
+            self._docs = self._docs[alive]
+            self._paragraphs = self._paragraphs[alive]
+        elif len(self._sorted_entries[0]) == merged:
+            # 已排序部分仍然有效：只对增量区排序后归并插入，避免每次合并都全量排序
+            for table in range(len(self._blocks)):
+                keys = self._block_keys(fingerprints, table)
+                order = np.argsort(keys, kind="stable")
+                positions = np.searchsorted(self._sorted_keys[table], keys[order], side="right")
+                self._sorted_keys[table] = np.insert(self._sorted_keys[table], positions, keys[order])
+                self._sorted_entries[table] = np.insert(self._sorted_entries[table], positions, order + merged)
+            return
+
+        for table in range(len(self._blocks)):
+            keys = self._block_keys(self._fingerprints, table)
+            order = np.argsort(keys, kind="stable")
+            self._sorted_keys[table] = keys[order]
+            self._sorted_entries[table] = order
+
+    def query(
+        self,
+        fingerprints: np.ndarray,
+        exclude: Optional[Iterable[Hashable]] = None
+    ) -> List[Tuple[int, Hashable, int, int]]:
+        """
+        批量查询汉明距离不超过 max_distance 的段落
+
+        Args:
+            fingerprints: 查询指纹数组
+            exclude: 需要排除的文档键
+
+        Returns:
+            [(查询下标, 命中文档键, 命中段落序号, 汉明距离)]，按查询下标和距离排序
+        """
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        if len(fingerprints) == 0:
+            return []
+
+        with self._lock:
+            alive = np.asarray(self._doc_alive, dtype=bool)
+            excluded = [self._key_to_doc[k] for k in exclude or () if k in self._key_to_doc]
+            delta_fingerprints, delta_docs, delta_paragraphs = self._stacked_pending_locked()
+
+            sorted_parts, delta_parts = [], []
+            for table in range(len(self._blocks)):
+                query_keys = self._block_keys(fingerprints, table)
+                sorted_keys = self._sorted_keys[table]
+                lo = np.searchsorted(sorted_keys, query_keys, side="left")
+                hi = np.searchsorted(sorted_keys, query_keys, side="right")
+                counts = hi - lo
+                total = int(counts.sum())
+                if total:
+                    starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+                    sorted_parts.append((
+                        np.repeat(np.arange(len(fingerprints)), counts),
+                        self._sorted_entries[table][starts + np.arange(total)]
+                    ))
+
+                # 增量区逐块比较
+                if len(delta_fingerprints):
+                    delta_keys = self._block_keys(delta_fingerprints, table)
+                    delta_parts.append(np.nonzero(query_keys[:, np.newaxis] == delta_keys[np.newaxis, :]))
+
+            matches = [
+                self._filter_matches(fingerprints, parts, *arrays, alive, excluded)
+                for parts, arrays in (
+                    (sorted_parts, (self._fingerprints, self._docs, self._paragraphs)),
+                    (delta_parts, (delta_fingerprints, delta_docs, delta_paragraphs))
+                )
+                if parts
+            ]
+            if not matches:
+                return []
+
+            query_idx, docs, paragraphs, distances = (np.concatenate(columns) for columns in zip(*matches))
+            order = np.lexsort((distances, query_idx))
+
+            return [
+                (int(query_idx[i]), self._doc_keys[docs[i]], int(paragraphs[i]), int(distances[i]))
+                for i in order
+            ]
+
+    def _filter_matches(
+        self,
+        fingerprints: np.ndarray,
+        parts: List[Tuple[np.ndarray, np.ndarray]],
+        entry_fingerprints: np.ndarray,
+        entry_docs: np.ndarray,
+        entry_paragraphs: np.ndarray,
+        alive: np.ndarray,
+        excluded: List[int]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """对候选 (查询下标, 条目下标) 去重，保留距离不超过阈值、未删除且未排除的条目"""
+        pairs = np.unique(np.stack([
+            np.concatenate([p[0] for p in parts]),
+            np.concatenate([p[1] for p in parts])
+        ], axis=1), axis=0)
+        query_idx, entry_idx = pairs[:, 0], pairs[:, 1]
+
+        distances = hamming_distance(fingerprints[query_idx], entry_fingerprints[entry_idx])
+        docs = entry_docs[entry_idx]
+        keep = (distances <= self.max_distance) & alive[docs]
+        if excluded:
+            keep &= ~np.isin(docs, excluded)
+
+        return query_idx[keep], docs[keep], entry_paragraphs[entry_idx[keep]], distances[keep]
+
+    def save(self, path: str):
+        """
+        持久化到磁盘（原子替换），文档键需为字符串
+
+        Args:
+            path: 文件路径（.npz）
+        """
+        with self._lock:
+            self._rebuild_locked(compact=True)
+            alive_docs = [doc for doc, alive in enumerate(self._doc_alive) if alive]
+            remap = np.full(len(self._doc_keys), -1, dtype=np.int32)
+            remap[alive_docs] = np.arange(len(alive_docs), dtype=np.int32)
+            keys = np.asarray([str(self._doc_keys[doc]) for doc in alive_docs], dtype=str)
+            fingerprints, docs, paragraphs = self._fingerprints, remap[self._docs], self._paragraphs
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                fingerprints=fingerprints,
+                docs=docs,
+                paragraphs=paragraphs,
+                keys=keys,
+                params=np.asarray([self.max_distance], dtype=np.int64)
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """
+        从磁盘加载
+
+        Args:
+            path: 文件路径（.npz）
+
+        Returns:
+            是否加载成功（参数不一致时视为失败）
+        """
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with np.load(path) as data:
+                if data["params"].tolist() != [self.max_distance]:
+                    return False
+                fingerprints = data["fingerprints"]
+                docs = data["docs"]
+                paragraphs = data["paragraphs"]
+                keys = data["keys"].tolist()
+        except (OSError, KeyError, ValueError):
+            return False
+
+        with self._lock:
+            self._doc_keys = keys
+            self._key_to_doc = {key: doc for doc, key in enumerate(keys)}
+            self._doc_alive = [True] * len(keys)
+            self._fingerprints = fingerprints.astype(np.uint64)
+            self._docs = docs.astype(np.int32)
+            self._paragraphs = paragraphs.astype(np.int32)
+            self._pending = []
+            self._pending_size = 0
+            self._pending_stacked = None
+            self._sorted_keys = [np.empty(0, dtype=np.uint64) for _ in self._blocks]
+            self._sorted_entries = [np.empty(0, dtype=np.int64) for _ in self._blocks]
+            self._rebuild_locked()
+
+        return True
@@ -1,11 +1,23 @@
 """
 相似度计算模块
 """
-from typing import List, Tuple, Dict
+import os
+from typing import List, Tuple, Dict, Optional, Any, Callable, Literal
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import jieba
+from scipy.sparse import csr_matrix
+
+from app.config import settings
+from app.utils.tokenizer import tokenize
+from app.utils.idf import idf_table, analyze
+from app.utils.feature_hashing import hashing_vectorizer
+from app.utils.vector_store import VectorStore
+from app.utils.keywords import keyword_extractor
+from app.utils.winnowing import FingerprintIndex, DEFAULT_KGRAM_SIZE, DEFAULT_WINDOW_SIZE
+
+
+# 标题综合相似度权重（余弦 + Jaccard）
+TITLE_COSINE_WEIGHT = 0.7
+TITLE_JACCARD_WEIGHT = 0.3
 
 
 def preprocess_text(text: str) -> str:
@@ -18,9 +30,25 @@ def preprocess_text(text: str) -> str:
     Returns:
         预处理后的文本
     """
-    # 使用jieba分词
-    words = jieba.cut(text)
-    return " ".join(words)
+    # 使用jieba分词（带缓存）
+    return " ".join(tokenize(text))
+
+
+def vectorize(texts: List[str], mode: Optional[Literal["tfidf", "hashing"]] = None):
+    """
+    将一组文本转换为L2归一化向量，点积即余弦相似度
+
+    Args:
+        texts: 文本列表
+        mode: 向量化方式（tfidf: 比对库语料IDF；hashing: 特征哈希，无需词表），
+              默认取 settings.SIMILARITY_MODE
+
+    Returns:
+        稀疏矩阵（每行对应一个文本）
+    """
+    if (mode or settings.SIMILARITY_MODE) == "hashing":
+        return hashing_vectorizer.transform(texts)
+    return idf_table.transform(texts)[0]
 
 
 def calculate_cosine_similarity(text1: str, text2: str) -> float:
@@ -37,29 +65,90 @@ def calculate_cosine_similarity(text1: str, text2: str) -> float:
     if not text1 or not text2:
         return 0.0
     
-    # 预处理文本
-    processed_text1 = preprocess_text(text1)
-    processed_text2 = preprocess_text(text2)
+    # 向量已L2归一化，点积即余弦相似度
+    matrix = vectorize([text1, text2])
+    similarity = matrix[0].multiply(matrix[1]).sum()
     
-    # TF-IDF向量化
-    vectorizer = TfidfVectorizer()
-    try:
-        tfidf_matrix = vectorizer.fit_transform([processed_text1, processed_text2])
-        
-        # 计算余弦相似度
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-        return float(similarity)
-    except:
-        return 0.0
+    return min(float(similarity), 1.0)
+
 
+def select_top_k(
+    scores: np.ndarray,
+    top_k: Optional[int] = None,
+    min_score: float = 0.0
+) -> np.ndarray:
+    """
+    从得分向量中选出不低于阈值的前K个位置
+
+    Args:
+        scores: 得分向量
+        top_k: 最多返回数量（None表示不限）
+        min_score: 最低得分
+
+    Returns:
+        位置数组，按得分降序（得分相同时按位置升序）
+    """
+    indexes = np.flatnonzero(scores >= min_score) if min_score > 0 else np.arange(len(scores))
+    if top_k is not None and len(indexes) > top_k:
+        if top_k <= 0:
+            return indexes[:0]
+        # 先用 argpartition 取出第K大得分，再保留所有不低于它的位置，保证并列时结果稳定
+        kth = np.partition(scores[indexes], len(indexes) - top_k)[len(indexes) - top_k]
+        indexes = indexes[scores[indexes] >= kth]
+    order = np.lexsort((indexes, -scores[indexes]))
+    if top_k is not None:
+        order = order[:top_k]
+    return indexes[order]
 
-def calculate_batch_similarity(query_text: str, texts: List[str]) -> List[Tuple[int, float]]:
+
+def prune_by_norm_bound(matrix, query_vector, min_score: float) -> Optional[np.ndarray]:
+    """
+    按范数上界筛选可能达到阈值的行（矩阵各行与查询向量均已L2归一化）
+
+    查询词按权重绝对值降序排列，若某行不含前缀中的任何词，则它与查询向量的点积
+    不超过剩余后缀的L2范数（Cauchy-Schwarz）；后缀范数低于阈值时这些行可直接跳过。
+
+    Args:
+        matrix: CSR稀疏矩阵
+        query_vector: 1 × n 的CSR查询向量
+        min_score: 最低得分
+
+    Returns:
+        候选行号数组（None表示无法剪枝，需要对全部行计分）
+    """
+    if min_score <= 0 or query_vector.nnz == 0:
+        return None
+
+    # 哈希向量的权重可能为负，按绝对值排序
+    order = np.argsort(-np.abs(query_vector.data), kind="stable")
+    cols = query_vector.indices[order]
+    sorted_weights = query_vector.data[order]
+
+    # suffix_norms[i] 为第 i 个词之后（含）全部词权重的L2范数
+    suffix_norms = np.sqrt(np.cumsum((sorted_weights ** 2)[::-1])[::-1])
+    prefix_size = int(np.count_nonzero(suffix_norms >= min_score - 1e-9))
+    if prefix_size == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    mask = np.isin(matrix.indices, cols[:prefix_size])
+    row_of_entry = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    return np.unique(row_of_entry[mask])
+
+
+def calculate_batch_similarity(
+    query_text: str,
+    texts: List[str],
+    top_k: Optional[int] = None,
+    min_score: float = 0.0
+) -> List[Tuple[int, float]]:
     """
     批量计算查询文本与多个文本的相似度
     
     Args:
         query_text: 查询文本
         texts: 文本列表
+        top_k: 最多返回数量（None表示全部）
+        min_score: 最低相似度（大于0时跳过不可能达到阈值的文本）
         
     Returns:
         [(索引, 相似度)] 列表，按相似度降序排列
@@ -67,29 +156,21 @@ def calculate_batch_similarity(query_text: str, texts: List[str]) -> List[Tuple[
     if not query_text or not texts:
         return []
     
-    # 预处理所有文本
-    processed_query = preprocess_text(query_text)
-    processed_texts = [preprocess_text(text) for text in texts]
+    # 向量已L2归一化，点积即余弦相似度
+    matrix = vectorize([query_text] + list(texts))
+    query_vector = matrix[0:1]
+    text_vectors = matrix[1:]
     
-    # TF-IDF向量化
-    vectorizer = TfidfVectorizer()
-    try:
-        all_texts = [processed_query] + processed_texts
-        tfidf_matrix = vectorizer.fit_transform(all_texts)
-        
-        # 计算查询文本与所有文本的相似度
-        query_vector = tfidf_matrix[0:1]
-        text_vectors = tfidf_matrix[1:]
-        
-        similarities = cosine_similarity(query_vector, text_vectors)[0]
-        
-        # 创建 (索引, 相似度) 列表并排序
-        results = [(i, float(sim)) for i, sim in enumerate(similarities)]
-        results.sort(key=lambda x: x[1], reverse=True)
-        
-        return results
-    except:
-        return []
+    # 只对可能达到阈值的行计分，其余行得分记为0
+    similarities = np.zeros(text_vectors.shape[0])
+    rows = prune_by_norm_bound(text_vectors, query_vector, min_score)
+    if rows is None:
+        similarities = (text_vectors @ query_vector.T).toarray().ravel()
+    elif len(rows):
+        similarities[rows] = (text_vectors[rows] @ query_vector.T).toarray().ravel()
+    
+    indexes = select_top_k(similarities, top_k, min_score)
+    return list(zip(indexes.tolist(), similarities[indexes].tolist()))
 
 
 def calculate_jaccard_similarity(text1: str, text2: str) -> float:
@@ -107,8 +188,8 @@ def calculate_jaccard_similarity(text1: str, text2: str) -> float:
         return 0.0
     
     # 分词
-    words1 = set(jieba.cut(text1))
-    words2 = set(jieba.cut(text2))
+    words1 = set(tokenize(text1))
+    words2 = set(tokenize(text2))
     
     # 计算交集和并集
     intersection = words1.intersection(words2)
@@ -120,10 +201,70 @@ def calculate_jaccard_similarity(text1: str, text2: str) -> float:
     return len(intersection) / len(union)
 
 
+def binary_token_matrix(texts: List[str], vocabulary: Dict[str, int]) -> csr_matrix:
+    """
+    将文本的词集合表示为0/1稀疏矩阵
+
+    Args:
+        texts: 文本列表
+        vocabulary: 词 -> 列号（遇到新词时追加）
+
+    Returns:
+        CSR矩阵（len(texts) × 词表大小，列数在全部文本处理完后确定）
+    """
+    indices = []
+    indptr = [0]
+    for text in texts:
+        columns = {vocabulary.setdefault(word, len(vocabulary)) for word in tokenize(text)} if text else set()
+        indices.extend(columns)
+        indptr.append(len(indices))
+
+    return csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(texts), max(len(vocabulary), 1))
+    )
+
+
+def batch_jaccard_similarity(queries: List[str], texts: List[str]) -> np.ndarray:
+    """
+    批量计算Jaccard相似度（与 calculate_jaccard_similarity 结果一致）
+
+    每个文本的词集合表示为0/1稀疏矩阵的一行，交集大小即两行的点积，
+    并集大小由各行元素个数相加再减去交集得到，一次稀疏矩阵乘法算出全部得分。
+
+    Args:
+        queries: 查询文本列表
+        texts: 待比较文本列表
+
+    Returns:
+        得分矩阵（len(queries) × len(texts)）
+    """
+    if not queries or not texts:
+        return np.zeros((len(queries), len(texts)))
+
+    vocabulary: Dict[str, int] = {}
+    query_matrix = binary_token_matrix(queries, vocabulary)
+    text_matrix = binary_token_matrix(texts, vocabulary)
+    width = max(len(vocabulary), 1)
+    query_matrix.resize(len(queries), width)
+    text_matrix.resize(len(texts), width)
+
+    intersection = (query_matrix @ text_matrix.T).toarray()
+    query_sizes = np.diff(query_matrix.indptr)
+    text_sizes = np.diff(text_matrix.indptr)
+    union = query_sizes[:, None] + text_sizes[None, :] - intersection
+
+    scores = np.zeros(intersection.shape)
+    np.divide(intersection, union, out=scores, where=union > 0)
+    return scores
+
+
 def find_similar_titles(
     query_title: str,
     existing_titles: List[Dict[str, any]],
-    threshold: float = 0.7
+    threshold: float = 0.7,
+    top_k: Optional[int] = None,
+    vectorizer: Optional[Callable[[List[str]], csr_matrix]] = None
 ) -> List[Dict[str, any]]:
     """
     查找相似的标题
@@ -132,6 +273,9 @@ def find_similar_titles(
         query_title: 查询标题
         existing_titles: 现有标题列表 [{"id": 1, "title": "xxx"}, ...]
         threshold: 相似度阈值
+        top_k: 最多返回数量（None表示全部）
+        vectorizer: 标题向量化函数（None表示使用正文语料IDF）；
+            往届标题检索传入 title_index.transform，IDF取自标题库，与召回时的打分一致
         
     Returns:
         相似标题列表，包含相似度信息
@@ -139,44 +283,208 @@ def find_similar_titles(
     if not query_title or not existing_titles:
         return []
     
-    similar_titles = []
+    existing_titles = [item for item in existing_titles if item.get("title")]
+    if not existing_titles:
+        return []
     
-    for item in existing_titles:
-        title = item.get("title", "")
-        if not title:
-            continue
-        
-        # 计算余弦相似度
-        cos_sim = calculate_cosine_similarity(query_title, title)
-        
-        # 计算Jaccard相似度
-        jac_sim = calculate_jaccard_similarity(query_title, title)
-        
-        # 综合相似度（加权平均）
-        combined_sim = 0.7 * cos_sim + 0.3 * jac_sim
-        
-        if combined_sim >= threshold:
-            similar_titles.append({
-                **item,
-                "similarity": combined_sim,
-                "cosine_similarity": cos_sim,
-                "jaccard_similarity": jac_sim
-            })
+    # 一次性向量化全部标题，余弦相似度即与查询向量的点积
+    matrix = (vectorizer or vectorize)([query_title] + [item["title"] for item in existing_titles])
+    query_vector = matrix[0:1]
+    title_vectors = matrix[1:]
     
-    # 按相似度降序排序
-    similar_titles.sort(key=lambda x: x["similarity"], reverse=True)
+    # Jaccard最大为1，综合相似度达到阈值要求余弦相似度不低于该下界
+    min_cosine = max(0.0, (threshold - TITLE_JACCARD_WEIGHT) / TITLE_COSINE_WEIGHT)
     
-    return similar_titles
+    cos_scores = np.zeros(len(existing_titles))
+    rows = prune_by_norm_bound(title_vectors, query_vector, min_cosine)
+    if rows is None:
+        cos_scores = (title_vectors @ query_vector.T).toarray().ravel()
+    elif len(rows):
+        cos_scores[rows] = (title_vectors[rows] @ query_vector.T).toarray().ravel()
+    cos_scores = np.minimum(cos_scores, 1.0)
+    
+    # 只对余弦相似度达到下界的候选计算Jaccard
+    candidates = np.flatnonzero(cos_scores >= min_cosine)
+    if len(candidates) == 0:
+        return []
+    
+    jac_scores = batch_jaccard_similarity(
+        [query_title],
+        [existing_titles[idx]["title"] for idx in candidates]
+    )[0]
+    
+    # 综合相似度（加权平均）
+    combined = TITLE_COSINE_WEIGHT * cos_scores[candidates] + TITLE_JACCARD_WEIGHT * jac_scores
+    selected = select_top_k(combined, top_k, threshold)
+    
+    return [
+        {
+            **existing_titles[candidates[pos]],
+            "similarity": float(combined[pos]),
+            "cosine_similarity": float(cos_scores[candidates[pos]]),
+            "jaccard_similarity": float(jac_scores[pos])
+        }
+        for pos in selected
+    ]
+
 
+class TitleIndex:
+    """
+    往届论文标题索引
 
-def calculate_duplicate_rate(text: str, reference_texts: List[str], window_size: int = 100) -> float:
+    标题词频向量保存在磁盘向量库中（内存映射，多进程共享），
+    新增/删除论文写入增量段，查询时只需一次稀疏矩阵-向量乘法加Top-K选择。
     """
-    计算文本重复率（基于滑动窗口）
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: 向量库目录
+        """
+        self.store = VectorStore(directory)
+
+    @property
+    def size(self) -> int:
+        """索引中的标题数量"""
+        return len(self.store)
+
+    @property
+    def signature(self) -> Optional[Tuple]:
+        """数据快照标识（用于判断索引是否过期）"""
+        return self.store.signature
+
+    def ids(self) -> List[int]:
+        """索引中的全部论文ID"""
+        return self.store.ids().tolist()
+
+    def build(self, items: List[Dict[str, Any]], signature: Optional[Tuple] = None):
+        """
+        基于全部标题重建索引
+
+        Args:
+            items: 标题列表 [{"id": 1, "title": "xxx"}, ...]
+            signature: 数据快照标识
+        """
+        self.store.rebuild(
+            ((item["id"], analyze(item["title"])) for item in items if item.get("title")),
+            signature
+        )
+
+    def update(
+        self,
+        items: List[Dict[str, Any]],
+        removed_ids: List[int],
+        signature: Optional[Tuple] = None
+    ):
+        """
+        增量更新索引
+
+        Args:
+            items: 新增或修改的标题 [{"id": 1, "title": "xxx"}, ...]
+            removed_ids: 删除的论文ID
+            signature: 更新后的数据快照标识（None表示保持不变）
+        """
+        self.store.update(
+            [(item["id"], analyze(item["title"] or "")) for item in items],
+            removed_ids,
+            signature
+        )
+
+    def vectors(self) -> Tuple[np.ndarray, csr_matrix]:
+        """
+        全部标题的L2归一化TF-IDF向量（用于构建k近邻图）
+
+        Returns:
+            (论文ID数组, 稀疏矩阵)
+        """
+        return self.store.normalized_matrix()
+
+    def transform(self, titles: List[str]) -> csr_matrix:
+        """
+        将标题转换为L2归一化的TF-IDF向量（IDF取自标题库而非正文语料）
+
+        标题用词与正文分布不同（如"研究""设计"在标题中极常见），
+        使用标题自身的DF才能压低这些词的权重。
+
+        Args:
+            titles: 标题列表
+
+        Returns:
+            稀疏矩阵
+        """
+        return self.store.transform([analyze(title or "") for title in titles])
+
+    def search(
+        self,
+        query_title: str,
+        top_k: int = 10,
+        threshold: float = 0.7
+    ) -> List[Tuple[int, float]]:
+        """
+        查询与标题相似的往届论文
+
+        Args:
+            query_title: 查询标题
+            top_k: 最多返回数量
+            threshold: 综合相似度阈值
+
+        Returns:
+            [(论文ID, 余弦相似度)] 列表，按相似度降序
+        """
+        if not query_title:
+            return []
+
+        # Jaccard最大为1，综合相似度达到阈值要求余弦相似度不低于该下界
+        min_cosine = max(0.0, (threshold - TITLE_JACCARD_WEIGHT) / TITLE_COSINE_WEIGHT)
+        return self.store.query(analyze(query_title), top_k=top_k, min_score=min_cosine)
+
+
+# 全局往届论文标题索引
+title_index = TitleIndex(os.path.join(settings.INDEX_DATA_PATH, "title_vectors"))
+
+
+def calculate_duplicate_report(
+    text: str,
+    reference_texts: List[str],
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    kgram_size: int = DEFAULT_KGRAM_SIZE
+) -> Dict[str, Any]:
+    """
+    计算文本重复情况（winnowing指纹匹配）
+
+    Args:
+        text: 待检测文本
+        reference_texts: 参考文本列表
+        window_size: winnowing窗口大小（k-gram个数）
+        kgram_size: k-gram长度（字符数）
+
+    Returns:
+        重复报告，包含重复率、重复字符数和重复片段，来源键为参考文本下标
+    """
+    index = FingerprintIndex(kgram_size=kgram_size, window_size=window_size)
+    for i, ref_text in enumerate(reference_texts or []):
+        if ref_text:
+            index.add_document(i, ref_text)
+
+    return index.report(text or "")
+
+
+def calculate_duplicate_rate(
+    text: str,
+    reference_texts: List[str],
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    kgram_size: int = DEFAULT_KGRAM_SIZE
+) -> float:
+    """
+    计算文本重复率（基于winnowing指纹的重复字符覆盖率）
+    
+    长度不小于 window_size + kgram_size - 1 个字符的连续重复片段保证会被检出。
     
     Args:
         text: 待检测文本
         reference_texts: 参考文本列表
-        window_size: 窗口大小（字符数）
+        window_size: winnowing窗口大小（k-gram个数）
+        kgram_size: k-gram长度（字符数）
         
     Returns:
         重复率 (0-100)
@@ -184,43 +492,20 @@ def calculate_duplicate_rate(text: str, reference_texts: List[str], window_size:
     if not text or not reference_texts:
         return 0.0
     
-    # 简化实现：计算与每个参考文本的最大相似度
-    max_similarity = 0.0
-    
-    for ref_text in reference_texts:
-        similarity = calculate_cosine_similarity(text, ref_text)
-        max_similarity = max(max_similarity, similarity)
-    
-    return max_similarity * 100
+    report = calculate_duplicate_report(text, reference_texts, window_size, kgram_size)
+    return report["duplicate_rate"]
 
 
-def extract_keywords(text: str, top_n: int = 10) -> List[str]:
+def extract_keywords(text: str, top_n: int = 10, method: str = "tfidf") -> List[str]:
     """
     从文本中提取关键词
     
     Args:
         text: 文本
         top_n: 返回前N个关键词
+        method: 提取方法（tfidf：词频 × 语料IDF；textrank：共现图排序）
         
     Returns:
         关键词列表
     """
-    if not text:
-        return []
-    
-    # 分词
-    words = jieba.cut(text)
-    
-    # 过滤停用词（简单实现）
-    stopwords = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这'}
-    filtered_words = [w for w in words if len(w) > 1 and w not in stopwords]
-    
-    # 统计词频
-    word_freq = {}
-    for word in filtered_words:
-        word_freq[word] = word_freq.get(word, 0) + 1
-    
-    # 排序并返回前N个
-    sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-    
-    return [word for word, freq in sorted_words[:top_n]]
+    return keyword_extractor.extract(text, top_n=top_n, method=method)
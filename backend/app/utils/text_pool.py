@@ -0,0 +1,193 @@
+"""
+文本处理进程池模块
+
+jieba分词、指纹计算等纯Python的CPU密集操作在线程中仍受GIL限制，
+统一分发到共享的进程池执行；长文档按段落分块并行处理后合并结果。
+"""
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from typing import List, Tuple, Dict, Callable, Any, Optional
+import numpy as np
+
+from app.config import settings
+from app.utils.winnowing import fingerprint_text
+from app.utils.simhash import simhash, MIN_PARAGRAPH_LENGTH
+from app.utils.idf import analyze
+from app.utils.warmup import warm_up_jieba
+
+
+# 每个分块的目标字符数
+PARAGRAPH_CHUNK_CHARS = 5000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool_size() -> int:
+    """进程池大小，由 settings.PROCESS_POOL_WORKERS 决定（0表示CPU核数）"""
+    return settings.PROCESS_POOL_WORKERS or os.cpu_count() or 1
+
+
+def _pool_context() -> multiprocessing.context.BaseContext:
+    """
+    进程池的启动方式
+
+    不能使用fork：启动预热在后台线程中执行 jieba.initialize()，fork时若该线程正持有jieba的初始化锁，
+    子进程中的锁永远不会释放，初始化函数会一直阻塞。优先使用forkserver（由干净的服务进程fork，
+    预先导入本模块），不支持时（Windows）使用spawn。
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    获取共享进程池（首次调用时创建）
+
+    Returns:
+        进程池
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 子进程先加载jieba词典（从词典缓存文件读取）
+            _pool = ProcessPoolExecutor(
+                max_workers=get_pool_size(),
+                mp_context=_pool_context(),
+                initializer=warm_up_jieba
+            )
+        return _pool
+
+
+def shutdown_process_pool():
+    """关闭共享进程池"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def run_in_process(func: Callable[..., Any], *args) -> Any:
+    """
+    在共享进程池中执行函数（函数及参数需可pickle）
+
+    Args:
+        func: 模块级函数
+        *args: 参数
+
+    Returns:
+        函数返回值
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), func, *args)
+
+
+def chunk_paragraphs(
+    paragraphs: List[str],
+    max_chars: int = PARAGRAPH_CHUNK_CHARS
+) -> List[Tuple[int, List[str]]]:
+    """
+    将连续段落按字符数分块
+
+    Args:
+        paragraphs: 段落列表
+        max_chars: 每块的目标字符数（单个超长段落独占一块）
+
+    Returns:
+        [(块内首段的段落序号, 段落列表)]
+    """
+    chunks = []
+    start, size = 0, 0
+    for i, paragraph in enumerate(paragraphs):
+        if size and size + len(paragraph) > max_chars:
+            chunks.append((start, paragraphs[start:i]))
+            start, size = i, 0
+        size += len(paragraph)
+    if start < len(paragraphs):
+        chunks.append((start, paragraphs[start:]))
+    return chunks
+
+
+def _paragraph_features(
+    start: int,
+    paragraphs: List[str],
+    min_length: int
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    """计算一块段落的SimHash和词频（在子进程中执行，每段只分词一次）"""
+    fingerprints, indexes, terms = [], [], Counter()
+    for offset, text in enumerate(paragraphs):
+        text = (text or "").strip()
+        if not text:
+            continue
+        terms.update(analyze(text))
+        if len(text) >= min_length:
+            fingerprints.append(simhash(text))
+            indexes.append(start + offset)
+
+    return (
+        np.asarray(fingerprints, dtype=np.uint64),
+        np.asarray(indexes, dtype=np.int32),
+        dict(terms)
+    )
+
+
+async def compute_paragraph_features(
+    paragraphs: List[str],
+    min_length: int = MIN_PARAGRAPH_LENGTH
+) -> Tuple[np.ndarray, np.ndarray, Dict[str, int]]:
+    """
+    按段落分块并行计算SimHash和词频
+
+    Args:
+        paragraphs: 段落列表
+        min_length: 参与SimHash的最短段落长度
+
+    Returns:
+        (段落指纹数组, 对应段落序号数组, 全文词频)
+    """
+    chunks = chunk_paragraphs(paragraphs)
+    if not chunks:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int32), {}
+
+    results = await asyncio.gather(*[
+        run_in_process(_paragraph_features, start, chunk, min_length)
+        for start, chunk in chunks
+    ])
+
+    terms = Counter()
+    for _, _, chunk_terms in results:
+        terms.update(chunk_terms)
+
+    return (
+        np.concatenate([r[0] for r in results]),
+        np.concatenate([r[1] for r in results]),
+        dict(terms)
+    )
+
+
+async def compute_fingerprints(
+    text: str,
+    kgram_size: int,
+    window_size: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    在进程池中计算全文winnowing指纹
+
+    Args:
+        text: 文本
+        kgram_size: k-gram长度
+        window_size: winnowing窗口大小
+
+    Returns:
+        (指纹哈希, 指纹位置, 归一化字符到原文的偏移)
+    """
+    return await run_in_process(fingerprint_text, text, kgram_size, window_size)
+
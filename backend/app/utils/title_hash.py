@@ -0,0 +1,54 @@
+"""
+标题规范化与哈希
+
+把仅有格式差异的标题（全角/半角、空格、标点、书名号、结尾的"研究"等）规范化为同一字符串，
+再取SHA-1作为数据库索引列，精确重复的标题只需一次索引查询即可发现。
+"""
+import re
+import hashlib
+import unicodedata
+from typing import Optional
+
+
+# 去除空白、标点和书名号等符号（\W 覆盖中英文标点）
+_NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+
+# 标题结尾不改变主题的措辞，如"……的研究"、"……之研究"
+_TRAILING_PATTERN = re.compile(r"(?:的|之)?(?:研究|初探|探究|探析)$")
+
+
+def canonical_title(title: Optional[str]) -> str:
+    """
+    规范化标题
+
+    Args:
+        title: 原始标题
+
+    Returns:
+        规范化后的标题（NFKC全角转半角、小写、去除空白标点、去除结尾"研究"）
+    """
+    if not title:
+        return ""
+
+    text = unicodedata.normalize("NFKC", title).lower()
+    text = _NON_WORD_PATTERN.sub("", text)
+
+    stripped = _TRAILING_PATTERN.sub("", text)
+    # 整个标题只有"研究"之类的措辞时保留原样
+    return stripped or text
+
+
+def title_hash(title: Optional[str]) -> Optional[str]:
+    """
+    计算标题的规范化哈希
+
+    Args:
+        title: 原始标题
+
+    Returns:
+        SHA-1十六进制字符串（标题为空时返回None）
+    """
+    canonical = canonical_title(title)
+    if not canonical:
+        return None
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
@@ -0,0 +1,137 @@
+"""
+分词缓存模块
+"""
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple, Dict, Any
+import jieba
+
+from app.config import settings
+
+
+class TokenCache:
+    """
+    jieba分词结果缓存
+
+    按文本哈希缓存分词结果，LRU淘汰，同时受条目数和内存占用上限约束，线程安全。
+    """
+
+    def __init__(self, max_entries: int = 50000, max_bytes: int = 64 * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 最大缓存条目数
+            max_bytes: 最大内存占用（字节，估算值）
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[bytes, Tuple[Tuple[str, ...], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_key(text: str) -> bytes:
+        """计算文本哈希作为缓存键"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _estimate_size(tokens: Tuple[str, ...]) -> int:
+        """估算分词结果的内存占用"""
+        return sys.getsizeof(tokens) + sum(sys.getsizeof(token) for token in tokens)
+
+    def tokenize(self, text: str) -> Tuple[str, ...]:
+        """
+        分词（优先读取缓存）
+
+        Args:
+            text: 文本
+
+        Returns:
+            分词结果
+        """
+        if not text:
+            return ()
+
+        key = self._make_key(text)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # 分词在锁外进行，避免长文本阻塞其他线程
+        tokens = tuple(jieba.cut(text))
+        size = self._estimate_size(tokens)
+
+        # 单条超过总容量1/8的结果不缓存，防止挤掉大量短文本
+        if size > self.max_bytes // 8:
+            return tokens
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (tokens, size)
+                self._bytes += size
+                self._evict()
+
+        return tokens
+
+    def _evict(self):
+        """按LRU顺序淘汰超出上限的条目（调用方需持有锁）"""
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+    def clear(self):
+        """清空缓存和统计"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            命中/未命中次数、条目数、内存占用和命中率
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+
+# 全局分词缓存实例
+token_cache = TokenCache(
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+    max_bytes=settings.TOKEN_CACHE_MAX_MB * 1024 * 1024
+)
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """
+    使用全局缓存进行jieba分词
+
+    Args:
+        text: 文本
+
+    Returns:
+        分词结果
+    """
+    return token_cache.tokenize(text)
@@ -0,0 +1,563 @@
+"""
+磁盘CSR向量库模块
+
+文档词频向量以CSR数组（.npy）保存在磁盘上，通过 numpy 内存映射打开，
+多个 uvicorn 工作进程共享同一份页缓存，不必各自在内存中构建矩阵。
+
+- 基础段：compact 时整体写出的 ids / indptr / indices / data / df 数组（只读映射）
+- 增量段：新增文档的行和被删除的基础段文档ID，每次写入时整体替换（通常很小）
+- 清单：manifest.json 记录当前生效的基础段和增量段，原子替换，读者据此判断是否需要重新打开
+
+列号由词项哈希得到（与进程无关），增量追加不需要维护共享词表；
+IDF、行范数在打开时按当前全部文档的DF计算，打分与对全部文档拟合TF-IDF一致。
+"""
+import os
+import json
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple, Dict, Optional, Iterable, Any
+import numpy as np
+from scipy.sparse import csr_matrix, vstack as scipy_vstack
+
+from app.utils.file_handler import ensure_directory_exists
+from app.utils.feature_hashing import DEFAULT_N_FEATURES, hash_columns
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+_BASE_ARRAYS = ("ids", "indptr", "indices", "data", "df")
+
+
+def count_vector(terms: List[str], n_features: int = DEFAULT_N_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    将词项序列转换为稀疏词频向量
+
+    Args:
+        terms: 词项（可重复）
+        n_features: 特征维数
+
+    Returns:
+        (列号数组（升序）, 词频数组)
+    """
+    if not terms:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    cols, counts = np.unique(hash_columns(terms, n_features), return_counts=True)
+    return cols.astype(np.int32), counts.astype(np.float32)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """跨进程文件锁（写操作串行化）"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _stack_rows(rows: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """将 (列号, 词频) 行列表拼接为 (indptr, indices, data)"""
+    lengths = np.fromiter((len(cols) for cols, _ in rows), dtype=np.int64, count=len(rows))
+    indptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    if rows:
+        indices = np.concatenate([cols for cols, _ in rows]).astype(np.int32)
+        data = np.concatenate([counts for _, counts in rows]).astype(np.float32)
+    else:
+        indices = np.zeros(0, dtype=np.int32)
+        data = np.zeros(0, dtype=np.float32)
+    return indptr, indices, data
+
+
+class VectorStore:
+    """
+    内存映射的文档向量库（基础段 + 增量段）
+
+    文档以整数ID标识。写操作持有跨进程文件锁并原子替换清单；
+    读操作在每次查询前检查清单是否变化，变化时重新映射文件。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        n_features: int = DEFAULT_N_FEATURES,
+        compact_ratio: float = 0.1,
+        min_compact_rows: int = 1000
+    ):
+        """
+        Args:
+            directory: 存储目录
+            n_features: 特征维数（2的幂）
+            compact_ratio: 增量段行数（含删除）超过基础段该比例时合并
+            min_compact_rows: 增量段至少达到该行数才合并
+        """
+        self.directory = directory
+        self.n_features = n_features
+        self.compact_ratio = compact_ratio
+        self.min_compact_rows = min_compact_rows
+
+        self._lock = threading.RLock()
+        self._version: Optional[Tuple[int, int, int]] = None
+        self._manifest: Dict[str, Any] = {}
+        self._state: Optional[Dict[str, Any]] = None
+
+    # ---------- 文件路径 ----------
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    @property
+    def _lock_path(self) -> str:
+        return os.path.join(self.directory, ".lock")
+
+    def _base_path(self, generation: int, name: str) -> str:
+        return os.path.join(self.directory, f"base-{generation}.{name}.npy")
+
+    def _delta_path(self, sequence: int) -> str:
+        return os.path.join(self.directory, f"delta-{sequence}.npz")
+
+    # ---------- 读取 ----------
+
+    def _read_manifest(self) -> Tuple[Optional[Tuple[int, int]], Dict[str, Any]]:
+        """读取清单及其版本（inode, mtime, size）"""
+        try:
+            stat = os.stat(self._manifest_path)
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                return (stat.st_ino, stat.st_mtime_ns, stat.st_size), json.load(f)
+        except (OSError, ValueError):
+            return None, {}
+
+    def refresh(self) -> bool:
+        """
+        清单变化时重新打开基础段和增量段
+
+        Returns:
+            是否重新打开
+        """
+        with self._lock:
+            for attempt in range(3):
+                version, manifest = self._read_manifest()
+                if self._state is not None and version == self._version:
+                    return False
+                try:
+                    state = self._open(manifest)
+                    break
+                except OSError:
+                    # 读取清单后文件恰好被合并删除，重新读取清单
+                    if attempt == 2:
+                        raise
+            self._state = state
+            self._manifest = manifest
+            self._version = version
+            return True
+
+    def _open(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """映射基础段、加载增量段，并按当前DF计算IDF和行范数"""
+        generation = manifest.get("generation")
+        base = {}
+        if generation is not None:
+            for name in _BASE_ARRAYS:
+                base[name] = np.load(self._base_path(generation, name), mmap_mode="r")
+        else:
+            base = {
+                "ids": np.zeros(0, dtype=np.int64),
+                "indptr": np.zeros(1, dtype=np.int64),
+                "indices": np.zeros(0, dtype=np.int32),
+                "data": np.zeros(0, dtype=np.float32),
+                "df": np.zeros(self.n_features, dtype=np.int32)
+            }
+
+        delta = {
+            "ids": np.zeros(0, dtype=np.int64),
+            "indptr": np.zeros(1, dtype=np.int64),
+            "indices": np.zeros(0, dtype=np.int32),
+            "data": np.zeros(0, dtype=np.float32),
+            "deleted": np.zeros(0, dtype=np.int64)
+        }
+        if manifest.get("delta"):
+            with np.load(os.path.join(self.directory, manifest["delta"])) as data:
+                delta = {name: data[name] for name in delta}
+
+        base_matrix = csr_matrix(
+            (base["data"], base["indices"], base["indptr"]),
+            shape=(len(base["ids"]), self.n_features),
+            copy=False
+        )
+        delta_matrix = csr_matrix(
+            (delta["data"], delta["indices"], delta["indptr"]),
+            shape=(len(delta["ids"]), self.n_features)
+        )
+        base_alive = ~np.isin(base["ids"], delta["deleted"])
+
+        # DF = 基础段DF - 已删除的基础段行 + 增量段
+        df = np.asarray(base["df"], dtype=np.int64)
+        dead_rows = np.flatnonzero(~base_alive)
+        if len(dead_rows) or len(delta["ids"]):
+            df = df.copy()
+            if len(dead_rows):
+                np.subtract.at(df, base_matrix[dead_rows].indices, 1)
+            np.add.at(df, delta_matrix.indices, 1)
+
+        num_docs = int(base_alive.sum()) + len(delta["ids"])
+        idf = (np.log((1 + num_docs) / (1 + df)) + 1).astype(np.float32)
+
+        return {
+            "base_ids": base["ids"],
+            "base_matrix": base_matrix,
+            "base_alive": base_alive,
+            "base_norms": self._row_norms(base_matrix, idf),
+            "delta_ids": delta["ids"],
+            "delta_matrix": delta_matrix,
+            "delta_norms": self._row_norms(delta_matrix, idf),
+            "deleted": delta["deleted"],
+            "idf": idf,
+            "num_docs": num_docs
+        }
+
+    @staticmethod
+    def _row_norms(matrix: csr_matrix, idf: np.ndarray) -> np.ndarray:
+        """TF-IDF加权后的行L2范数（全零行记为1）"""
+        weighted = (matrix.data * idf[matrix.indices]) ** 2
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        norms = np.sqrt(np.bincount(rows, weights=weighted, minlength=matrix.shape[0]))
+        norms[norms == 0] = 1.0
+        return norms
+
+    def _current(self) -> Dict[str, Any]:
+        """最新状态（必要时重新打开）"""
+        self.refresh()
+        return self._state
+
+    @property
+    def signature(self) -> Optional[Tuple]:
+        """数据快照标识（由写入方维护）"""
+        self.refresh()
+        signature = self._manifest.get("signature")
+        return tuple(signature) if signature is not None else None
+
+    def __len__(self) -> int:
+        return self._current()["num_docs"]
+
+    def ids(self) -> np.ndarray:
+        """全部有效文档ID"""
+        state = self._current()
+        return np.concatenate([state["base_ids"][state["base_alive"]], state["delta_ids"]])
+
+    def normalized_matrix(self) -> Tuple[np.ndarray, csr_matrix]:
+        """
+        全部有效文档的L2归一化TF-IDF矩阵（IDF取当前DF）
+
+        Returns:
+            (文档ID数组, 稀疏矩阵)
+        """
+        state = self._current()
+        alive = state["base_alive"]
+        matrix = scipy_vstack([
+            state["base_matrix"][np.flatnonzero(alive)],
+            state["delta_matrix"]
+        ]).tocsr().astype(np.float32)
+        norms = np.concatenate([state["base_norms"][alive], state["delta_norms"]])
+
+        matrix.data *= state["idf"][matrix.indices]
+        matrix.data /= np.repeat(norms, np.diff(matrix.indptr)).astype(np.float32)
+        return np.concatenate([state["base_ids"][alive], state["delta_ids"]]), matrix
+
+    def transform(self, term_lists: List[List[str]]) -> csr_matrix:
+        """
+        将库外文档转换为L2归一化的TF-IDF向量（IDF取库中当前DF）
+
+        Args:
+            term_lists: 每篇文档的词项（可重复）
+
+        Returns:
+            稀疏矩阵（len(term_lists) × n_features）
+        """
+        indptr, indices, data = _stack_rows([count_vector(terms, self.n_features) for terms in term_lists])
+        matrix = csr_matrix((data, indices, indptr), shape=(len(term_lists), self.n_features))
+
+        matrix.data *= self._current()["idf"][matrix.indices]
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        matrix.data /= np.repeat(norms, np.diff(matrix.indptr)).astype(np.float32)
+        return matrix
+
+    # ---------- 查询 ----------
+
+    def query(
+        self,
+        terms: List[str],
+        top_k: int = 10,
+        min_score: float = 0.0
+    ) -> List[Tuple[int, float]]:
+        """
+        余弦相似度检索
+
+        Args:
+            terms: 查询词项（可重复）
+            top_k: 最多返回数量
+            min_score: 最低相似度
+
+        Returns:
+            [(文档ID, 相似度)] 列表，按相似度降序
+        """
+        cols, counts = count_vector(terms, self.n_features)
+        if len(cols) == 0:
+            return []
+
+        state = self._current()
+        if state["num_docs"] == 0:
+            return []
+
+        # 库中保存的是原始词频：行向量的IDF权重合并到查询向量中，行范数单独相除
+        idf = state["idf"][cols]
+        weights = counts * idf
+        weights *= idf / np.linalg.norm(weights)
+        query_vector = csr_matrix(
+            (weights, cols, np.array([0, len(cols)])), shape=(1, self.n_features)
+        )
+
+        base_scores = (state["base_matrix"] @ query_vector.T).toarray().ravel() / state["base_norms"]
+        base_scores[~state["base_alive"]] = 0.0
+        delta_scores = (state["delta_matrix"] @ query_vector.T).toarray().ravel() / state["delta_norms"]
+
+        ids = np.concatenate([state["base_ids"], state["delta_ids"]])
+        scores = np.minimum(np.concatenate([base_scores, delta_scores]), 1.0)
+
+        candidates = np.flatnonzero(scores >= min_score) if min_score > 0 else np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            part = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = candidates[part]
+        candidates = candidates[np.lexsort((ids[candidates], -scores[candidates]))]
+
+        return [(int(ids[i]), float(scores[i])) for i in candidates]
+
+    # ---------- 写入 ----------
+
+    def rebuild(self, items: Iterable[Tuple[int, List[str]]], signature: Optional[Tuple] = None):
+        """
+        用全部文档重建基础段（清空增量段）
+
+        Args:
+            items: [(文档ID, 词项列表)]
+            signature: 数据快照标识
+        """
+        ensure_directory_exists(self.directory)
+        ids, rows = [], []
+        for doc_id, terms in items:
+            ids.append(doc_id)
+            rows.append(count_vector(terms, self.n_features))
+
+        with _file_lock(self._lock_path):
+            _, manifest = self._read_manifest()
+            self._write_base(
+                manifest,
+                np.asarray(ids, dtype=np.int64),
+                *_stack_rows(rows),
+                signature=signature
+            )
+        self.refresh()
+
+    def update(
+        self,
+        items: Iterable[Tuple[int, List[str]]],
+        removed_ids: Iterable[int] = (),
+        signature: Optional[Tuple] = None
+    ):
+        """
+        追加文档到增量段（已存在的ID先删除再追加），并删除指定文档
+
+        Args:
+            items: [(文档ID, 词项列表)]
+            removed_ids: 删除的文档ID
+            signature: 写入后的数据快照标识（None表示保持不变）
+        """
+        items = [(doc_id, count_vector(terms, self.n_features)) for doc_id, terms in items]
+        self._update(items, list(removed_ids), signature)
+
+    def _update(
+        self,
+        added: List[Tuple[int, Tuple[np.ndarray, np.ndarray]]],
+        removed: List[int],
+        signature: Optional[Tuple]
+    ):
+        """在文件锁内基于最新清单写出新的增量段"""
+        ensure_directory_exists(self.directory)
+
+        with _file_lock(self._lock_path):
+            self.refresh()
+            state, manifest = self._state, self._manifest
+
+            touched = np.asarray([doc_id for doc_id, _ in added] + removed, dtype=np.int64)
+
+            # 增量段中被替换或删除的行直接丢弃，基础段中的记为删除
+            keep = ~np.isin(state["delta_ids"], touched)
+            delta_matrix = state["delta_matrix"]
+            rows = [
+                (delta_matrix.indices[delta_matrix.indptr[i]:delta_matrix.indptr[i + 1]],
+                 delta_matrix.data[delta_matrix.indptr[i]:delta_matrix.indptr[i + 1]])
+                for i in np.flatnonzero(keep)
+            ]
+            rows.extend(row for _, row in added)
+            delta_ids = np.concatenate([
+                state["delta_ids"][keep],
+                np.asarray([doc_id for doc_id, _ in added], dtype=np.int64)
+            ])
+            deleted = np.union1d(
+                state["deleted"],
+                np.intersect1d(state["base_ids"], touched)
+            ).astype(np.int64)
+
+            if signature is None and manifest.get("signature") is not None:
+                signature = tuple(manifest["signature"])
+
+            base_rows = len(state["base_ids"])
+            if len(delta_ids) + len(deleted) >= max(self.min_compact_rows, base_rows * self.compact_ratio):
+                self._compact_locked(manifest, state, delta_ids, rows, deleted, signature)
+            else:
+                self._write_delta(manifest, delta_ids, *_stack_rows(rows), deleted, signature)
+
+        self.refresh()
+
+    def compact(self):
+        """将增量段合并进基础段"""
+        if not os.path.exists(self._manifest_path):
+            return
+
+        with _file_lock(self._lock_path):
+            self.refresh()
+            state, manifest = self._state, self._manifest
+            if len(state["delta_ids"]) == 0 and len(state["deleted"]) == 0:
+                return
+
+            delta_matrix = state["delta_matrix"]
+            rows = [
+                (delta_matrix.indices[delta_matrix.indptr[i]:delta_matrix.indptr[i + 1]],
+                 delta_matrix.data[delta_matrix.indptr[i]:delta_matrix.indptr[i + 1]])
+                for i in range(delta_matrix.shape[0])
+            ]
+            signature = manifest.get("signature")
+            self._compact_locked(
+                manifest, state, state["delta_ids"], rows, state["deleted"],
+                tuple(signature) if signature is not None else None
+            )
+
+        self.refresh()
+
+    def _compact_locked(
+        self,
+        manifest: Dict[str, Any],
+        state: Dict[str, Any],
+        delta_ids: np.ndarray,
+        delta_rows: List[Tuple[np.ndarray, np.ndarray]],
+        deleted: np.ndarray,
+        signature: Optional[Tuple]
+    ):
+        """合并基础段有效行与增量段，写出新的基础段"""
+        base_matrix = state["base_matrix"]
+        alive_rows = np.flatnonzero(~np.isin(state["base_ids"], deleted))
+        kept = base_matrix[alive_rows]
+
+        delta_indptr, delta_indices, delta_data = _stack_rows(delta_rows)
+        ids = np.concatenate([state["base_ids"][alive_rows], delta_ids]).astype(np.int64)
+        indptr = np.concatenate([kept.indptr[:-1], delta_indptr + kept.indptr[-1]]).astype(np.int64)
+        indices = np.concatenate([kept.indices, delta_indices]).astype(np.int32)
+        data = np.concatenate([kept.data, delta_data]).astype(np.float32)
+
+        self._write_base(manifest, ids, indptr, indices, data, signature=signature)
+
+    def _write_base(
+        self,
+        manifest: Dict[str, Any],
+        ids: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        signature: Optional[Tuple]
+    ):
+        """写出新一代基础段并切换清单（调用方持有文件锁）"""
+        generation = manifest.get("generation", -1) + 1
+        arrays = {
+            "ids": ids,
+            "indptr": indptr,
+            "indices": indices,
+            "data": data,
+            "df": np.bincount(indices, minlength=self.n_features).astype(np.int32)
+        }
+        for name, array in arrays.items():
+            path = self._base_path(generation, name)
+            with open(f"{path}.tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(f"{path}.tmp", path)
+
+        self._write_manifest({
+            "generation": generation,
+            "delta": None,
+            "sequence": manifest.get("sequence", 0),
+            "signature": list(signature) if signature is not None else None
+        })
+        self._cleanup(manifest)
+
+    def _write_delta(
+        self,
+        manifest: Dict[str, Any],
+        ids: np.ndarray,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        deleted: np.ndarray,
+        signature: Optional[Tuple]
+    ):
+        """写出新的增量段并切换清单（调用方持有文件锁）"""
+        generation = manifest.get("generation")
+        sequence = manifest.get("sequence", 0) + 1
+        path = self._delta_path(sequence)
+
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, ids=ids, indptr=indptr, indices=indices, data=data, deleted=deleted)
+        os.replace(f"{path}.tmp", path)
+
+        self._write_manifest({
+            "generation": generation,
+            "delta": os.path.basename(path),
+            "sequence": sequence,
+            "signature": list(signature) if signature is not None else None
+        })
+
+        if manifest.get("delta"):
+            self._remove_file(os.path.join(self.directory, manifest["delta"]))
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        """原子替换清单"""
+        tmp_path = f"{self._manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _cleanup(self, manifest: Dict[str, Any]):
+        """删除旧一代的基础段和增量段文件"""
+        if manifest.get("delta"):
+            self._remove_file(os.path.join(self.directory, manifest["delta"]))
+        if manifest.get("generation") is not None:
+            for name in _BASE_ARRAYS:
+                self._remove_file(self._base_path(manifest["generation"], name))
+
+    @staticmethod
+    def _remove_file(path: str):
+        """删除文件（Windows下仍被其他进程映射时跳过）"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
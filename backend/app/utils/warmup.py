@@ -0,0 +1,116 @@
+"""
+启动预热模块
+
+记录启动各阶段耗时；在后台预加载jieba词典（使用持久化的词典缓存文件）、
+打开全文索引并导入scikit-learn等较慢的模块，避免首个用户请求承担这部分开销。
+"""
+import os
+import time
+import asyncio
+import importlib
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import jieba
+
+from app.config import settings
+
+
+# 后台预导入的较慢模块（业务代码中均为按需导入）
+HEAVY_MODULES = [
+    "jieba.analyse"
+]
+
+
+class StartupTimings:
+    """启动阶段耗时记录"""
+
+    def __init__(self):
+        self._phases: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        记录一个阶段的耗时
+
+        Args:
+            name: 阶段名称
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        """
+        记录阶段耗时
+
+        Args:
+            name: 阶段名称
+            seconds: 耗时（秒）
+        """
+        self._phases[name] = seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        """各阶段耗时（毫秒）"""
+        return {name: round(seconds * 1000, 1) for name, seconds in self._phases.items()}
+
+    def summary(self) -> str:
+        """耗时摘要"""
+        return ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.as_dict().items())
+
+
+def jieba_cache_file() -> str:
+    """jieba词典缓存文件路径（默认放在索引目录下，容器重启后仍可复用）"""
+    return settings.JIEBA_CACHE_FILE or os.path.join(settings.INDEX_DATA_PATH, "jieba.cache")
+
+
+def configure_jieba():
+    """设置jieba词典缓存文件位置（需在首次分词前调用）"""
+    path = jieba_cache_file()
+    directory = os.path.dirname(os.path.abspath(path))
+    if os.path.isdir(directory):
+        jieba.dt.cache_file = os.path.basename(path)
+        jieba.dt.tmp_dir = directory
+
+
+def warm_up_jieba():
+    """加载jieba词典（已加载时直接返回，也用作进程池的初始化函数）"""
+    configure_jieba()
+    jieba.initialize()
+
+
+def _import_modules(modules: List[str]):
+    """导入模块"""
+    for name in modules:
+        importlib.import_module(name)
+
+
+async def warm_up(timings: Optional["StartupTimings"] = None):
+    """
+    后台预热：加载jieba词典、打开全文索引、导入较慢的模块
+
+    Args:
+        timings: 耗时记录（默认使用全局实例）
+    """
+    from app.utils.search_engine import search_engine
+
+    timings = timings or startup_timings
+    steps = [
+        ("预热jieba词典", warm_up_jieba),
+        ("打开全文索引", search_engine.open),
+        ("预导入模块", lambda: _import_modules(HEAVY_MODULES))
+    ]
+    for name, func in steps:
+        try:
+            with timings.phase(name):
+                await asyncio.to_thread(func)
+        except Exception as e:
+            print(f"❌ {name}失败: {str(e)}")
+
+    print(f"🔥 后台预热完成: {timings.summary()}")
+
+
+# 全局启动耗时记录
+startup_timings = StartupTimings()
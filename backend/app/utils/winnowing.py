@@ -0,0 +1,867 @@
+"""
+Winnowing指纹查重模块
+
+对归一化后的中文文本计算字符k-gram哈希，用滑动窗口取最小值（winnowing）
+选出文档指纹，建立 指纹 -> (文档, 偏移) 的倒排索引，据此计算重复字符覆盖率。
+长度不小于 window_size + kgram_size - 1 的重复片段保证会被检出。
+"""
+import os
+import heapq
+import threading
+from typing import List, Tuple, Dict, Any, Optional, Hashable, Iterable, Iterator, Callable
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# 默认参数：8字k-gram，窗口6，保证检出13字及以上的连续重复
+DEFAULT_KGRAM_SIZE = 8
+DEFAULT_WINDOW_SIZE = 6
+# 流式检测时每块的字符数
+DEFAULT_STREAM_CHUNK_CHARS = 20000
+
+# 多项式滚动哈希的基数
+_HASH_BASE = np.uint64(1000003)
+
+
+def normalize_text(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    文本归一化：全角转半角、英文转小写，只保留汉字、字母和数字
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        (归一化后的字符码点数组, 每个字符在原文中的位置)
+    """
+    if not text:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int64)
+
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).copy()
+
+    # 全角ASCII（！到～）转半角，全角空格转半角空格
+    fullwidth = (codes >= 0xFF01) & (codes <= 0xFF5E)
+    codes[fullwidth] -= 0xFEE0
+    codes[codes == 0x3000] = 0x20
+
+    # 英文大写转小写
+    upper = (codes >= 0x41) & (codes <= 0x5A)
+    codes[upper] += 0x20
+
+    keep = (
+        ((codes >= 0x30) & (codes <= 0x39))
+        | ((codes >= 0x61) & (codes <= 0x7A))
+        | ((codes >= 0x4E00) & (codes <= 0x9FFF))
+        | ((codes >= 0x3400) & (codes <= 0x4DBF))
+        | ((codes >= 0xF900) & (codes <= 0xFAFF))
+    )
+    offsets = np.flatnonzero(keep)
+
+    return codes[offsets], offsets
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64终结函数，使哈希值分布均匀"""
+    z = values.copy()
+    with np.errstate(over="ignore"):
+        z ^= z >> np.uint64(30)
+        z *= np.uint64(0xBF58476D1CE4E5B9)
+        z ^= z >> np.uint64(27)
+        z *= np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+    return z
+
+
+def kgram_hashes(codes: np.ndarray, kgram_size: int = DEFAULT_KGRAM_SIZE) -> np.ndarray:
+    """
+    计算所有字符k-gram的64位哈希
+
+    Args:
+        codes: 归一化字符码点数组
+        kgram_size: k-gram长度
+
+    Returns:
+        哈希数组，长度为 len(codes) - kgram_size + 1
+    """
+    if len(codes) < kgram_size:
+        return np.empty(0, dtype=np.uint64)
+
+    powers = np.ones(kgram_size, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for i in range(kgram_size - 2, -1, -1):
+            powers[i] = powers[i + 1] * _HASH_BASE
+        windows = sliding_window_view(codes.astype(np.uint64), kgram_size)
+        hashes = windows @ powers
+
+    return _mix64(hashes)
+
+
+def winnow(hashes: np.ndarray, window_size: int = DEFAULT_WINDOW_SIZE) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Winnowing选取指纹：每个窗口取最小哈希（相同时取最右），相邻窗口选中同一位置只记一次
+
+    Args:
+        hashes: k-gram哈希数组
+        window_size: 窗口大小（k-gram个数）
+
+    Returns:
+        (指纹哈希数组, 指纹对应的k-gram起始位置数组)
+    """
+    if len(hashes) == 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+    if len(hashes) <= window_size:
+        positions = np.asarray([len(hashes) - 1 - np.argmin(hashes[::-1])], dtype=np.int64)
+        return hashes[positions], positions
+
+    windows = sliding_window_view(hashes, window_size)
+    rightmost = window_size - 1 - np.argmin(windows[:, ::-1], axis=1)
+    positions = np.arange(len(windows), dtype=np.int64) + rightmost
+
+    keep = np.ones(len(positions), dtype=bool)
+    keep[1:] = positions[1:] != positions[:-1]
+    positions = positions[keep]
+
+    return hashes[positions], positions
+
+
+def fingerprint_text(
+    text: str,
+    kgram_size: int = DEFAULT_KGRAM_SIZE,
+    window_size: int = DEFAULT_WINDOW_SIZE
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    计算文本指纹
+
+    Args:
+        text: 原始文本
+        kgram_size: k-gram长度
+        window_size: 窗口大小
+
+    Returns:
+        (指纹哈希, 指纹在归一化文本中的位置, 归一化字符到原文的位置映射)
+    """
+    codes, offsets = normalize_text(text)
+    hashes, positions = winnow(kgram_hashes(codes, kgram_size), window_size)
+    return hashes, positions, offsets
+
+
+def _coverage_mask(
+    starts: np.ndarray,
+    diagonals: np.ndarray,
+    docs: np.ndarray,
+    kgram_size: int,
+    window_size: int,
+    total: int
+) -> np.ndarray:
+    """
+    将命中指纹对应的k-gram合并为覆盖掩码
+
+    连续重复片段中相邻指纹的间距不超过窗口大小。只有两个命中来自同一来源文档、
+    位于同一对角线（来源偏移 - 本文位置 相同，即在来源中也是连续的同一段文字）且间距
+    不超过窗口大小时，才把它们之间的字符视为重复；两段独立的抄袭片段之间的原创文字不计入。
+
+    Args:
+        starts: 命中k-gram在本文中的起点
+        diagonals: 命中k-gram的来源偏移减本文起点
+        docs: 命中的来源文档
+        kgram_size: k-gram长度
+        window_size: winnowing窗口大小
+        total: 本文归一化字符数
+    """
+    order = np.lexsort((starts, diagonals, docs))
+    starts, diagonals, docs = starts[order], diagonals[order], docs[order]
+    ends = starts + kgram_size
+    if len(starts) > 1:
+        gaps = starts[1:] - starts[:-1]
+        bridged = (docs[1:] == docs[:-1]) & (diagonals[1:] == diagonals[:-1]) & (gaps <= window_size)
+        ends[:-1][bridged] = np.maximum(ends[:-1][bridged], starts[1:][bridged] + kgram_size)
+
+    delta = np.zeros(total + 1, dtype=np.int32)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, np.minimum(ends, total), -1)
+    return np.cumsum(delta[:-1]) > 0
+
+
+def _mask_runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """掩码中连续为True的区间 [(start, end)]"""
+    if not mask.any():
+        return []
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+
+
+def match_coverage(
+    hashes: np.ndarray,
+    positions: np.ndarray,
+    length: int,
+    other_hashes: np.ndarray,
+    other_positions: np.ndarray,
+    kgram_size: int = DEFAULT_KGRAM_SIZE,
+    window_size: int = DEFAULT_WINDOW_SIZE
+) -> int:
+    """
+    计算文档被另一文档指纹覆盖的字符数
+
+    Args:
+        hashes: 文档指纹哈希
+        positions: 文档指纹位置
+        length: 文档归一化长度
+        other_hashes: 另一文档的指纹哈希
+        other_positions: 另一文档的指纹位置
+        kgram_size: k-gram长度
+        window_size: winnowing窗口大小
+
+    Returns:
+        重复字符数
+    """
+    if length == 0 or len(hashes) == 0 or len(other_hashes) == 0:
+        return 0
+
+    # 展开所有相同哈希的 (本文位置, 另一文档位置) 命中对
+    order = np.argsort(other_hashes, kind="stable")
+    sorted_hashes = other_hashes[order]
+    lo = np.searchsorted(sorted_hashes, hashes, side="left")
+    counts = np.searchsorted(sorted_hashes, hashes, side="right") - lo
+    total = int(counts.sum())
+    if total == 0:
+        return 0
+
+    query_idx = np.repeat(np.arange(len(hashes)), counts)
+    other_idx = order[np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(total)]
+    starts = positions[query_idx].astype(np.int64)
+    diagonals = other_positions[other_idx].astype(np.int64) - starts
+    docs = np.zeros(total, dtype=np.int32)
+    return int(_coverage_mask(starts, diagonals, docs, kgram_size, window_size, length).sum())
+
+
+class FingerprintIndex:
+    """
+    指纹倒排索引：指纹哈希 -> (文档, 偏移)
+
+    倒排表以按哈希排序的NumPy数组保存，查询用二分查找批量定位；
+    新文档先进入增量区，超过阈值后合并；删除使用墓碑标记。
+    """
+
+    def __init__(
+        self,
+        kgram_size: int = DEFAULT_KGRAM_SIZE,
+        window_size: int = DEFAULT_WINDOW_SIZE
+    ):
+        """
+        Args:
+            kgram_size: k-gram长度
+            window_size: winnowing窗口大小
+        """
+        self.kgram_size = kgram_size
+        self.window_size = window_size
+
+        self._lock = threading.RLock()
+        self._doc_keys: List[Hashable] = []
+        self._key_to_doc: Dict[Hashable, int] = {}
+        self._doc_alive: List[bool] = []
+        self._doc_lengths: List[int] = []
+
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._docs = np.empty(0, dtype=np.int32)
+        self._offsets = np.empty(0, dtype=np.int32)
+        self._pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._pending_size = 0
+
+    def __len__(self) -> int:
+        return len(self._key_to_doc)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._key_to_doc
+
+    def keys(self) -> List[Hashable]:
+        """索引中全部文档键"""
+        with self._lock:
+            return list(self._key_to_doc.keys())
+
+    @property
+    def posting_count(self) -> int:
+        """倒排表条目数（含增量区）"""
+        return len(self._hashes) + self._pending_size
+
+    def add_document(self, key: Hashable, text: str) -> int:
+        """
+        添加文档（已存在则替换）
+
+        Args:
+            key: 文档键
+            text: 文档全文
+
+        Returns:
+            文档指纹数量
+        """
+        hashes, positions, offsets = fingerprint_text(text, self.kgram_size, self.window_size)
+        self.add_fingerprints(key, hashes, positions, len(offsets))
+        return len(hashes)
+
+    def add_fingerprints(self, key: Hashable, hashes: np.ndarray, positions: np.ndarray, length: int):
+        """
+        直接添加已计算好的文档指纹
+
+        Args:
+            key: 文档键
+            hashes: 指纹哈希
+            positions: 指纹位置
+            length: 归一化文本长度
+        """
+        with self._lock:
+            self._remove_locked(key)
+
+            doc = len(self._doc_keys)
+            self._doc_keys.append(key)
+            self._key_to_doc[key] = doc
+            self._doc_alive.append(True)
+            self._doc_lengths.append(length)
+
+            if len(hashes):
+                self._pending.append((
+                    hashes.astype(np.uint64),
+                    np.full(len(hashes), doc, dtype=np.int32),
+                    positions.astype(np.int32)
+                ))
+                self._pending_size += len(hashes)
+
+            if self._pending_size > max(65536, len(self._hashes) // 10):
+                self._merge_locked()
+
+    def remove_document(self, key: Hashable) -> bool:
+        """
+        删除文档
+
+        Args:
+            key: 文档键
+
+        Returns:
+            是否存在并删除
+        """
+        with self._lock:
+            return self._remove_locked(key)
+
+    def _remove_locked(self, key: Hashable) -> bool:
+        doc = self._key_to_doc.pop(key, None)
+        if doc is None:
+            return False
+        self._doc_alive[doc] = False
+        return True
+
+    def _merge_locked(self, compact: bool = False):
+        """合并增量区；compact为True时同时清理已删除文档的倒排条目"""
+        parts = [(self._hashes, self._docs, self._offsets)] + self._pending
+        hashes = np.concatenate([p[0] for p in parts])
+        docs = np.concatenate([p[1] for p in parts])
+        offsets = np.concatenate([p[2] for p in parts])
+
+        if compact and len(docs):
+            alive = np.asarray(self._doc_alive, dtype=bool)[docs]
+            hashes, docs, offsets = hashes[alive], docs[alive], offsets[alive]
+
+        order = np.argsort(hashes, kind="stable")
+        self._hashes = hashes[order]
+        self._docs = docs[order]
+        self._offsets = offsets[order]
+        self._pending = []
+        self._pending_size = 0
+
+    def compact(self):
+        """合并增量区并清理已删除文档"""
+        with self._lock:
+            self._merge_locked(compact=True)
+
+    def save(self, path: str):
+        """
+        持久化到磁盘（原子替换），文档键需为字符串
+
+        Args:
+            path: 文件路径（.npz）
+        """
+        with self._lock:
+            self._merge_locked(compact=True)
+            alive_docs = [doc for doc, alive in enumerate(self._doc_alive) if alive]
+            # 重新编号，去掉已删除文档
+            remap = np.full(len(self._doc_keys), -1, dtype=np.int32)
+            remap[alive_docs] = np.arange(len(alive_docs), dtype=np.int32)
+            keys = np.asarray([str(self._doc_keys[doc]) for doc in alive_docs], dtype=str)
+            lengths = np.asarray([self._doc_lengths[doc] for doc in alive_docs], dtype=np.int64)
+            hashes, docs, offsets = self._hashes, remap[self._docs], self._offsets
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                hashes=hashes,
+                docs=docs,
+                offsets=offsets,
+                keys=keys,
+                lengths=lengths,
+                params=np.asarray([self.kgram_size, self.window_size], dtype=np.int64)
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str) -> bool:
+        """
+        从磁盘加载
+
+        Args:
+            path: 文件路径（.npz）
+
+        Returns:
+            是否加载成功（参数不一致时视为失败）
+        """
+        if not os.path.exists(path):
+            return False
+
+        try:
+            with np.load(path) as data:
+                if data["params"].tolist() != [self.kgram_size, self.window_size]:
+                    return False
+                hashes = data["hashes"]
+                docs = data["docs"]
+                offsets = data["offsets"]
+                keys = data["keys"].tolist()
+                lengths = data["lengths"].tolist()
+        except (OSError, KeyError, ValueError):
+            return False
+
+        with self._lock:
+            self._doc_keys = keys
+            self._key_to_doc = {key: doc for doc, key in enumerate(keys)}
+            self._doc_alive = [True] * len(keys)
+            self._doc_lengths = lengths
+            self._hashes = hashes.astype(np.uint64)
+            self._docs = docs.astype(np.int32)
+            self._offsets = offsets.astype(np.int32)
+            self._pending = []
+            self._pending_size = 0
+
+        return True
+
+    def lookup(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        批量查询指纹
+
+        Args:
+            hashes: 查询指纹哈希数组
+
+        Returns:
+            (查询指纹下标, 命中文档, 命中偏移) 三个等长数组
+        """
+        with self._lock:
+            if self._pending:
+                self._merge_locked()
+
+            lo = np.searchsorted(self._hashes, hashes, side="left")
+            hi = np.searchsorted(self._hashes, hashes, side="right")
+            counts = hi - lo
+            total = int(counts.sum())
+            if total == 0:
+                empty = np.empty(0, dtype=np.int64)
+                return empty, empty.astype(np.int32), empty.astype(np.int32)
+
+            # 将每个命中区间 [lo, hi) 展开为倒排表下标
+            query_idx = np.repeat(np.arange(len(hashes)), counts)
+            starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+            posting_idx = starts + np.arange(total)
+
+            docs = self._docs[posting_idx]
+            offsets = self._offsets[posting_idx]
+            alive = np.asarray(self._doc_alive, dtype=bool)[docs]
+
+            return query_idx[alive], docs[alive], offsets[alive]
+
+    def report(
+        self,
+        text: str,
+        exclude: Optional[Iterable[Hashable]] = None,
+        max_spans: int = 50,
+        max_sources: int = 10
+    ) -> Dict[str, Any]:
+        """
+        计算文本相对索引内文档的重复情况
+
+        Args:
+            text: 待检测文本
+            exclude: 需要排除的文档键（如待检测论文自身）
+            max_spans: 最多返回的重复片段数
+            max_sources: 最多返回的来源文档数
+
+        Returns:
+            {
+                "duplicate_rate": 重复字符覆盖率 (0-100),
+                "matched_chars": 重复字符数,
+                "total_chars": 归一化后总字符数,
+                "sources": [{"key", "matched_chars", "similarity"}],
+                "spans": [{"start", "end", "text", "sources"}]
+            }
+        """
+        hashes, positions, offsets = fingerprint_text(text, self.kgram_size, self.window_size)
+        return self.report_fingerprints(text, hashes, positions, offsets, exclude, max_spans, max_sources)
+
+    def report_stream(
+        self,
+        paragraphs: Iterable[str],
+        exclude: Optional[Iterable[Hashable]] = None,
+        max_spans: int = 50,
+        max_sources: int = 10,
+        chunk_chars: int = DEFAULT_STREAM_CHUNK_CHARS,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        流式计算段落序列的重复情况，内存占用与文档长度无关
+
+        Args:
+            paragraphs: 段落迭代器（可为生成器）
+            exclude: 需要排除的文档键
+            max_spans: 最多返回的重复片段数
+            max_sources: 最多返回的来源文档数
+            chunk_chars: 每块字符数
+            progress: 进度回调，参数为已处理的原文字符数
+
+        Returns:
+            格式与 report 一致，位置对应 "\\n".join(paragraphs)
+        """
+        stream = DuplicateStream(self, exclude, max_spans, max_sources)
+        for chunk in iter_paragraph_chunks(paragraphs, chunk_chars):
+            stream.feed(chunk)
+            if progress:
+                progress(stream.processed_chars)
+        return stream.finish()
+
+    def report_fingerprints(
+        self,
+        text: str,
+        hashes: np.ndarray,
+        positions: np.ndarray,
+        offsets: np.ndarray,
+        exclude: Optional[Iterable[Hashable]] = None,
+        max_spans: int = 50,
+        max_sources: int = 10
+    ) -> Dict[str, Any]:
+        """
+        基于已计算的指纹生成重复报告，参数和返回值见 report
+        """
+        total_chars = len(offsets)
+        empty_report = {
+            "duplicate_rate": 0.0,
+            "matched_chars": 0,
+            "total_chars": total_chars,
+            "sources": [],
+            "spans": []
+        }
+        if total_chars == 0 or len(hashes) == 0:
+            return empty_report
+
+        query_idx, docs, source_offsets = self.lookup(hashes)
+
+        if exclude:
+            with self._lock:
+                excluded = [self._key_to_doc[k] for k in exclude if k in self._key_to_doc]
+            if excluded:
+                keep = ~np.isin(docs, excluded)
+                query_idx, docs, source_offsets = query_idx[keep], docs[keep], source_offsets[keep]
+
+        if len(query_idx) == 0:
+            return empty_report
+
+        starts = positions[query_idx].astype(np.int64)
+        diagonals = source_offsets.astype(np.int64) - starts
+        mask = _coverage_mask(starts, diagonals, docs, self.kgram_size, self.window_size, total_chars)
+        matched_chars = int(mask.sum())
+
+        # 各来源文档的覆盖率
+        sources = []
+        unique_docs, doc_counts = np.unique(docs, return_counts=True)
+        for doc in unique_docs[np.argsort(-doc_counts)][:max_sources * 3]:
+            in_doc = docs == doc
+            doc_mask = _coverage_mask(
+                starts[in_doc], diagonals[in_doc], docs[in_doc], self.kgram_size, self.window_size, total_chars
+            )
+            doc_chars = int(doc_mask.sum())
+            sources.append({
+                "key": self._doc_keys[doc],
+                "matched_chars": doc_chars,
+                "similarity": doc_chars / total_chars * 100
+            })
+        sources.sort(key=lambda x: x["matched_chars"], reverse=True)
+        sources = sources[:max_sources]
+
+        # 重复片段（映射回原文位置）
+        spans = []
+        for start, end in sorted(_mask_runs(mask), key=lambda r: r[0] - r[1])[:max_spans]:
+            in_span = (starts >= start) & (starts < end)
+            orig_start = int(offsets[start])
+            orig_end = int(offsets[end - 1]) + 1
+            spans.append({
+                "start": orig_start,
+                "end": orig_end,
+                "text": text[orig_start:orig_end],
+                "sources": [self._doc_keys[d] for d in np.unique(docs[in_span]).tolist()]
+            })
+        spans.sort(key=lambda x: x["start"])
+
+        return {
+            "duplicate_rate": matched_chars / total_chars * 100,
+            "matched_chars": matched_chars,
+            "total_chars": total_chars,
+            "sources": sources,
+            "spans": spans
+        }
+
+
+def iter_paragraph_chunks(paragraphs: Iterable[str], max_chars: int) -> Iterator[List[str]]:
+    """
+    将段落流按字符数分块
+
+    Args:
+        paragraphs: 段落迭代器
+        max_chars: 每块的目标字符数（单个超长段落独占一块）
+
+    Yields:
+        段落列表
+    """
+    chunk, size = [], 0
+    for paragraph in paragraphs:
+        paragraph = paragraph or ""
+        if chunk and size + len(paragraph) > max_chars:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(paragraph)
+        size += len(paragraph) + 1
+    if chunk:
+        yield chunk
+
+
+class DuplicateStream:
+    """
+    流式重复检测
+
+    按段落分块逐块计算指纹、查询倒排索引并累计覆盖字符数，内存占用只与分块大小有关：
+    相邻分块之间保留 kgram_size + window_size - 2 个字符，使每个winnowing窗口恰好计算一次，
+    覆盖掩码滞后 kgram_size + 2 * window_size 个字符定稿，结果与整篇计算一致。
+    段落之间按换行连接，结果中的位置与 "\\n".join(paragraphs) 一致。
+    """
+
+    def __init__(
+        self,
+        index: "FingerprintIndex",
+        exclude: Optional[Iterable[Hashable]] = None,
+        max_spans: int = 50,
+        max_sources: int = 10
+    ):
+        """
+        Args:
+            index: 指纹倒排索引
+            exclude: 需要排除的文档键
+            max_spans: 最多返回的重复片段数（保留最长的片段）
+            max_sources: 最多返回的来源文档数
+        """
+        self.index = index
+        self.kgram_size = index.kgram_size
+        self.window_size = index.window_size
+        self.max_spans = max_spans
+        self.max_sources = max_sources
+
+        with index._lock:
+            self._excluded = [index._key_to_doc[k] for k in (exclude or []) if k in index._key_to_doc]
+
+        # 已读入的原文字符数和归一化字符数
+        self.processed_chars = 0
+        self._total = 0
+        self._carry = np.empty(0, dtype=np.uint32)
+
+        # 未定稿区域 [_final, _total) 的原文位置映射，以及从 _text_base 开始的原文
+        self._hashed = False
+        # 新分块的命中最多影响其起点之前 kgram_size + 2 * window_size 个字符内的覆盖结果
+        self._lag = self.kgram_size + 2 * self.window_size
+
+        self._final = 0
+        self._tail_offsets = np.empty(0, dtype=np.int64)
+        self._text_tail = ""
+        self._text_base = 0
+
+        # 可能影响未定稿区域的命中k-gram起点
+        self._tail_starts = np.empty(0, dtype=np.int64)
+        self._tail_diagonals = np.empty(0, dtype=np.int64)
+        self._tail_docs = np.empty(0, dtype=np.int32)
+
+        self._matched_chars = 0
+        self._doc_matched: Dict[int, int] = {}
+        self._open_span: Optional[Dict[str, Any]] = None
+        self._spans: List[Tuple[int, int, Dict[str, Any]]] = []
+        self._span_seq = 0
+
+    def feed(self, paragraphs: List[str]):
+        """
+        处理一块连续段落
+
+        Args:
+            paragraphs: 段落列表
+        """
+        text = "\n".join(paragraphs)
+        if self.processed_chars:
+            text = "\n" + text
+
+        codes, offsets = normalize_text(text)
+        self._tail_offsets = np.concatenate([self._tail_offsets, offsets + self.processed_chars])
+        self._text_tail += text
+        self.processed_chars += len(text)
+
+        # 拼接上一块末尾的 kgram_size + window_size - 2 个字符，使跨块的每个winnowing窗口恰好计算一次
+        new_chars = len(codes)
+        codes = np.concatenate([self._carry, codes])
+        base = self._total - len(self._carry)
+        self._total += new_chars
+
+        if not self._hashed and len(codes) < self.kgram_size + self.window_size - 1:
+            # 还不够一个完整窗口，留待后续分块或结束时处理
+            self._carry = codes
+            return
+        if new_chars:
+            self._process(codes, base)
+            self._carry = codes[-(self.kgram_size + self.window_size - 2):]
+
+        self._finalize(self._total - self._lag)
+
+    def _process(self, codes: np.ndarray, base: int):
+        """计算一段归一化字符的指纹并查询索引，记录命中的k-gram起点"""
+        self._hashed = True
+        hashes, positions = winnow(kgram_hashes(codes, self.kgram_size), self.window_size)
+        if len(hashes) == 0:
+            return
+
+        query_idx, docs, source_offsets = self.index.lookup(hashes)
+        if self._excluded:
+            keep = ~np.isin(docs, self._excluded)
+            query_idx, docs, source_offsets = query_idx[keep], docs[keep], source_offsets[keep]
+        starts = positions[query_idx].astype(np.int64) + base
+        self._tail_starts = np.concatenate([self._tail_starts, starts])
+        self._tail_diagonals = np.concatenate([self._tail_diagonals, source_offsets.astype(np.int64) - starts])
+        self._tail_docs = np.concatenate([self._tail_docs, docs.astype(np.int32)])
+
+    def _finalize(self, end: int):
+        """将 [_final, end) 区域的覆盖结果定稿"""
+        if end <= self._final:
+            return
+
+        lag = self._lag
+        region_base = max(0, self._final - lag)
+        region_size = self._total - region_base
+        lo, hi = self._final - region_base, end - region_base
+
+        starts = self._tail_starts - region_base
+        if len(starts):
+            diagonals, docs = self._tail_diagonals, self._tail_docs
+            mask = _coverage_mask(
+                starts, diagonals, docs, self.kgram_size, self.window_size, region_size
+            )[lo:hi]
+            self._matched_chars += int(mask.sum())
+            for doc in np.unique(docs).tolist():
+                in_doc = docs == doc
+                doc_mask = _coverage_mask(
+                    starts[in_doc], diagonals[in_doc], docs[in_doc], self.kgram_size, self.window_size, region_size
+                )[lo:hi]
+                covered = int(doc_mask.sum())
+                if covered:
+                    self._doc_matched[doc] = self._doc_matched.get(doc, 0) + covered
+        else:
+            mask = np.zeros(hi - lo, dtype=bool)
+
+        self._collect_spans(mask, end)
+
+        # 丢弃已定稿区域的状态
+        keep = self._tail_starts >= end - lag
+        self._tail_starts, self._tail_docs = self._tail_starts[keep], self._tail_docs[keep]
+        self._tail_diagonals = self._tail_diagonals[keep]
+        text_start = int(self._tail_offsets[end - self._final - 1]) + 1
+        self._text_tail = self._text_tail[text_start - self._text_base:]
+        self._text_base = text_start
+        self._tail_offsets = self._tail_offsets[end - self._final:]
+        self._final = end
+
+    def _collect_spans(self, mask: np.ndarray, end: int):
+        """提取定稿区域中的重复片段，跨区域的片段保持打开状态"""
+        offsets = self._tail_offsets
+        runs = _mask_runs(mask)
+
+        if self._open_span is not None and (not runs or runs[0][0] != 0):
+            self._close_span()
+
+        for run_start, run_end in runs:
+            orig_end = int(offsets[run_end - 1]) + 1
+            if run_start == 0 and self._open_span is not None:
+                piece_start = self._text_base
+            else:
+                piece_start = int(offsets[run_start])
+                self._open_span = {"start": piece_start, "pieces": [], "docs": set()}
+
+            self._open_span["pieces"].append(
+                self._text_tail[piece_start - self._text_base:orig_end - self._text_base]
+            )
+            self._open_span["end"] = orig_end
+
+            global_start, global_end = run_start + self._final, run_end + self._final
+            in_run = (self._tail_starts >= global_start) & (self._tail_starts < global_end)
+            self._open_span["docs"].update(np.unique(self._tail_docs[in_run]).tolist())
+
+            if run_end < len(mask) or end >= self._total:
+                self._close_span()
+
+    def _close_span(self):
+        """结束当前片段，只保留最长的 max_spans 个"""
+        span = self._open_span
+        self._open_span = None
+        length = span["end"] - span["start"]
+        self._span_seq += 1
+        entry = (length, -self._span_seq, span)
+        if len(self._spans) < self.max_spans:
+            heapq.heappush(self._spans, entry)
+        elif self._spans and entry > self._spans[0]:
+            heapq.heapreplace(self._spans, entry)
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        结束流式处理并生成报告
+
+        Returns:
+            格式与 FingerprintIndex.report 一致
+        """
+        if not self._hashed:
+            # 全文不足一个完整窗口
+            self._process(self._carry, 0)
+        self._finalize(self._total)
+        if self._open_span is not None:
+            self._close_span()
+
+        total_chars = self._total
+        doc_keys = self.index._doc_keys
+
+        sources = [
+            {
+                "key": doc_keys[doc],
+                "matched_chars": chars,
+                "similarity": chars / total_chars * 100
+            }
+            for doc, chars in sorted(self._doc_matched.items(), key=lambda x: x[1], reverse=True)
+        ][:self.max_sources]
+
+        spans = [
+            {
+                "start": span["start"],
+                "end": span["end"],
+                "text": "".join(span["pieces"]),
+                "sources": [doc_keys[d] for d in sorted(span["docs"])]
+            }
+            for _, _, span in sorted(self._spans, key=lambda x: x[2]["start"])
+        ]
+
+        return {
+            "duplicate_rate": self._matched_chars / total_chars * 100 if total_chars else 0.0,
+            "matched_chars": self._matched_chars,
+            "total_chars": total_chars,
+            "sources": sources,
+            "spans": spans
+        }
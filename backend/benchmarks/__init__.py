@@ -0,0 +1,3 @@
+"""
+相似度模块基准测试
+"""
@@ -0,0 +1,88 @@
+"""
+对比两次基准测试结果
+
+在 backend 目录下执行：
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json --threshold 10
+
+按 (函数, 语料规模) 对齐两份结果，p50延迟变慢或峰值内存增长超过阈值时视为回退，
+存在回退时以非零状态码退出，便于在CI中使用。
+"""
+import sys
+import json
+import argparse
+from typing import Dict, Any, List, Tuple
+
+
+def load_results(path: str) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """读取结果文件，按 (函数, 语料规模) 建立索引"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {(item["function"], item["size"]): item for item in data["results"]}
+
+
+def _change(old: float, new: float) -> float:
+    """相对变化百分比"""
+    return (new - old) / old * 100 if old else 0.0
+
+
+def compare(
+    baseline: Dict[Tuple[str, int], Dict[str, Any]],
+    current: Dict[Tuple[str, int], Dict[str, Any]],
+    threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    对比两份结果
+
+    Args:
+        baseline: 基准结果
+        current: 当前结果
+        threshold: 回退阈值（%）
+
+    Returns:
+        每个共同用例的对比信息
+    """
+    rows = []
+    for key in sorted(set(baseline) & set(current)):
+        old, new = baseline[key], current[key]
+        p50_change = _change(old["latency_ms"]["p50"], new["latency_ms"]["p50"])
+        p99_change = _change(old["latency_ms"]["p99"], new["latency_ms"]["p99"])
+        memory_change = _change(old["peak_memory_mb"], new["peak_memory_mb"])
+        rows.append({
+            "function": key[0],
+            "size": key[1],
+            "p50_old": old["latency_ms"]["p50"],
+            "p50_new": new["latency_ms"]["p50"],
+            "p50_change": p50_change,
+            "p99_change": p99_change,
+            "memory_change": memory_change,
+            "regression": p50_change > threshold or memory_change > threshold
+        })
+    return rows
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="对比两次基准测试结果")
+    parser.add_argument("baseline", help="基准结果文件")
+    parser.add_argument("current", help="当前结果文件")
+    parser.add_argument("--threshold", type=float, default=10.0, help="回退阈值（%%）")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+    if not rows:
+        print("两份结果没有共同的用例")
+        return
+
+    for row in rows:
+        flag = "⚠️ 回退" if row["regression"] else ""
+        print(
+            f"{row['function']:<28} size={row['size']:<7} "
+            f"p50 {row['p50_old']:.2f}ms -> {row['p50_new']:.2f}ms ({row['p50_change']:+.1f}%) "
+            f"p99 {row['p99_change']:+.1f}% 内存 {row['memory_change']:+.1f}% {flag}"
+        )
+
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
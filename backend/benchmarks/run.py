@@ -0,0 +1,214 @@
+"""
+相似度模块基准测试
+
+在 backend 目录下执行：
+    python -m benchmarks.run --sizes 1000 10000 100000 --repeat 20
+    python -m benchmarks.run --functions find_similar_titles --sizes 500000 --max-seconds 60
+    python -m benchmarks.run --similarity-mode hashing
+
+每个函数、每种语料规模输出延迟分位数、吞吐量和峰值内存，结果保存为JSON，
+可用 python -m benchmarks.compare 对比两个版本的结果。
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Tuple
+import numpy as np
+
+from app.config import settings
+from app.utils.similarity import (
+    find_similar_titles,
+    calculate_batch_similarity,
+    calculate_duplicate_rate,
+    extract_keywords
+)
+from app.utils.tokenizer import token_cache
+from benchmarks.corpus import CorpusGenerator
+
+
+DEFAULT_SIZES = [1000, 10000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# 用例构造函数：(生成器, 语料规模, 参数) -> (单次调用函数, 每次调用处理的条目数)
+CaseFactory = Callable[[CorpusGenerator, int, argparse.Namespace], Tuple[Callable[[int], Any], int]]
+
+
+def case_find_similar_titles(generator: CorpusGenerator, size: int, args: argparse.Namespace):
+    """查询标题与 size 个已有标题比较"""
+    titles = [{"id": i, "title": title} for i, title in enumerate(generator.titles(size))]
+    queries = CorpusGenerator(generator.seed + 1).titles(50)
+    return lambda i: find_similar_titles(queries[i % len(queries)], titles, threshold=0.7), size
+
+
+def case_calculate_batch_similarity(generator: CorpusGenerator, size: int, args: argparse.Namespace):
+    """查询段落与 size 个段落批量计算相似度"""
+    paragraphs = generator.paragraphs(size)
+    queries = CorpusGenerator(generator.seed + 1).paragraphs(50)
+    return lambda i: calculate_batch_similarity(queries[i % len(queries)], paragraphs), size
+
+
+def case_calculate_duplicate_rate(generator: CorpusGenerator, size: int, args: argparse.Namespace):
+    """一篇论文与 size 个参考段落计算重复率"""
+    paragraphs = generator.paragraphs(size)
+    document = generator.document(paragraphs, args.doc_paragraphs)
+    return lambda i: calculate_duplicate_rate(document, paragraphs), size
+
+
+def case_extract_keywords(generator: CorpusGenerator, size: int, args: argparse.Namespace):
+    """从 size 个段落组成的文本中提取关键词"""
+    paragraphs = generator.paragraphs(size)
+    text = "\n".join(paragraphs)
+    return lambda i: extract_keywords(text), size
+
+
+CASES: Dict[str, CaseFactory] = {
+    "find_similar_titles": case_find_similar_titles,
+    "calculate_batch_similarity": case_calculate_batch_similarity,
+    "calculate_duplicate_rate": case_calculate_duplicate_rate,
+    "extract_keywords": case_extract_keywords
+}
+
+
+def run_case(
+    name: str,
+    factory: CaseFactory,
+    generator: CorpusGenerator,
+    size: int,
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    """
+    执行一个用例：预热、计时、测量峰值内存
+
+    Args:
+        name: 函数名称
+        factory: 用例构造函数
+        generator: 语料生成器
+        size: 语料规模
+        args: 命令行参数
+
+    Returns:
+        用例结果
+    """
+    call, items = factory(generator, size, args)
+
+    for i in range(args.warmup):
+        call(i)
+
+    latencies = []
+    budget_start = time.perf_counter()
+    for i in range(args.repeat):
+        if args.cold_cache:
+            token_cache.clear()
+        start = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - start)
+        if time.perf_counter() - budget_start > args.max_seconds:
+            break
+
+    # 峰值内存单独测量一次，避免tracemalloc的开销影响计时
+    if args.cold_cache:
+        token_cache.clear()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    call(0)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies_ms = np.asarray(latencies) * 1000
+    total_seconds = float(np.sum(latencies))
+
+    return {
+        "function": name,
+        "size": size,
+        "calls": len(latencies),
+        "latency_ms": {
+            "mean": float(latencies_ms.mean()),
+            "min": float(latencies_ms.min()),
+            "p50": float(np.percentile(latencies_ms, 50)),
+            "p90": float(np.percentile(latencies_ms, 90)),
+            "p99": float(np.percentile(latencies_ms, 99)),
+            "max": float(latencies_ms.max())
+        },
+        "throughput": {
+            "calls_per_second": len(latencies) / total_seconds if total_seconds else 0.0,
+            "items_per_second": len(latencies) * items / total_seconds if total_seconds else 0.0
+        },
+        "peak_memory_mb": peak / 1024 / 1024
+    }
+
+
+def _git_revision() -> str:
+    """当前代码版本（非git环境返回空字符串）"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="相似度模块基准测试")
+    parser.add_argument("--functions", nargs="+", choices=list(CASES), default=list(CASES), help="要测试的函数")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="语料规模（1000 - 500000）")
+    parser.add_argument("--repeat", type=int, default=20, help="每个用例的计时调用次数")
+    parser.add_argument("--warmup", type=int, default=1, help="每个用例的预热调用次数")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="每个用例的计时时间上限（秒）")
+    parser.add_argument("--doc-paragraphs", type=int, default=60, help="重复率用例中待检测论文的段落数")
+    parser.add_argument("--cold-cache", action="store_true", help="每次调用前清空分词缓存")
+    parser.add_argument("--similarity-mode", choices=["tfidf", "hashing"], default=settings.SIMILARITY_MODE, help="相似度向量化方式")
+    parser.add_argument("--seed", type=int, default=42, help="语料随机种子")
+    parser.add_argument("--output", help="结果文件路径（默认保存到 benchmarks/results/）")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str] = None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    settings.SIMILARITY_MODE = args.similarity_mode
+    generator = CorpusGenerator(seed=args.seed)
+
+    results = []
+    for name in args.functions:
+        for size in args.sizes:
+            result = run_case(name, CASES[name], generator, size, args)
+            results.append(result)
+            latency = result["latency_ms"]
+            print(
+                f"{name:<28} size={size:<7} calls={result['calls']:<4} "
+                f"p50={latency['p50']:.2f}ms p90={latency['p90']:.2f}ms p99={latency['p99']:.2f}ms "
+                f"items/s={result['throughput']['items_per_second']:.0f} "
+                f"peak={result['peak_memory_mb']:.1f}MB"
+            )
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"similarity-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "revision": _git_revision(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "args": vars(args)
+            },
+            "results": results
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"结果已保存: {output}")
+
+
+if __name__ == "__main__":
+    main()
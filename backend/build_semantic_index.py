@@ -0,0 +1,56 @@
+"""
+离线构建往届论文标题语义索引（LSA + IVF）
+
+在 backend 目录下执行：
+    python build_semantic_index.py
+    python build_semantic_index.py --components 256 --lists 2000
+
+读取全部往届论文标题，拟合TF-IDF和截断SVD，用球面k-means划分倒排列表，
+结果写入 data/indexes/title_semantic.npz，运行中的服务会在下次标题检查时自动加载。
+"""
+import time
+import asyncio
+import argparse
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models.paper import PreviousPaper
+from app.utils.semantic import SemanticTitleIndex, DEFAULT_COMPONENTS
+from app.utils.file_handler import ensure_directory_exists
+from app.config import settings
+from app.services.archive_service import semantic_index_path
+
+
+async def build_semantic_index(args: argparse.Namespace):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(PreviousPaper.id, PreviousPaper.title))
+        items = [(row.id, row.title) for row in result.all()]
+
+    print(f'📚 往届论文标题: {len(items)} 篇')
+
+    start = time.perf_counter()
+    index = await asyncio.to_thread(
+        SemanticTitleIndex.build,
+        items,
+        n_components=args.components,
+        n_lists=args.lists or None,
+        min_df=args.min_df,
+        seed=args.seed
+    )
+    if not index.ready:
+        print('❌ 标题数量不足，未生成语义索引')
+        return
+
+    ensure_directory_exists(settings.INDEX_DATA_PATH)
+    path = semantic_index_path()
+    index.save(path)
+    print(f'✅ 语义索引已生成: {path}（{index.dimensions}维，耗时 {time.perf_counter() - start:.1f}s）')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='离线构建往届论文标题语义索引')
+    parser.add_argument('--components', type=int, default=DEFAULT_COMPONENTS, help='LSA维数（128~256）')
+    parser.add_argument('--lists', type=int, default=0, help='倒排列表数量（0表示 4·√N）')
+    parser.add_argument('--min-df', type=int, default=1, help='特征最少出现的标题数')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    asyncio.run(build_semantic_index(parser.parse_args()))
@@ -0,0 +1,22 @@
+"""
+测试配置：在导入应用模块之前把数据库、文件和索引目录指向临时目录
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_DATA_DIR = tempfile.mkdtemp(prefix="thesis-check-test-")
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALIBABA_API_KEY", "test-api-key")
+os.environ["DEBUG"] = "false"
+os.environ["STARTUP_WARMUP"] = "false"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_DATA_DIR, 'test.db')}"
+os.environ["STORAGE_PATH"] = os.path.join(_DATA_DIR, "storage")
+os.environ["WHOOSH_INDEX_PATH"] = os.path.join(_DATA_DIR, "whoosh_index")
+os.environ["INDEX_DATA_PATH"] = os.path.join(_DATA_DIR, "indexes")
+os.environ["PROCESS_POOL_WORKERS"] = "2"
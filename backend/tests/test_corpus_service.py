@@ -0,0 +1,46 @@
+"""
+查重比对库服务测试
+"""
+import asyncio
+
+from docx import Document
+
+from app.services.corpus_service import CorpusService, corpus_key
+from app.utils.text_pool import shutdown_process_pool
+
+
+PARAGRAPH = "本文研究了基于深度学习的图像识别方法，并在公开数据集上验证了模型的有效性。" * 5
+
+
+def _write_paper(path: str) -> str:
+    document = Document()
+    for _ in range(10):
+        document.add_paragraph(PARAGRAPH)
+    document.save(path)
+    return path
+
+
+def test_remove_during_pending_add_leaves_no_entry(tmp_path):
+    file_path = _write_paper(str(tmp_path / "paper.docx"))
+
+    async def scenario():
+        service = CorpusService()
+        # 上传后立即删除：后台加入任务完成后不应留下残留条目
+        task = service.add_paper_in_background("graduation", 1, "标题", file_path=file_path)
+        service.remove_paper("graduation", 1)
+        removed_result = await task
+
+        added_result = await service.add_paper("graduation", 2, "标题", file_path=file_path)
+        return service, removed_result, added_result
+
+    try:
+        service, removed_result, added_result = asyncio.run(scenario())
+    finally:
+        shutdown_process_pool()
+
+    assert removed_result is None
+    assert corpus_key("graduation", 1) not in service.index
+    assert corpus_key("graduation", 1) not in service.paragraphs
+    assert corpus_key("graduation", 1) not in service.titles
+    assert added_result
+    assert corpus_key("graduation", 2) in service.index
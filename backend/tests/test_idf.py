@@ -0,0 +1,39 @@
+"""
+语料IDF统计表测试
+"""
+import numpy as np
+
+from app.utils import idf as idf_module
+from app.utils.idf import IdfTable
+
+
+def test_pruned_vocabulary_keeps_idf(monkeypatch, tmp_path):
+    """删除文档后剔除DF为0的词项，IDF与只含剩余文档的新表一致"""
+    monkeypatch.setattr(idf_module, "PRUNE_MIN_DEAD_TERMS", 10)
+    rng = np.random.default_rng(0)
+    docs = {i: [f"t{j}" for j in rng.integers(0, 500, 30)] for i in range(60)}
+
+    table = IdfTable()
+    for key, terms in docs.items():
+        table.add_document(key, terms)
+    for key in range(0, 60, 2):
+        table.remove_document(key)
+    # 删除后重新加入的文档会复用DF为0的词项
+    table.add_document(0, docs[0])
+
+    remaining = {key: terms for key, terms in docs.items() if key % 2 or key == 0}
+    expected = IdfTable()
+    for key, terms in remaining.items():
+        expected.add_document(key, terms)
+
+    probe = [f"t{j}" for j in range(500)]
+    np.testing.assert_allclose(table.idf(probe), expected.idf(probe))
+    # 待剔除计数与实际DF为0的词项数一致
+    assert table._dead_terms == np.count_nonzero(table._df[:len(table._vocabulary)] == 0)
+
+    path = str(tmp_path / "idf.npz")
+    table.save(path)
+    loaded = IdfTable()
+    assert loaded.load(path)
+    assert len(loaded._vocabulary) == len(set(t for terms in remaining.values() for t in terms))
+    np.testing.assert_allclose(loaded.idf(probe), expected.idf(probe))
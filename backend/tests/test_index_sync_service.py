@@ -0,0 +1,65 @@
+"""
+全文索引重建测试
+"""
+import asyncio
+
+from docx import Document
+
+from app.database import init_db, AsyncSessionLocal
+from app.models.user import User, UserRole
+from app.models.paper import GraduationPaper, PreviousPaper
+from app.services.corpus_service import corpus_key
+from app.services.index_sync_service import IndexSyncService, rebuild_index
+from app.utils.search_engine import search_engine
+
+
+def test_rebuild_keeps_graduation_papers(tmp_path):
+    file_path = str(tmp_path / "graduation.docx")
+    document = Document()
+    document.add_paragraph("本文提出了一种基于量子退火的排课优化算法。")
+    document.save(file_path)
+
+    async def scenario():
+        await init_db()
+        async with AsyncSessionLocal() as db:
+            user = User(
+                username="rebuild_student",
+                email="rebuild_student@example.com",
+                password="x",
+                role=UserRole.STUDENT,
+                nickname="学生甲"
+            )
+            db.add(user)
+            await db.flush()
+
+            graduation = GraduationPaper(
+                title="排课系统设计",
+                author_id=user.id,
+                file_path=file_path,
+                file_format="docx",
+                file_size=1,
+                department="计算机学院"
+            )
+            previous = PreviousPaper(
+                title="图书馆管理系统",
+                author="往届学生",
+                year=2020,
+                department="计算机学院",
+                summary="介绍图书借阅流程"
+            )
+            db.add_all([graduation, previous])
+            await db.commit()
+
+            documents = await IndexSyncService.load_all_documents(db)
+            return graduation.id, previous.id, documents
+
+    graduation_id, previous_id, documents = asyncio.run(scenario())
+    assert rebuild_index(documents) == len(documents)
+
+    # 全量重建后毕业论文的全文与往届论文的摘要都可以检索到
+    hits = search_engine.search("量子退火")
+    assert [(hit["id"], hit["paper_type"]) for hit in hits] == [
+        (corpus_key("graduation", graduation_id), "graduation")
+    ]
+    hits = search_engine.search("图书借阅")
+    assert [hit["id"] for hit in hits] == [corpus_key("previous", previous_id)]
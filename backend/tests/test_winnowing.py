@@ -0,0 +1,55 @@
+"""
+全文指纹重复率测试
+"""
+import random
+
+from app.utils.winnowing import FingerprintIndex, fingerprint_text, match_coverage
+
+
+KGRAM_SIZE = 8
+WINDOW_SIZE = 16
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    """生成随机汉字文本（不同调用之间几乎没有公共k-gram）"""
+    return "".join(chr(rng.randrange(0x4e00, 0x9fa5)) for _ in range(length))
+
+
+def test_full_copy_is_fully_covered():
+    rng = random.Random(1)
+    source = _random_text(rng, 3000)
+    index = FingerprintIndex(KGRAM_SIZE, WINDOW_SIZE)
+    index.add_document("source", source)
+
+    report = index.report(source[500:2500])
+
+    assert report["duplicate_rate"] > 99
+
+
+def test_gap_between_two_copied_spans_is_not_counted():
+    rng = random.Random(2)
+    for _ in range(100):
+        first, second = _random_text(rng, 2000), _random_text(rng, 2000)
+        index = FingerprintIndex(KGRAM_SIZE, WINDOW_SIZE)
+        index.add_document("first", first)
+        index.add_document("second", second)
+
+        # 两段独立的抄袭片段之间夹着不超过窗口大小的原创文字
+        span_a = first[rng.randrange(0, 900):][:rng.randrange(30, 200)]
+        span_b = rng.choice([first, second])[rng.randrange(1000, 1800):][:rng.randrange(30, 200)]
+        gap = _random_text(rng, rng.randrange(1, WINDOW_SIZE))
+        text = _random_text(rng, 300) + span_a + gap + span_b + _random_text(rng, 300)
+
+        copied = len(span_a) + len(span_b)
+        assert index.report(text)["matched_chars"] <= copied
+
+        paragraphs = [text[i:i + 97] for i in range(0, len(text), 97)]
+        streamed = index.report_stream(paragraphs, chunk_chars=150)
+        assert streamed["matched_chars"] == index.report("\n".join(paragraphs))["matched_chars"]
+
+        hashes, positions, offsets = fingerprint_text(text, KGRAM_SIZE, WINDOW_SIZE)
+        other_hashes, other_positions, _ = fingerprint_text(first, KGRAM_SIZE, WINDOW_SIZE)
+        covered = match_coverage(
+            hashes, positions, len(offsets), other_hashes, other_positions, KGRAM_SIZE, WINDOW_SIZE
+        )
+        assert covered <= copied